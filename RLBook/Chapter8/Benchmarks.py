@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.Benchmarks
+
+-   Benchmarks of the Monte Carlo Tree Search throughput
+-   Batched leaf evaluation: nodes created per second as a function of the evaluation batch size
+-   Throughput suite: iterations per second, nodes per second and peak tree memory from fixed positions, for each
+    evaluator (random policy, RandomModel and KerasModel)
+-   Strength: win rate against a fixed baseline search as a function of the time budget per move
+-   run_suite writes every result to a JSON file so that regressions show up between releases
+
+"""
+import datetime
+import json
+import logging
+import platform
+import time
+
+import numpy as np
+
+from RLBook.Chapter8 import __version__
+from RLBook.Chapter8.DefaultPlayers import DEFAULT_PLAYERS
+from RLBook.Chapter8.KerasModel import KerasModel
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.NNetPlayers import NNetPlayers
+from RLBook.Chapter8.RandomModel import RandomModel
+from RLBook.Chapter8.TicTacToe import Game
+from RLBook.Utils.MathOperations import random_value_policy
+
+# Fixed positions: moves played from the empty board
+POSITIONS = {"empty": [],
+             "midgame": [(1, 1), (0, 0), (0, 2), (2, 0)],
+             "near_terminal": [(1, 1), (0, 0), (0, 2), (2, 0), (1, 0), (1, 2), (0, 1)]}
+
+EVALUATORS = ("random_policy", "random_model", "keras")
+
+
+def make_evaluator(name):
+    """ Build an evaluator of the suite
+
+        :param name:            One of EVALUATORS
+        :return:                Evaluation function, batched evaluation function and use_nn flag
+
+    """
+    if name == "random_policy":
+        return random_value_policy, None, False
+
+    model = RandomModel() if name == "random_model" else KerasModel() if name == "keras" else None
+    if model is None:
+        raise ValueError("Unknown evaluator: {}".format(name))
+
+    return model.predict, model.predict_batch, True
+
+
+def position(moves):
+    """ Game after playing a sequence of moves from the empty board
+    """
+    game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+    for move in moves:
+        game.play(move)
+
+    return game
+
+
+def batch_size_benchmark(model=None, batch_sizes=(1, 2, 4, 8, 16, 32), max_iterations=2000, max_runtime=60):
+    """ Measure the nodes per second of a Neural Network guided search for several leaf evaluation batch sizes
+
+        :param model:           Model exposing predict and predict_batch (KerasModel by default)
+        :param batch_sizes:     Batch sizes to benchmark
+        :param max_iterations:  Number of iterations of each search
+        :param max_runtime:     Max search time in seconds
+        :return:                List of dictionaries (one per batch size)
+
+    """
+    model = KerasModel() if model is None else model
+    results = []
+
+    for batch_size in batch_sizes:
+        game = Game(players=NNetPlayers, using_nn=True, nn_player=0)
+        tree = MonteCarloTreeSearch(game=game,
+                                    evaluation_func=model.predict,
+                                    batch_evaluation_func=model.predict_batch,
+                                    node_param=game.player.mcts_params,
+                                    use_nn=True)
+
+        t1 = time.time()
+        tree.search(max_iterations=max_iterations, max_runtime=max_runtime, batch_size=batch_size)
+        elapsed = time.time() - t1
+
+        # Created nodes - len(tree.tree) also counts the reserved child slots
+        results.append(dict(batch_size=batch_size,
+                            iterations=int(tree.tree.N_PLAYS[tree.root]),
+                            nodes=tree.tree.n_nodes,
+                            seconds=elapsed,
+                            nodes_per_sec=tree.tree.n_nodes / elapsed))
+        logging.info("Batch size: {batch_size} | {nodes} Nodes | {seconds:.2f}s | "
+                     "{nodes_per_sec:.1f} Nodes/s |>".format(**results[-1]))
+
+    return results
+
+
+def throughput_benchmark(evaluators=EVALUATORS, positions=POSITIONS, max_iterations=2000, max_runtime=60):
+    """ Measure the search throughput from fixed positions for several evaluators
+
+        :param evaluators:      Names of the evaluators (see make_evaluator)
+        :param positions:       Dictionary of position name -> moves played from the empty board
+        :param max_iterations:  Number of iterations of each search
+        :param max_runtime:     Max search time in seconds
+        :return:                List of dictionaries (one per evaluator and position)
+
+    """
+    results = []
+
+    for evaluator in evaluators:
+        evaluation_func, batch_evaluation_func, use_nn = make_evaluator(evaluator)
+
+        for name, moves in positions.items():
+            tree = MonteCarloTreeSearch(game=position(moves), evaluation_func=evaluation_func,
+                                        batch_evaluation_func=batch_evaluation_func, use_nn=use_nn, stats=True)
+            tree.search(max_iterations=max_iterations, max_runtime=max_runtime)
+            stats = tree.stats
+
+            # The arrays of the tree only grow during a search - their final size is the peak
+            results.append(dict(evaluator=evaluator,
+                                position=name,
+                                iterations=stats.ITERATIONS,
+                                nodes=stats.NODES,
+                                seconds=stats.SEARCH_TIME,
+                                iterations_per_sec=stats.iterations_per_sec,
+                                nodes_per_sec=stats.NODES_CREATED / stats.SEARCH_TIME if stats.SEARCH_TIME else 0.,
+                                peak_tree_bytes=int(tree.tree.nbytes),
+                                phases=dict(stats.TIME)))
+            logging.info("{evaluator} | {position} | {iterations} Iterations | {iterations_per_sec:.1f} Iterations/s | "
+                         "{nodes_per_sec:.1f} Nodes/s | {peak_tree_bytes} Bytes |>".format(**results[-1]))
+
+    return results
+
+
+def play_match(time_budget, n_games=10, baseline_iterations=50, max_iterations=100000):
+    """ Play a search limited by a time budget per move against a baseline search of fixed size
+
+        Both players use the random policy, the first move alternates between them.
+
+        :param time_budget:         Seconds per move of the evaluated search
+        :param n_games:             Number of games
+        :param baseline_iterations: Iterations per move of the baseline search
+        :param max_iterations:      Max number of iterations per move of the evaluated search
+        :return:                    Dictionary with the number of wins, ties and losses of the evaluated search
+
+    """
+    results = dict(wins=0, ties=0, losses=0)
+
+    for each_game in range(n_games):
+        game = Game(players=DEFAULT_PLAYERS)
+        player = game.players[each_game % 2]
+
+        while not game.is_terminal:
+            tree = MonteCarloTreeSearch(game=game, evaluation_func=random_value_policy)
+            if game.current_player == player:
+                tree.search(max_iterations=max_iterations, max_runtime=time_budget)
+            else:
+                tree.search(max_iterations=baseline_iterations, max_runtime=time_budget * 100)
+
+            move, _ = tree.recommended_play(train=False)
+            game.play(move)
+
+        winner = game.winner
+        results["ties" if winner is None else "wins" if winner == player else "losses"] += 1
+
+    return results
+
+
+def strength_benchmark(time_budgets=(0.01, 0.05, 0.2), n_games=10, baseline_iterations=50):
+    """ Win rate against a fixed baseline as a function of the time budget per move
+
+        :param time_budgets:        Seconds per move of the evaluated search
+        :param n_games:             Number of games per time budget
+        :param baseline_iterations: Iterations per move of the baseline search
+        :return:                    List of dictionaries (one per time budget)
+
+    """
+    results = []
+
+    for time_budget in time_budgets:
+        match = play_match(time_budget, n_games=n_games, baseline_iterations=baseline_iterations)
+        results.append(dict(time_budget=time_budget, games=n_games, baseline_iterations=baseline_iterations,
+                            win_rate=match["wins"] / n_games, tie_rate=match["ties"] / n_games,
+                            loss_rate=match["losses"] / n_games))
+        logging.info("Time budget: {time_budget}s | Win rate {win_rate:.2f} | Tie rate {tie_rate:.2f} | "
+                     "Loss rate {loss_rate:.2f} |>".format(**results[-1]))
+
+    return results
+
+
+def run_suite(path="mcts_benchmarks.json", evaluators=EVALUATORS, max_iterations=2000, max_runtime=60,
+              time_budgets=(0.01, 0.05, 0.2), n_games=10, seed=2018):
+    """ Run the throughput and strength benchmarks and write the results to a JSON file
+
+        :param path:            Path of the JSON file
+        :param evaluators:      Names of the evaluators of the throughput benchmark
+        :param max_iterations:  Number of iterations of each throughput search
+        :param max_runtime:     Max time of each throughput search in seconds
+        :param time_budgets:    Seconds per move of the strength benchmark
+        :param n_games:         Number of games per time budget
+        :param seed:            Seed of the random number generator
+        :return:                Dictionary of the results
+
+    """
+    np.random.seed(seed)
+
+    results = dict(version=__version__,
+                   date=datetime.datetime.now().isoformat(),
+                   python=platform.python_version(),
+                   numpy=np.__version__,
+                   machine=platform.machine(),
+                   throughput=throughput_benchmark(evaluators=evaluators, max_iterations=max_iterations,
+                                                   max_runtime=max_runtime),
+                   strength=strength_benchmark(time_budgets=time_budgets, n_games=n_games))
+
+    with open(path, "w") as handle:
+        json.dump(results, handle, indent=2)
+    logging.info("Benchmark results written to {}".format(path))
+
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    run_suite()
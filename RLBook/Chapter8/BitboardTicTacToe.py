@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.BitboardTicTacToe
+
+Tic Tac Toe game implementation on bitboards
+
+*   The squares of each player are stored as a 9-bit integer (bit i set = the player holds square i)
+*   Wins are looked up in a table built from the 8 win masks, legal moves from the complement of both boards
+*   The symmetries of a board (rotations and reflections) are looked up in one table per symmetry
+*   Same interface as RLBook.Chapter8.TicTacToe.Game, the NumPy state is kept in sync for the Neural Network
+
+"""
+import numpy as np
+
+from RLBook.Chapter8.TicTacToe import Game
+
+# Rows, columns and diagonals
+WIN_MASKS = (0b000000111, 0b000111000, 0b111000000,
+             0b001001001, 0b010010010, 0b100100100,
+             0b100010001, 0b001010100)
+
+FULL_BOARD = 0b111111111
+
+# Lookup tables indexed by a 9-bit board: does it hold a win line / list of its set squares
+WINNING = [any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL_BOARD + 1)]
+SQUARES = [[Game.POSITIONS[index] for index in range(9) if bits >> index & 1] for bits in range(FULL_BOARD + 1)]
+
+
+def symmetry_tables():
+    """ Lookup tables of the 8 symmetries of a 9-bit board
+
+        :return:                List (symmetries) of lists indexed by a board giving the board after the symmetry
+
+    """
+    squares = np.arange(9).reshape(3, 3)
+
+    tables = []
+    for board in (squares, squares.T):
+        for symmetry in (board, board[::-1], board[:, ::-1], board[::-1, ::-1]):
+            # Square i of the transformed board holds the stone of square symmetry[i] of the board
+            sources = symmetry.ravel().tolist()
+            tables.append([sum(1 << index for index, source in enumerate(sources) if bits >> source & 1)
+                           for bits in range(FULL_BOARD + 1)])
+
+    return tables
+
+
+SYMMETRIES = symmetry_tables()
+
+
+class BitboardGame(Game):
+    """ TicTacToe game implementation on bitboards to be used by Monte Carlo Tree Search
+    """
+
+    def __init__(self, board_size=3, players=None, using_nn=None, nn_player=0):
+        """
+
+            :param board_size:          Only 3x3 boards are supported
+            :param players:             Optional: Pass
+            :param using_nn:            Flag to indicate if a Neural Network is being utilised
+            :param nn_player:           Identification of which agent is the Neural Network
+
+        """
+        if board_size != 3:
+            raise ValueError('Bitboards only support 3x3 boards')
+
+        super().__init__(board_size=board_size, players=players, using_nn=using_nn, nn_player=nn_player)
+
+    def __repr__(self):
+        return "< Bitboard TicTacToe > "
+
+    def __str__(self):
+        return "< Bitboard TicTacToe > "
+
+    def _new_board(self):
+        """ Empty the board and every statistic updated on each move
+        """
+        self.state = np.zeros(self.shape, dtype=int)
+        self.last_play = None
+
+        # One bitboard per player (in the order of self.players) - they replace the sums, free squares and hash
+        self.bits = [0] * len(self.players)
+        self._winner = None
+
+        # History: (square index, player value) of each move and the matching action probabilities
+        self.moves = []
+        self.policies = []
+
+    @property
+    def key(self):
+        """ Hashable key of the position: the bitboards of the players
+        """
+        return tuple(self.bits)
+
+    @property
+    def canonical_key(self):
+        """ Key of the position identical for the symmetries (rotations and reflections) of the board: the smallest
+            bitboards of the players under the 8 symmetries
+        """
+        return min(tuple(table[bits] for bits in self.bits) for table in SYMMETRIES)
+
+    @property
+    def free_squares(self):
+        """ Bitboard of the empty squares
+        """
+        occupied = 0
+        for bits in self.bits:
+            occupied |= bits
+        return FULL_BOARD & ~occupied
+
+    def legal_plays(self):
+        """ Moves that are legal to play for the current player
+
+            :return:        the list of moves tuples that are legal to play for the current player
+
+        """
+        return [] if self._winner is not None else SQUARES[self.free_squares]
+
+    @property
+    def is_terminal(self):
+        """ True once the game is won or the board is full
+        """
+        return self._winner is not None or not self.free_squares
+
+    def play(self, move=None, action_prob=1):
+        """ Play a move
+
+            :param move:            selected move to play. If None it is chosen randomly from legal plays
+            :param action_prob:     Action probabilities from the Agent
+
+        """
+        # If input move is provided check that it is legal
+        if move is not None:
+            index = self.DICTIONARY.get(move)
+            if index is None or self._winner is not None or not self.free_squares >> index & 1:
+                raise ValueError('Selected move is illegal')
+            selected_move = self.POSITIONS[index]
+        # Select a move randomly
+        else:
+            legal_plays = self.legal_plays()
+            selected_move = legal_plays[np.random.randint(len(legal_plays))]
+            index = self.DICTIONARY[selected_move]
+
+        # Updates bitboards, state and players info
+        player_index = self.players_index[self.current_player.value]
+        self.bits[player_index] |= 1 << index
+        self.state[selected_move] = self.current_player.value
+
+        self.moves.append((index, self.current_player.value))
+        self.policies.append(action_prob)
+
+        if WINNING[self.bits[player_index]]:
+            self._winner = self.current_player
+
+        self.current_player = next(self.players_gen)
+        self.last_play = selected_move
+
+    def undo(self):
+        """ Undo the last move played - exact reverse of play
+
+            :return:                Move that has been undone
+
+        """
+        if not self.moves:
+            raise ValueError('No move to undo')
+
+        index, player_value = self.moves.pop()
+        self.policies.pop()
+        move = self.position(index)
+
+        player_index = self.players_index[player_value]
+        self.bits[player_index] &= ~(1 << index)
+        self.state[move] = 0
+
+        # No move can follow a win, the position before the move had no winner
+        self._winner = None
+
+        # Restore the player of the move, the players generator then yields the player after them
+        player = self.players[player_index]
+        while next(self.players_gen) != player:
+            pass
+        self.current_player = player
+        self.last_play = self.position(self.moves[-1][0]) if self.moves else None
+
+        return move
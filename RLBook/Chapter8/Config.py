@@ -16,7 +16,9 @@ class Config:
     """
     __nn_keys_list = ["MODEL_TYPE", "MODEL_NAME", "CNN_FILTER_NUM", "CNN_FILTER_SIZE", "VALUE_FC_SIZE",
                       "L2_REG", "RES_LAYER_NUM", "ACTIVATION_DENSE", "ACTIVATION", "N_LABELS", "MODEL_TYPE",
-                      "ACTIVATION_POLICY", "BATCH_SIZE", "EPOCHS", "MCTS_ITERATIONS", "MCTS_MAX_TIME"]
+                      "ACTIVATION_POLICY", "BATCH_SIZE", "EPOCHS", "MCTS_ITERATIONS", "MCTS_MAX_TIME",
+                      "MCTS_BATCH_SIZE", "MCTS_FULL_EXPANSION", "BOARD_SHAPE",
+                      "N_TRAIN_SAMPLES"]
     __mcts_keys_list = ["N_PLAYS", "N_WINS", "N_TIES", "SCORE", "PRIOR", "PRIOR",
                         "C_PUCT", "C_PUCT", "TAU", "Q", "U", "ACTION", "V"]
 
@@ -32,12 +34,16 @@ class Config:
     CNN_FILTER_SIZE = 1
     MODEL_NAME = "{}_V".format(datetime.datetime.now().strftime("%Y%m%d_KerasModel_TTT"))
     N_LABELS = 9
+    BOARD_SHAPE = (3, 3)
     ACTIVATION_POLICY = "softmax"
     VALUE_FC_SIZE = 1
     BATCH_SIZE = 8
     EPOCHS = 3
+    N_TRAIN_SAMPLES = 512
     MCTS_ITERATIONS = 10000
     MCTS_MAX_TIME = 8
+    MCTS_BATCH_SIZE = 1
+    MCTS_FULL_EXPANSION = False
     MOMENTUM = 0.9
     LR = 1e-2
     SHUFFLE = True
@@ -94,7 +100,9 @@ class Config:
 class EnvConfig:
     """ Environment Settings
     """
-    __acceptable_keys = ["N_ITERATION", "N_EPISODE", "WIN_RATIO", "START_TIME", "START_T", "EVALUATIONS"]
+    __acceptable_keys = ["N_ITERATION", "N_EPISODE", "WIN_RATIO", "START_TIME", "START_T", "EVALUATIONS",
+                         "EVAL_CACHE_SIZE", "SEARCH_STATS_PATH", "MEMORY_SIZE", "PRIORITIZED_MEMORY",
+                         "MEMORY_PATH"]
 
     def __init__(self, **kwargs):
         """
@@ -112,6 +120,21 @@ class EnvConfig:
         self.EVALUATIONS = 20
         self.WARM_UP_ITERATION = 3
 
+        # Number of positions in the evaluation cache of each model (0 to disable it)
+        self.EVAL_CACHE_SIZE = 4096
+
+        # JSON lines file receiving the statistics of the search of each move (None to disable them)
+        self.SEARCH_STATS_PATH = None
+
+        # Number of positions kept in the replay buffer (the oldest ones are overwritten)
+        self.MEMORY_SIZE = 50000
+
+        # Sample the training positions in proportion to their loss (Prioritized Replay Buffer)
+        self.PRIORITIZED_MEMORY = False
+
+        # Directory of the on-disk memory (chunked Memory Store), None to pickle the whole memory instead
+        self.MEMORY_PATH = "ttt_memory"
+
         for k in kwargs:
             # If the Key is in the accepted list then update
             if k in self.__acceptable_keys:
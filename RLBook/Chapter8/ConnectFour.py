@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.ConnectFour
+
+Connect Four game implementation on bitboards
+
+*   The stones of each player are stored as an integer: bit (column * 7 + row) is set when the player holds that
+    square, row 0 being the bottom of the board. The 7th bit of each column is a sentinel which is never set
+*   A move is a column, the next free square of each column is tracked by its height
+*   Four in a row is detected with shifts: 1 (vertical), 7 (horizontal), 6 and 8 (diagonals)
+*   Same interface as RLBook.Chapter8.TicTacToe.Game, the NumPy state (row 0 at the top) is kept in sync for display
+
+Note: Moves are constrained by gravity, the vectorised rollouts (MonteCarloTreeSearch n_rollouts) are rejected.
+
+"""
+import numpy as np
+
+from RLBook.Chapter8.TicTacToe import Game
+
+ROWS = 6
+COLUMNS = 7
+HEIGHT = ROWS + 1
+
+# Bit of each square of the board (as displayed, row 0 at the top)
+BITS = np.array([[column * HEIGHT + ROWS - 1 - row for column in range(COLUMNS)] for row in range(ROWS)],
+                dtype=np.int64)
+
+# Shifts of the 4 directions: vertical, horizontal and both diagonals
+SHIFTS = (1, HEIGHT, HEIGHT - 1, HEIGHT + 1)
+
+
+def connected_four(bits):
+    """ Check whether a bitboard holds four stones in a row
+
+        :param bits:            Bitboard of a player
+        :return:                True if four stones are aligned
+
+    """
+    for shift in SHIFTS:
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> 2 * shift):
+            return True
+
+    return False
+
+
+def mirror(bits):
+    """ Mirror a bitboard (left-right), the only symmetry of Connect Four
+
+        :param bits:            Bitboard
+        :return:                Mirrored bitboard
+
+    """
+    mirrored, column_mask = 0, (1 << HEIGHT) - 1
+    for column in range(COLUMNS):
+        mirrored |= ((bits >> (column * HEIGHT)) & column_mask) << ((COLUMNS - 1 - column) * HEIGHT)
+
+    return mirrored
+
+
+class ConnectFour(Game):
+    """ Connect Four game implementation on bitboards to be used by Monte Carlo Tree Search
+
+        https://en.wikipedia.org/wiki/Connect_Four
+
+    """
+
+    def __init__(self, players=None, using_nn=None, nn_player=0):
+        """
+
+            :param players:             Optional: Pass
+            :param using_nn:            Flag to indicate if a Neural Network is being utilised
+            :param nn_player:           Identification of which agent is the Neural Network
+
+        """
+        super().__init__(board_size=COLUMNS, players=players, using_nn=using_nn, nn_player=nn_player)
+        self.shape, self.k = (ROWS, COLUMNS), 4
+
+    def __repr__(self):
+        return "< Connect Four > "
+
+    def __str__(self):
+        return "< Connect Four > "
+
+    def _new_board(self):
+        """ Empty the board and every statistic updated on each move
+        """
+        self.state = np.zeros((ROWS, COLUMNS), dtype=int)
+        self.last_play = None
+
+        # One bitboard per player (in the order of self.players), bit of the next free square of each column
+        self.bits = [0] * len(self.players)
+        self.heights = [column * HEIGHT for column in range(COLUMNS)]
+        self._legal_plays = None
+        self._winner = None
+
+        # History: (column, player value) of each move and the matching action probabilities
+        self.moves = []
+        self.policies = []
+
+    @property
+    def key(self):
+        """ Hashable key of the position: the bitboards of the players
+        """
+        return tuple(self.bits)
+
+    @property
+    def canonical_key(self):
+        """ Key of the position identical for the position and its mirror image
+        """
+        return min(self.key, tuple(mirror(bits) for bits in self.bits))
+
+    @property
+    def n_actions(self):
+        """ Number of columns - size of the policy
+        """
+        return COLUMNS
+
+    @property
+    def is_terminal(self):
+        """ True once the game is won or the board is full
+        """
+        return self._winner is not None or len(self.moves) == ROWS * COLUMNS
+
+    def legal_plays(self):
+        """ Columns that are not full, for the current player
+
+            Note: The list is cached until the next move, it must not be modified.
+
+            :return:        the list of columns that are legal to play for the current player
+
+        """
+        if self._legal_plays is None:
+            self._legal_plays = [] if self._winner is not None else \
+                [column for column in range(COLUMNS) if self.heights[column] < column * HEIGHT + ROWS]
+
+        return self._legal_plays
+
+    def play(self, move=None, action_prob=1):
+        """ Play a move
+
+            :param move:            selected column to play. If None it is chosen randomly from legal plays
+            :param action_prob:     Action probabilities from the Agent
+
+        """
+        legal_plays = self.legal_plays()
+
+        # If input move is provided check that it is legal
+        if move is not None:
+            if move in legal_plays:
+                column = int(move)
+            else:
+                raise ValueError('Selected move is illegal')
+        # Select a move randomly
+        else:
+            column = legal_plays[np.random.randint(len(legal_plays))]
+
+        # Drop the stone in the column
+        value = self.current_player.value
+        player_index = self.players_values.index(value)
+        self.bits[player_index] |= 1 << self.heights[column]
+        self.state[ROWS - 1 - self.heights[column] % HEIGHT, column] = value
+        self.heights[column] += 1
+        self._legal_plays = None
+
+        self.moves.append((column, value))
+        self.policies.append(action_prob)
+
+        if connected_four(self.bits[player_index]):
+            self._winner = self.current_player
+
+        self.current_player = next(self.players_gen)
+        self.last_play = column
+
+    def undo(self):
+        """ Undo the last move played - exact reverse of play
+
+            :return:                Move that has been undone
+
+        """
+        if not self.moves:
+            raise ValueError('No move to undo')
+
+        column, player_value = self.moves.pop()
+        self.policies.pop()
+
+        # Remove the top stone of the column
+        player_index = self.players_values.index(player_value)
+        self.heights[column] -= 1
+        self.bits[player_index] &= ~(1 << self.heights[column])
+        self.state[ROWS - 1 - self.heights[column] % HEIGHT, column] = 0
+        self._legal_plays = None
+
+        # No move can follow a win, the position before the move had no winner
+        self._winner = None
+
+        # Restore the player of the move, the players generator then yields the player after them
+        player = self.players[player_index]
+        while next(self.players_gen) != player:
+            pass
+        self.current_player = player
+        self.last_play = self.moves[-1][0] if self.moves else None
+
+        return column
+
+    def board(self, state_number=-1):
+        """ Rebuild the board from the moves
+
+            :param state_number:    Number of moves played on the board (negative values count from the current
+                                    board, -1)
+            :return:                Board (rows, columns)
+
+        """
+        n_states = len(self.moves) + 1
+        if not -n_states <= state_number < n_states:
+            raise IndexError('State {} does not exist'.format(state_number))
+
+        state = np.zeros_like(self.state)
+        for column, value in self.moves[:state_number % n_states]:
+            state[ROWS - 1 - np.count_nonzero(state[:, column]), column] = value
+
+        return state
+
+    def replay(self):
+        """ Replay the moves, rebuilding the board after each of them
+
+            :return:                Generator of (board after the move, column, player value, action probs)
+
+        """
+        state = np.zeros_like(self.state)
+        for (column, value), action_prob in zip(self.moves, self.policies):
+            state[ROWS - 1 - np.count_nonzero(state[:, column]), column] = value
+            yield state.copy(), column, value, action_prob
+
+    def encode(self, value=None):
+        """ Encode the board into a Neural Network input straight from the bitboards
+
+            :param value:           Value of the player of the first plane - defaults to the Neural Network player
+            :return:                State (1, 2, rows, columns)
+
+        """
+        value = self.nn_index[0].value if value is None else value
+        player_index = self.players_values.index(value)
+
+        others = 0
+        for index, bits in enumerate(self.bits):
+            if index != player_index:
+                others |= bits
+
+        states = np.zeros((1, 2, ROWS, COLUMNS))
+        states[0, 0] = np.int64(self.bits[player_index]) >> BITS & 1
+        states[0, 1] = np.int64(others) >> BITS & 1
+
+        return states
+
+    def translate(self, position):
+        """ Translate a column to its Index in the policy
+
+            :param position:    Column
+            :return:            Index in the policy, None if off the board
+
+        """
+        return int(position) if 0 <= position < COLUMNS else None
+
+    def position(self, index):
+        """ Translate an Index in the policy to a column
+
+            :param index:       Index in the policy
+            :return:            Column, None if off the board
+
+        """
+        return int(index) if index is not None and 0 <= index < COLUMNS else None
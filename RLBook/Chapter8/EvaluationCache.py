@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.EvaluationCache
+
+Bounded LRU cache of the evaluations (policy, value) of a Neural Network
+
+*   Positions are keyed by their canonical form: the smallest of the encoded planes under the symmetries of the board
+*   The policy is stored in the canonical frame and mapped back through the symmetry of the position on a hit, the
+    value is invariant
+*   The cache is emptied whenever the weights of the model change (NeuralNet.WEIGHTS_VERSION)
+
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+# Symmetries: (number of quarter turns, left-right mirror)
+DIHEDRAL = tuple((turns, flip) for turns in range(4) for flip in (False, True))
+HALF_TURNS = ((0, False), (0, True), (2, False), (2, True))
+MIRROR = ((0, False), (0, True))
+
+
+def board_symmetries(game):
+    """ Symmetries of the board of a game under which its policy can be remapped
+
+        :param game:            Board Game
+        :return:                Tuple of symmetries: the 8 of a square board, 4 for a rectangle and only the mirror
+                                when the policy is a column (gravity games such as Connect Four)
+
+    """
+    rows, columns = game.shape
+
+    if game.n_actions != rows * columns:
+        return MIRROR
+
+    return DIHEDRAL if rows == columns else HALF_TURNS
+
+
+def transform(array, symmetry):
+    """ Apply a symmetry to the last two axes of an array
+
+        :param array:           Array (..., rows, columns)
+        :param symmetry:        (number of quarter turns, mirror)
+        :return:                Transformed array
+
+    """
+    turns, flip = symmetry
+    array = np.rot90(array, turns, axes=(-2, -1))
+
+    return array[..., ::-1] if flip else array
+
+
+def inverse_transform(array, symmetry):
+    """ Undo a symmetry applied by transform
+    """
+    turns, flip = symmetry
+    array = array[..., ::-1] if flip else array
+
+    return np.rot90(array, -turns, axes=(-2, -1))
+
+
+class EvaluationCache:
+    """ LRU cache wrapping an evaluation function (and its batched version)
+
+        The cache has the same interface as the model: predict for a single state (1, 2, rows, columns) and
+        predict_batch for a batch of states (K, 2, rows, columns), only the states missing from the cache are
+        evaluated.
+
+    """
+
+    def __init__(self, evaluation_func, batch_evaluation_func=None, capacity=4096, symmetries=DIHEDRAL, model=None):
+        """ Initialise an empty cache
+
+            :param evaluation_func:         Evaluation function - list of (action, probability) tuples and value
+            :param batch_evaluation_func:   Optional batched evaluation function - policies (K, n_actions) and values
+            :param capacity:                Maximum number of positions kept
+            :param symmetries:              Symmetries of the board (see board_symmetries)
+            :param model:                   Model whose WEIGHTS_VERSION invalidates the cache - defaults to the
+                                            owner of the evaluation function
+
+        """
+        self.evaluation_func = evaluation_func
+        self.batch_evaluation_func = batch_evaluation_func
+        self.capacity = capacity
+        self.symmetries = symmetries
+        self.model = getattr(evaluation_func, "__self__", None) if model is None else model
+
+        self.entries = OrderedDict()
+        self.version = self._weights_version()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "< Evaluation Cache | {} / {} Positions | Hit Rate {:.1%} >".format(len(self), self.capacity,
+                                                                                 self.hit_rate)
+
+    @property
+    def hit_rate(self):
+        """ Share of the lookups answered from the cache
+        """
+        return self.hits / max(self.hits + self.misses, 1)
+
+    @property
+    def stats(self):
+        """ Counters of the cache
+        """
+        return dict(HITS=self.hits, MISSES=self.misses, EVICTIONS=self.evictions, SIZE=len(self))
+
+    def _weights_version(self):
+        return getattr(self.model, "WEIGHTS_VERSION", 0)
+
+    def clear(self):
+        """ Drop every cached evaluation (the counters are kept)
+        """
+        self.entries.clear()
+        self.version = self._weights_version()
+
+    def canonical(self, state):
+        """ Canonical key of a state and the symmetry mapping the state to it
+
+            :param state:           State (2, rows, columns)
+            :return:                Key (bytes) and symmetry
+
+        """
+        keys = [(transform(state, symmetry).tobytes(), symmetry) for symmetry in self.symmetries]
+
+        return min(keys, key=lambda key: key[0])
+
+    @staticmethod
+    def _policy_grid(policy, state):
+        """ Shape of a policy as a board: (rows, columns) or a single row of columns
+        """
+        return policy.reshape(state.shape[-2:] if policy.size == state[0].size else (1, -1))
+
+    def lookup(self, state):
+        """ Cached evaluation of a state
+
+            :param state:           State (2, rows, columns)
+            :return:                Policy (n_actions,) and value, None if the state is not cached
+
+        """
+        if self.version != self._weights_version():
+            self.clear()
+
+        key, symmetry = self.canonical(state)
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        policy, value = entry
+        policy = inverse_transform(self._policy_grid(policy, state), symmetry)
+
+        return policy.ravel(), value
+
+    def store(self, state, policy, value):
+        """ Cache the evaluation of a state, the least recently used one is evicted when the cache is full
+
+            :param state:           State (2, rows, columns)
+            :param policy:          Policy (n_actions,)
+            :param value:           Value
+
+        """
+        key, symmetry = self.canonical(state)
+        policy = transform(self._policy_grid(np.asarray(policy, dtype=float), state), symmetry)
+
+        self.entries[key] = (policy.ravel(), value)
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def predict(self, tuple_arrays=None, state=None, current_player=0):
+        """ Cached evaluation function - same interface as NeuralNet.predict
+
+            :param tuple_arrays:    State (1, 2, rows, columns)
+            :param state:           Not used
+            :param current_player:  Not used
+            :return:                List of (action, probability) tuples and the value
+
+        """
+        entry = self.lookup(tuple_arrays[0])
+
+        if entry is None:
+            action_probs, value = self.evaluation_func(tuple_arrays)
+            self.store(tuple_arrays[0], [prob for _, prob in action_probs], value)
+            return action_probs, value
+
+        policy, value = entry
+        return [(action, prob) for action, prob in enumerate(policy)], value
+
+    def predict_batch(self, tuple_arrays):
+        """ Cached batched evaluation - only the states missing from the cache are evaluated, in a single call
+
+            :param tuple_arrays:    Batch of states (K, 2, rows, columns)
+            :return:                Policies (K, n_actions) and Values (K,)
+
+        """
+        entries = [self.lookup(state) for state in tuple_arrays]
+        missing = [index for index, entry in enumerate(entries) if entry is None]
+
+        if missing:
+            if self.batch_evaluation_func is not None:
+                policies, values = self.batch_evaluation_func(tuple_arrays[missing])
+            else:
+                evaluations = [self.evaluation_func(tuple_arrays[index:index + 1]) for index in missing]
+                policies = np.array([[prob for _, prob in action_probs] for action_probs, _ in evaluations])
+                values = np.array([value for _, value in evaluations])
+
+            for index, policy, value in zip(missing, policies, values):
+                self.store(tuple_arrays[index], policy, value)
+                entries[index] = (policy, value)
+
+        return np.array([policy for policy, _ in entries]), np.array([value for _, value in entries])
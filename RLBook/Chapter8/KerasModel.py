@@ -9,6 +9,7 @@ import logging
 import numpy as np
 
 from RLBook.Chapter8.Config import Config
+from RLBook.Chapter8.ReplayBuffer import PrioritizedReplayBuffer, ReplayBuffer
 from RLBook.Utils.NeuralNetwork import NeuralNet
 from RLBook.Utils.PolicyTypes import PolicyEnum
 from RLBook.Utils.ResNet import ResidualNet
@@ -52,10 +53,13 @@ class KerasModel(NeuralNet):
     def concatenate_arrays(tuple_arrays):
         """ This will translate the List of Lists into three numpy arrays
 
-            :param tuple_arrays:    List of Lists containing the training data
-            :return:                Three numpy arrays for State, Policy and Value
+            :param tuple_arrays:    Replay Buffer or List of Lists containing the training data
+            :return:                Three numpy arrays for State, Policy and Value (views of a Replay Buffer)
 
         """
+        if isinstance(tuple_arrays, ReplayBuffer):
+            return tuple_arrays.arrays()
+
         state_ary, policy_ary, z_ary = tuple_arrays[0], tuple_arrays[1], tuple_arrays[2]
         return np.concatenate(state_ary, axis=0), \
                np.concatenate(policy_ary, axis=0), \
@@ -64,30 +68,51 @@ class KerasModel(NeuralNet):
     def train(self, tuple_arrays):
         """ Training method to invoke the training of the Neural Network
 
-            :param tuple_arrays:    List of Lists containing the training data
+            A Replay Buffer is sampled (N_TRAIN_SAMPLES positions) - for a Prioritized Replay Buffer the importance
+            sampling weights are passed to the fit and the priorities are updated from the losses of the trained
+            positions.
+
+            :param tuple_arrays:    Replay Buffer or List of Lists containing the training data
             :return:                None
 
         """
-        # Concatenate the Arrays and get the training data
-        state_ary, policy_ary, z_ary = self.concatenate_arrays(tuple_arrays=tuple_arrays)
+        prioritized = isinstance(tuple_arrays, PrioritizedReplayBuffer)
+
+        # Sample or Concatenate the Arrays and get the training data
+        if prioritized:
+            state_ary, policy_ary, z_ary, indexes, weights = tuple_arrays.sample(
+                min(len(tuple_arrays), self.config.N_TRAIN_SAMPLES))
+        elif isinstance(tuple_arrays, ReplayBuffer):
+            state_ary, policy_ary, z_ary = tuple_arrays.sample(min(len(tuple_arrays), self.config.N_TRAIN_SAMPLES))
+            weights = None
+        else:
+            state_ary, policy_ary, z_ary = self.concatenate_arrays(tuple_arrays=tuple_arrays)
+            weights = None
 
         try:
             # Train the Model
-            self._train(policy_ary, state_ary, z_ary)
+            self._train(policy_ary, state_ary, z_ary, sample_weight=weights)
 
         except RuntimeError:
             # The Model may require it to be compiled post load
             self.model.compile()
 
             # Train the Model
-            self._train(policy_ary, state_ary, z_ary)
+            self._train(policy_ary, state_ary, z_ary, sample_weight=weights)
+
+        if prioritized:
+            tuple_arrays.update_priorities(indexes, self.losses(state_ary, policy_ary, z_ary))
+
+        # The cached evaluations are out of date
+        self.WEIGHTS_VERSION += 1
 
-    def _train(self, policy_ary, state_ary, z_ary):
+    def _train(self, policy_ary, state_ary, z_ary, sample_weight=None):
         """ Private method to call the training of the model
 
             :param policy_ary:      Policy
             :param state_ary:       State Matrix
             :param z_ary:           Value
+            :param sample_weight:   Optional weight of each sample
 
         """
         # Train the Model
@@ -95,7 +120,21 @@ class KerasModel(NeuralNet):
                        shuffle=self.config.EPOCHS,
                        batch_size=self.config.BATCH_SIZE,
                        epochs=self.config.EPOCHS,
-                       verbose=self.config.VERBOSE)
+                       verbose=self.config.VERBOSE,
+                       sample_weight=sample_weight)
+
+    def losses(self, state_ary, policy_ary, z_ary):
+        """ Loss of each sample: policy cross entropy plus value squared error
+
+            :param state_ary:       State Matrix
+            :param policy_ary:      Policy
+            :param z_ary:           Value
+            :return:                Array of losses (one per sample)
+
+        """
+        policies, values = self.predict_batch(state_ary)
+
+        return -np.sum(policy_ary * np.log(policies + 1e-7), axis=1) + np.square(z_ary[:, 0] - values)
 
     def predict(self, tuple_arrays=None, state=None, current_player=0):
         """ Prediction
@@ -110,6 +149,18 @@ class KerasModel(NeuralNet):
 
         return [(val, prob) for val, prob in enumerate(tuples[0])], value[0][0]
 
+    def predict_batch(self, tuple_arrays):
+        """ Batched Prediction - one call to the model for a whole batch of states
+
+            :param tuple_arrays:    Batch of states (K, 2, rows, columns)
+            :return:                Policies (K, n_actions) and Values (K,)
+
+        """
+        policies, values = self.model.predict(x=tuple_arrays, batch_size=len(tuple_arrays),
+                                              verbose=self.config.VERBOSE)
+
+        return policies, values[:, 0]
+
     def _handle_state(self, state, current_player):
         """
 
@@ -5,14 +5,19 @@
 
 """
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 
 import numpy as np
-from anytree import Node, LevelOrderGroupIter, RenderTree
 
 from RLBook.Chapter8 import DEFAULT_NODE_PARAMS
-from RLBook.Utils.MathOperations import upper_confidence_bound
+from RLBook.Chapter8.Rollouts import random_rollouts
+from RLBook.Chapter8.SearchStats import SearchStats
+from RLBook.Chapter8.SearchTree import SearchTree
+from RLBook.Utils.MathOperations import puct_scores
 
 
 class MonteCarloTreeSearch:
@@ -20,180 +25,582 @@ class MonteCarloTreeSearch:
 
         Note: Based on http://mcts.ai/pubs/mcts-survey-master.pdf
 
+        Nodes are stored in a flat SearchTree and referenced by their index, the root being index 0.
+
+        Leaves can be evaluated in batches: several leaves are selected per step, a virtual loss on the nodes of
+        their path spreads the selections, and the Neural Network evaluates all of them in a single call.
+
+        Root parallelisation: independent searches run in a process pool and their root statistics are merged.
+        Tree parallelisation: several threads share one tree, spread by virtual loss, the tree being locked only
+        while it is walked or updated.
+
+        With transpositions enabled the tree becomes a DAG: a child slot reaching a position already in the tree
+        links to the node holding the statistics of that position, and results are back-propagated along the path
+        that was actually selected.
+
+        Nodes do not hold a copy of the game: a single game is played down the selected path, through the
+        simulation, and then undone back to the root position.
+
+        MCTS-Solver: terminal positions are proven, proofs are propagated up the selected path with minimax (the
+        player to move wins if one child is a proven win for them, otherwise the node is proven once every child is),
+        proven children are no longer selected and the search stops once the root is proven.
+
+        Full expansion: a node is evaluated once, when it is first reached, its policy gives the priors of all its
+        children (allocated in decreasing order of prior) which are then expanded one after the other without any
+        further call to the Neural Network.
+
     """
     OUT = '%s | Action: %s | Player %s | %s Wins / %s Plays | V %.3f | Q: %.3f | U: %.3f | p: %.3f | Q+U %.3f |>'
 
-    def __init__(self, game, evaluation_func, node_param=DEFAULT_NODE_PARAMS, use_nn=False):
+    def __init__(self, game, evaluation_func, node_param=DEFAULT_NODE_PARAMS, use_nn=False, capacity=1024,
+                 transpositions=False, batch_evaluation_func=None, virtual_loss=1., n_rollouts=None, solver=False,
+                 full_expansion=False, stats=False):
         """ Initialise a Monte Carlo Tree Search
 
-            :param game:                Board Game
-            :param evaluation_func:     Evaluation function - Value, Policy function
-            :param node_param:          Node parameters
+            :param game:                    Board Game
+            :param evaluation_func:         Evaluation function - Value, Policy function
+            :param node_param:              Node parameters
+            :param use_nn:                  Flag to indicate if the evaluation function is a Neural Network
+            :param capacity:                Number of nodes preallocated in the Search Tree
+            :param transpositions:          Flag to share the statistics of identical positions (Transposition Table)
+            :param batch_evaluation_func:   Optional batched evaluation function - takes a batch of states
+                                            (K, 2, rows, columns) and returns the policies (K, n_actions) and
+                                            values (K,)
+            :param virtual_loss:            Value of the virtual loss applied to the nodes of a pending leaf
+            :param n_rollouts:              Number of random games played at once from a leaf by the vectorised
+                                            rollouts (the leaf value is their mean outcome). If None a single game
+                                            is played with the Game API. Only for games whose moves are the squares
+                                            of the board (not Connect Four)
+            :param solver:                  Flag to prove wins, losses and ties (MCTS-Solver)
+            :param full_expansion:          Flag to evaluate a node once and assign the priors of all its children
+                                            (only with a Neural Network)
+            :param stats:                   Flag to time the phases of the search (see SearchStats)
 
         """
-        self.GAME = game
+        # The vectorised rollouts play on any free square of the flat board
+        if n_rollouts is not None and game.n_actions != game.state.size:
+            raise ValueError('Vectorised rollouts need a move per square: {} is not supported'.format(game))
+
+        self.GAME = deepcopy(game)
         self.players = game.players
+
+        # Player to move at the root - statistics are stored from its point of view
+        self.player = self.GAME.current_player
         self.policy = evaluation_func
+        self.batch_policy = batch_evaluation_func
+        self.n_rollouts = n_rollouts
+        self.solver = solver
+
+        # Virtual loss - number of leaves selected and awaiting their evaluation
+        self.virtual_loss = virtual_loss
+        self.pending = 0
+
+        # Lock guarding the tree during the tree parallel search
+        self.lock = threading.Lock()
 
         self.node_init_params = node_param
-        self.root = Node('0', GAME=self.GAME, **self.node_init_params)
+        self.tree = SearchTree(capacity=capacity, prior=self.node_init_params["PRIOR"])
+        self.root = self.tree.ROOT
 
         self.use_nn = use_nn
+        self.full_expansion = full_expansion and use_nn
+
+        # Transposition Table: position key -> index of the node holding the statistics
+        self.transpositions = {self._position_key(self.GAME): self.root} if transpositions else None
+
+        # Instrumentation - the phases are only timed when requested
+        self.stats = SearchStats() if stats else None
+        if self.stats is not None:
+            self.stats.instrument(self)
+
+    def move_root(self, move):
+        """ Move the root down to the child reached by a move (ours or the opponent's)
+
+            The statistics of the sub-tree under that child are kept and the rest of the tree is freed, the next search
+            then starts warm.
+
+            Note: Statistics are stored from the point of view of the player to move at the root when the search ran,
+            a tree is reused by the same player after its move and the opponent's reply (one tree per player).
+
+            :param move:        Move played from the current root
+
+        """
+        tree = self.tree
+        action = self.GAME.translate(move)
+        slots = [slot for slot in tree.children(self.root) if tree.ACTION[slot] == action]
+
+        if slots:
+            self.tree, mapping = tree.subtree(tree.LINK[slots[0]])
+        else:
+            # The move has not been explored - start from an empty tree
+            self.tree, mapping = SearchTree(capacity=tree.capacity, prior=tree.prior), {}
+
+        self.GAME.play(move)
+        self.player = self.GAME.current_player
+
+        if self.transpositions is not None:
+            self.transpositions = {key: mapping[node] for key, node in self.transpositions.items() if node in mapping}
+            self.transpositions[self._position_key(self.GAME)] = self.root
+
+    @staticmethod
+    def _position_key(game):
+        """ Key identifying a position (board and player to move)
+
+            :param game:        Board Game
+            :return:            Hashable key
 
-    def selection(self, scoring_func=upper_confidence_bound, prob=0.5):
+        """
+        return game.key, game.current_player.value
+
+    def child_scores(self, node, scoring_func=puct_scores):
+        """ Score all the expanded children of a node in one vectorised operation
+
+            :param node:                Index of the parent Node
+            :param scoring_func:        the function that takes as inputs the children arrays (q, prior, n_plays),
+                                        the parent number of plays and c_puct and output the children scores
+            :return:                    Array of scores (one per child)
+
+        """
+        tree = self.tree
+        first = tree.FIRST_CHILD[node]
+        last = first + tree.N_CHILDREN[node]
+
+        # Children are contiguous - slicing returns views on the statistics arrays
+        # Transpositions: the statistics are gathered from the linked nodes
+        stats = slice(first, last) if self.transpositions is None else tree.LINK[first:last]
+        q, n_plays, parent_plays = tree.Q[stats], tree.N_PLAYS[stats], tree.N_PLAYS[node]
+
+        # Pending leaves count as visits that were lost
+        if self.pending:
+            virtual_loss = tree.VIRTUAL_LOSS[stats]
+            q = (q * n_plays - self.virtual_loss * virtual_loss) / np.maximum(n_plays + virtual_loss, 1)
+            n_plays, parent_plays = n_plays + virtual_loss, parent_plays + tree.VIRTUAL_LOSS[node]
+
+        return scoring_func(q, tree.PRIOR[first:last], n_plays, parent_plays, self.node_init_params["C_PUCT"])
+
+    def best_child(self, node, scoring_func=puct_scores, prob=0.):
+        """ Select the child of a node with the maximum score
+
+            :param node:                Index of the parent Node
+            :param scoring_func:        Vectorised scoring function (see child_scores)
+            :param prob:                Probability of selecting a child at random instead of the maximum
+            :return:                    Index of the selected child slot, -1 if every child is proven (solver)
+
+        """
+        tree = self.tree
+        first = tree.FIRST_CHILD[node]
+
+        if self.solver:
+            # Proven children are decided - no more simulations are spent on them
+            unproven = ~tree.PROVEN[tree.LINK[first:first + tree.N_CHILDREN[node]]]
+            if not unproven.any():
+                return -1
+            if prob and np.random.rand() < prob:
+                return first + np.random.choice(np.flatnonzero(unproven))
+
+            scores = self.child_scores(node, scoring_func=scoring_func)
+            return first + np.argmax(np.where(unproven, scores, -np.inf))
+
+        if prob and np.random.rand() < prob:
+            return first + np.random.randint(tree.N_CHILDREN[node])
+
+        return first + np.argmax(self.child_scores(node, scoring_func=scoring_func))
+
+    def selection(self, scoring_func=puct_scores, prob=0.5, path=None, game=None):
         """ Select a node of the tree based on scores or expand current one (if not all children have been visited)
 
-            :param scoring_func:        the function that takes as inputs (n_plays, n_wins, n_ties) and output
-                                        the node score
+            The move of every selected child is played on the game, which ends in the position of the returned node.
+
+            :param scoring_func:        Vectorised scoring function (see child_scores)
             :param prob:                Random factor to avoid over selecting the max all the time
-            :return:                    Node with best score
+            :param path:                Optional list, the index of every node visited is appended to it
+            :param game:                Game in the root position - defaults to the search game
+            :return:                    Index of the Node with best score
 
         """
+        tree = self.tree
+        game = self.GAME if game is None else game
+
         # Selection should start from root node
         node = self.root
+        if path is not None:
+            path.append(node)
 
         # Browse each level until we reach a terminal node
-        while node.children:
+        while tree.N_CHILDREN[node]:
             # If node still has unexplored children we select it
-            if len(node.GAME.legal_plays()) > len(node.children):
+            if not tree.is_fully_expanded(node):
                 return node
 
             # We go down the tree until we reach the bottom always choosing the best score at each level
-            else:
-                nodes = node.children
-                scores = [scoring_func(node=node_) for node_ in nodes]
+            slot = self.best_child(node, scoring_func=scoring_func, prob=prob)
+            if slot < 0:
+                return node
 
-                # Select actions among children that gives maximum action value
-                if np.random.rand(1) < prob:
-                    node = nodes[np.random.randint(len(scores))]
-                else:
-                    node = nodes[np.argmax(scores)]
+            game.play(game.position(tree.ACTION[slot]))
+            node = tree.LINK[slot]
+            if path is not None:
+                path.append(node)
 
         return node
 
-    def expansion(self, parent):
+    def expansion(self, parent, path=None, game=None):
         """ Randomly expand a child for selected node in order to expand the tree
 
-            :param parent:              Node to expand
-            :return:                    Expanded child node
+            :param parent:              Index of the Node to expand
+            :param path:                Optional list, the index of the expanded node is appended to it
+            :param game:                Game in the position of the parent - defaults to the search game
+            :return:                    Index of the expanded child node
 
         """
-        # Filter out plays that already have been expanded
-        already_played = [node.GAME.last_play for node in parent.children]
-        unexplored_plays = [play for play in parent.GAME.legal_plays() if play not in already_played]
+        game = self.GAME if game is None else game
 
-        if unexplored_plays:
-            # Choose one play randomly
-            index = np.random.choice(len(unexplored_plays), 1)[0]
-            selected_play = unexplored_plays[index]
+        # Full expansion: one evaluation of the parent gives the priors of all the children
+        if self._needs_evaluation(parent, game):
+            policies, values = self._predict(self._encode(game))
+            self._allocate_evaluated(parent, self._legal_actions(game), policies[0], values[0])
 
-            # Create a new node where this play is performed
-            child_game = deepcopy(parent.GAME)
-            child_game.play(selected_play)
-            child_name = parent.name + '_' + str(len(parent.children))
+        slot = self._expand_slot(parent, game)
 
-            # Pass the Properties
-            properties = deepcopy(self.node_init_params)
+        # If all nodes have been explored return parent without expanding (can happen at end of tree search)
+        if slot < 0:
+            return parent
 
-            if self.use_nn:
-                # Get empty templates & Translate the States
-                states, state, value = np.zeros((1, 2, 3, 3)), child_game.state, parent.GAME.nn_index[0].value
-                states = self._get_state(states, state, value)
+        if self.use_nn and not self.full_expansion:
+            self.evaluate([slot], self._encode(game))
 
-                # Evaluate the leaf using a network (value & policy) which outputs a list of (action, probability)
-                # tuples p and also a score v in [-1, 1] for the current player.
-                action_prob, properties["V"] = self.policy(states)
-                properties["PRIOR"] = action_prob[self.GAME.translate(selected_play)][1]
-            else:
-                properties["PRIOR"] = 1
+        node = self.tree.LINK[slot]
+        if path is not None:
+            path.append(node)
 
-            # Action picked
-            properties["ACTION"] = parent.GAME.translate(selected_play)
+        return node
 
-            # Create the Child
-            node = Node(name=child_name, parent=parent, GAME=child_game, **properties)
+    def _expand_slot(self, parent, game):
+        """ Expand the next unexplored child slot of a node (without evaluating it)
 
-        # If all nodes have been explored return parent without expanding (can happen at end of tree search)
-        else:
-            node = parent
+            The move of the expanded slot is played on the game.
 
-        return node
+            :param parent:              Index of the Node to expand
+            :param game:                Game in the position of the parent
+            :return:                    Index of the expanded child slot, -1 if every child has been explored
+
+        """
+        tree = self.tree
+
+        # Reserve the children slots in a random order, they are then expanded one after the other
+        if tree.FIRST_CHILD[parent] < 0:
+            tree.allocate_children(parent, np.random.permutation(self._legal_actions(game)))
+
+        if tree.is_fully_expanded(parent):
+            return -1
+
+        # Pick the next unexplored play - with full expansion its prior is already known
+        slot = tree.FIRST_CHILD[parent] + tree.N_CHILDREN[parent]
+        tree.N_CHILDREN[parent] += 1
+        if not self.full_expansion:
+            tree.PRIOR[slot] = 1
+
+        # Perform the play leading to the new node
+        game.play(game.position(tree.ACTION[slot]))
+
+        # Link the slot to the node already holding this position
+        if self.transpositions is not None:
+            key = self._position_key(game)
+            if key in self.transpositions:
+                tree.LINK[slot] = self.transpositions[key]
+            else:
+                self.transpositions[key] = slot
+
+        return slot
 
     @staticmethod
-    def _get_state(states, state, value):
+    def _legal_actions(game):
+        """ Indexes in the policy of the legal plays of a game
+
+            :param game:                Board Game
+            :return:                    Array of action indexes
+
+        """
+        return np.array([game.translate(play) for play in game.legal_plays()], dtype=np.int64)
+
+    def _needs_evaluation(self, node, game):
+        """ Full expansion: True if a node has not been evaluated yet (its children are not allocated)
+
+            :param node:                Index of the Node
+            :param game:                Game in the position of the node
+            :return:                    Boolean
+
+        """
+        return self.full_expansion and self.tree.FIRST_CHILD[node] < 0 and not game.is_terminal
+
+    def _allocate_evaluated(self, node, actions, policy, value):
+        """ Full expansion: allocate the children of an evaluated node with the priors of its policy
+
+            The priors are normalised over the legal actions, children are allocated in decreasing order of prior
+            (ties in a random order) so that the most promising ones are expanded first.
+
+            :param node:                Index of the evaluated Node
+            :param actions:             Action indexes of the legal plays of the node
+            :param policy:              Policy of the node (n_actions,)
+            :param value:               Value of the node
+
+        """
+        tree = self.tree
+
+        # Evaluated twice (e.g. reached by several leaves of a batch) - the first evaluation is kept
+        if tree.FIRST_CHILD[node] >= 0:
+            return
+
+        priors = np.asarray(policy, dtype=np.float64)[actions]
+        total = priors.sum()
+        priors = priors / total if total > 0 else np.full(len(actions), 1. / max(len(actions), 1))
+
+        order = np.random.permutation(len(actions))
+        order = order[np.argsort(-priors[order], kind="stable")]
+
+        first = tree.allocate_children(node, actions[order])
+        tree.PRIOR[first:first + len(actions)] = priors[order]
+        tree.V[node] = value
+
+    def evaluate(self, slots, states):
+        """ Evaluate expanded child slots using the network (value & policy)
+
+            A batched evaluation function is called once for the whole batch, otherwise the evaluation function is
+            called once per state.
+
+            :param slots:               Indexes of the child slots
+            :param states:              Encoded states of the child slots (K, 2, rows, columns) - see _encode
+
         """
+        self._assign_evaluation(slots, *self._predict(states))
+
+    def _encode(self, game):
+        """ Encode the state of a game into a Neural Network input
 
-            :param states:
-            :param state:
-            :param value:
-            :return:
+            :param game:                Board Game
+            :return:                    State (1, 2, rows, columns)
 
         """
-        states[0, 0, :, :] = np.abs(np.where(state == value, state, 0))
-        states[0, 1, :, :] = np.abs(np.where(state != value, state, 0))
+        return game.encode(game.nn_index[0].value)
+
+    def _predict(self, states):
+        """ Evaluate a batch of states using the network (value & policy)
+
+            :param states:              Batch of states (K, 2, rows, columns)
+            :return:                    Policies (K, n_actions) and Values (K,)
+
+        """
+        if self.batch_policy is not None:
+            return self.batch_policy(states)
+
+        # The evaluation function outputs a list of (action, probability) tuples p and also a score v in [-1, 1]
+        # for the current player.
+        action_probs, values = [], []
+        for index in range(len(states)):
+            action_prob, value = self.policy(states[index:index + 1])
+            action_probs.append([prob for _, prob in action_prob])
+            values.append(value)
+
+        return np.array(action_probs), np.array(values)
 
-        return states
+    def _assign_evaluation(self, slots, action_probs, values):
+        """ Store the evaluation of child slots: the prior of the action leading to the slot and the value
 
-    def simulation(self, node):
+            :param slots:               Indexes of the child slots
+            :param action_probs:        Policies (K, n_actions)
+            :param values:              Values (K,)
+
+        """
+        self.tree.PRIOR[slots] = action_probs[np.arange(len(slots)), self.tree.ACTION[slots]]
+        self.tree.V[slots] = values
+
+    def simulation(self, game=None):
         """ Simulate games from current game state and returns number of wins
 
-            :param node:            Node from which the simulated games start
+            The random moves are undone once the game has ended, the game is left in its initial position.
+
+            :param game:            Game in the position from which the simulated games start - defaults to the
+                                    search game
             :return:                Number of time the current player has won
 
         """
-        # Play a game until the end
-        game = deepcopy(node.GAME)
+        game = self.GAME if game is None else game
+
+        if self.n_rollouts is not None:
+            return self.vectorised_simulation(game)
 
-        while game.legal_plays():
+        # Play a game until the end
+        n_moves = 0
+        while not game.is_terminal:
             game.play()
+            n_moves += 1
 
-        if game.winner == self.root.GAME.current_player:
+        winner = game.winner
+        for _ in range(n_moves):
+            game.undo()
+
+        if winner == self.player:
             return 1 + np.random.rand() * 1e-6
-        elif game.winner is None:
+        elif winner is None:
             return 0
         else:
             return -1 - np.random.rand() * 1e-6
 
-    def backpropagate(self, node, leaf_value):
+    def vectorised_simulation(self, game):
+        """ Simulate n_rollouts random games at once from current game state
+
+            Note: Only unanimous results count in N_WINS / N_TIES, the mean outcome is used to update Q.
+
+            :param game:            Game in the position from which the simulated games start
+            :return:                Mean outcome for the current player (1 win, 0 tie, -1 loss)
+
+        """
+        results = random_rollouts(game.state, game.current_player.value, game.players_values, self.n_rollouts,
+                                  k=game.k)
+        outcome = np.mean(np.where(results == self.player.value, 1, np.where(results == 0, 0, -1)))
+
+        if outcome == 1:
+            return 1 + np.random.rand() * 1e-6
+        elif outcome == -1:
+            return -1 - np.random.rand() * 1e-6
+        return outcome
+
+    @staticmethod
+    def _rewind(game, path):
+        """ Undo the moves played along a path, the game returns to the root position
+
+            :param game:            Game in the position of the last node of the path
+            :param path:            List of the node indexes visited from the root
+
+        """
+        for _ in range(len(path) - 1):
+            game.undo()
+
+    def backpropagate(self, node, leaf_value, path=None):
         """ Back-propagate the results of the simulations to the ancestor nodes of the tree
 
-            :param node:        Starting node for backpropagation (from bottom to top)
+            Note: Once the tree is a DAG (transpositions) the parent of a node is ambiguous, the path selected
+            during the iteration has to be passed.
+
+            :param node:        Index of the starting node for backpropagation (from bottom to top)
             :param leaf_value:  Leaf node value
+            :param path:        Optional list of the node indexes visited from the root to the node
 
         """
-        # Apply updates on current node
-        node.N_PLAYS += 1
-        node.N_WINS += 1 if leaf_value >= 1 else 0
-        node.N_TIES += 1 if leaf_value == 0 else 0
-        node.Q = self._update_q(leaf_value=leaf_value, node=node)
+        tree = self.tree
+        win, tie = leaf_value >= 1, leaf_value == 0
+        nodes = reversed(path) if path is not None else [node] + list(tree.ancestors(node))
+
+        # Apply updates on current node and all of the ancestors - each node is updated once per iteration
+        for node in nodes:
+            tree.N_PLAYS[node] += 1
+            tree.N_WINS[node] += win
+            tree.N_TIES[node] += tie
+
+            # The Q of a proven node is its exact value
+            if not tree.PROVEN[node]:
+                tree.Q[node] = self._update_q(leaf_value=leaf_value, n_plays=tree.N_PLAYS[node], q=tree.Q[node])
+
+    def prove_terminal(self, node, game):
+        """ Prove a node holding a terminal position: its value is the result of the game
+
+            :param node:        Index of the node
+            :param game:        Game in the position of the node
+
+        """
+        if game.is_terminal:
+            winner = game.winner
+            self.tree.PROVEN[node] = True
+            self.tree.Q[node] = 0. if winner is None else 1. if winner == self.player else -1.
+
+    def prove_path(self, path):
+        """ Propagate the proofs up the selected path (minimax on the proven children)
+
+            Values are stored from the point of view of the player to move at the root: it maximises the value at
+            even depths, its opponent minimises it at odd depths.
+
+            :param path:        List of the node indexes visited from the root
+
+        """
+        tree = self.tree
+
+        for depth in reversed(range(len(path))):
+            node = path[depth]
+            if tree.PROVEN[node]:
+                continue
+
+            first = tree.FIRST_CHILD[node]
+            if first < 0 or not tree.N_CHILDREN[node]:
+                break
+
+            stats = tree.LINK[first:first + tree.N_CHILDREN[node]]
+            proven, values = tree.PROVEN[stats], tree.Q[stats]
+            sign = 1. if depth % len(self.players) == 0 else -1.
+
+            if (proven & (values == sign)).any():
+                # The player to move has a winning move
+                value = sign
+            elif proven.all() and tree.N_CHILDREN[node] == tree.N_MOVES[node]:
+                # Every move is decided, the player to move picks the best one
+                value = sign * np.max(sign * values)
+            else:
+                # Nothing changes above an unproven node
+                break
 
-        # All all of the ancestors
-        for ancestor in node.ancestors:
-            ancestor.N_PLAYS += 1
-            ancestor.N_WINS += 1 if leaf_value >= 1 else 0
-            ancestor.N_TIES += 1 if leaf_value == 0 else 0
-            ancestor.Q = self._update_q(leaf_value=leaf_value, node=ancestor)
+            tree.PROVEN[node] = True
+            tree.Q[node] = value
 
     @staticmethod
-    def _update_q(leaf_value, node):
+    def _update_q(leaf_value, n_plays, q):
         """ Update function for Q
 
             :param leaf_value:      Leaf value
-            :param node:            Node from in the MCTS tree
+            :param n_plays:         Number of plays of the node
+            :param q:               Current Q value of the node
             :return:                Calculated Q value
 
         """
-        return leaf_value if node.Q == 0 else (node.N_PLAYS * node.Q + leaf_value) / (node.N_PLAYS + 1)
+        return leaf_value if q == 0 else (n_plays * q + leaf_value) / (n_plays + 1)
 
-    @staticmethod
-    def _sort_by_move(nodes):
+    def _score(self, node):
+        """ Score of a single node (0 for the root)
+
+            :param node:        Node index
+            :return:            Score used during the selection
+
+        """
+        parent = self.tree.PARENT[node]
+        return self.child_scores(parent)[node - self.tree.FIRST_CHILD[parent]] if parent >= 0 else 0.
+
+    def _sort_by_move(self, nodes):
         """ Sort nodes by move from (0, 0) to (2,2)
 
-            :param nodes:       List of nodes
+            :param nodes:       Node indexes
             :return:            Sorted list
 
         """
-        return sorted(nodes, key=lambda n: n.GAME.last_play)
+        return sorted(nodes, key=lambda n: self.tree.ACTION[n])
+
+    def _render(self, node, level, depth=0, indent='', fill=''):
+        """ Walk the tree depth first and yield the indentation of each node (styled as anytree.RenderTree)
+
+            :param node:        Index of the Node to start from
+            :param level:       Max level to walk. If -1 walk the full tree
+            :param depth:       Depth of the node
+            :param indent:      Indentation of the node
+            :param fill:        Indentation of the node children
+            :return:            Generator of (indentation, depth, node index)
+
+        """
+        yield indent, depth, node
+
+        if level == -1 or depth < level:
+            children = self._sort_by_move(self.tree.children(self.tree.LINK[node]))
+            for position, child in enumerate(children):
+                last = position == len(children) - 1
+                yield from self._render(child, level, depth + 1,
+                                        indent=fill + ('└── ' if last else '├── '),
+                                        fill=fill + ('    ' if last else '│   '))
 
     def show_tree(self, level=-1):
         """ Print the current state of the tree along with some statistics on nodes
@@ -203,99 +610,433 @@ class MonteCarloTreeSearch:
 
         """
         result = []
-
-        # From list of tuples of nodes to list of nodes
-        if level > 0:
-            nodes_selections = [e for sub in list(LevelOrderGroupIter(self.root))[:level + 1] for e in sub]
-        else:
-            nodes_selections = []
-
-        # Iterate through the Tree and construct the Output
-        for indent, _, node in RenderTree(self.root, childiter=self._sort_by_move):
-            if level == -1 or node in nodes_selections:
-                result.append((self.OUT % (indent, node.ACTION, node.GAME.current_player.display, node.N_WINS,
-                                           node.N_PLAYS, node.V, node.Q, node.U,
-                                           node.PRIOR, node.Q + node.U)))
+        tree = self.tree
+        first = self.players.index(self.player)
+
+        # Iterate through the Tree and construct the Output - players alternate at each level
+        if level == -1 or level > 0:
+            for indent, depth, node in self._render(self.root, level=level):
+                action = tree.ACTION[node] if tree.ACTION[node] >= 0 else None
+                u, stats = self._score(node), tree.LINK[node]
+                player = self.players[(first + depth) % len(self.players)]
+                result.append((self.OUT % (indent, action, player.display,
+                                           tree.N_WINS[stats], tree.N_PLAYS[stats], tree.V[node], tree.Q[stats],
+                                           u, tree.PRIOR[node], tree.Q[stats] + u)))
 
         # Display the result
         print('\n'.join(result))
 
-    def search(self, max_iterations=5000, max_runtime=20):
+    def iteration(self):
+        """ Run one iteration of the search: selection, expansion, simulation and back-propagation
+
+            :return:                    Number of leaves evaluated (1)
+
+        """
+        # Selection
+        path = []
+        node = self.selection(path=path)
+
+        # Expansion
+        expanded_node = self.expansion(parent=node, path=path)
+
+        # Simulation - play out the game to Termination
+        leaf_value = self.simulation()
+
+        # Solver - prove the terminal positions and propagate the proofs
+        if self.solver:
+            self.prove_terminal(expanded_node, self.GAME)
+            self.prove_path(path)
+
+        # Back propagate the result
+        self.backpropagate(node=expanded_node, leaf_value=leaf_value, path=path)
+        self._rewind(self.GAME, path)
+
+        return 1
+
+    def batch_iteration(self, batch_size):
+        """ Run one batched iteration of the search
+
+            Select, expand and simulate batch_size leaves, a virtual loss is applied along each path so that the
+            following selections are spread over the tree. The leaves are then evaluated in one call and
+            back-propagated (removing the virtual loss).
+
+            :param batch_size:          Number of leaves collected
+            :return:                    Number of leaves evaluated
+
+        """
+        tree = self.tree
+        paths, slots, states, leaf_values = [], [], [], []
+
+        # Full expansion: node -> legal actions of the nodes awaiting their evaluation, and their states
+        evaluated, node_states = {}, []
+
+        for _ in range(batch_size):
+            # Selection
+            path = []
+            node = self.selection(path=path)
+
+            if self._needs_evaluation(node, self.GAME):
+                # Full expansion: the node is a leaf until it has been evaluated with the rest of the batch
+                if node not in evaluated:
+                    evaluated[node] = self._legal_actions(self.GAME)
+                    node_states.append(self._encode(self.GAME))
+            else:
+                # Expansion (evaluated later on with the rest of the batch)
+                slot = self._expand_slot(node, self.GAME)
+                if slot >= 0:
+                    slots.append(slot)
+                    path.append(tree.LINK[slot])
+                    if self.use_nn and not self.full_expansion:
+                        states.append(self._encode(self.GAME))
+
+            # Simulation
+            leaf_values.append(self.simulation())
+            if self.solver:
+                self.prove_terminal(path[-1], self.GAME)
+            self._rewind(self.GAME, path)
+
+            # Virtual Loss
+            tree.VIRTUAL_LOSS[path] += 1
+            self.pending += 1
+            paths.append(path)
+
+        # Evaluate all the leaves in a single call
+        if states:
+            self.evaluate(slots, np.concatenate(states))
+        if node_states:
+            policies, values = self._predict(np.concatenate(node_states))
+            for (node, actions), policy, value in zip(evaluated.items(), policies, values):
+                self._allocate_evaluated(node, actions, policy, value)
+
+        for path, leaf_value in zip(paths, leaf_values):
+            tree.VIRTUAL_LOSS[path] -= 1
+            self.pending -= 1
+
+            # Back propagation
+            if self.solver:
+                self.prove_path(path)
+            self.backpropagate(node=path[-1], leaf_value=leaf_value, path=path)
+
+        return len(paths)
+
+    def search(self, max_iterations=5000, max_runtime=20, batch_size=1):
         """ Run a Monte Carlo Tree Search starting from root node
 
             Defaults:
                 - max_iterations      20000
                 - max_runtime         20
 
+            The search stops early once the root is proven (solver).
+
             :param max_iterations:      max number of iterations for the tree search
             :param max_runtime:         max search time in seconds
+            :param batch_size:          number of leaves evaluated together (see batch_iteration)
 
         """
         t1 = time.time()
+        iterations, initial_nodes = 0, self.tree.n_nodes
 
         # Iterate for the maximum number of iterations
-        for _ in range(max_iterations):
-            # Selection
-            node = self.selection()
-
-            # Expansion
-            expanded_node = self.expansion(parent=node)
-
-            # Simulation - play out the game to Termination
-            leaf_value = self.simulation(node=expanded_node)
-
-            # Back propagate the result
-            self.backpropagate(node=expanded_node, leaf_value=leaf_value)
+        while iterations < max_iterations and not self.tree.PROVEN[self.root]:
+            if batch_size > 1:
+                iterations += self.batch_iteration(min(batch_size, max_iterations - iterations))
+            else:
+                iterations += self.iteration()
 
             # Early exit if and only if the time taken to solve > max_runtime
             if time.time() - t1 > max_runtime:
                 logging.warning("TimeOut during the searching phase.")
                 break
 
+        if self.stats is not None:
+            self.stats.record_search(self, iterations, time.time() - t1, initial_nodes)
+
+    def threaded_search(self, n_threads=4, max_iterations=5000, max_runtime=20):
+        """ Tree parallel Monte Carlo Tree Search
+
+            n_threads threads run selection, expansion, simulation and back-propagation against this tree. Selection,
+            expansion and back-propagation hold the tree lock, a virtual loss on the selected path spreads the threads
+            over the tree. Leaf evaluation and simulation run without the lock: this pays off when they release the
+            GIL (e.g. TensorFlow inference).
+
+            :param n_threads:           Number of threads
+            :param max_iterations:      max number of iterations for the tree search (shared between the threads)
+            :param max_runtime:         max search time in seconds
+
+        """
+        t1 = time.time()
+        budget, initial_nodes = [max_iterations], self.tree.n_nodes
+        timed_out = [False]
+
+        def worker():
+            # Each thread plays on its own copy of the game
+            game = deepcopy(self.GAME)
+
+            while True:
+                with self.lock:
+                    # Stop once the iterations are spent or the root is proven (solver)
+                    if budget[0] <= 0 or self.tree.PROVEN[self.root]:
+                        break
+                    if time.time() - t1 > max_runtime:
+                        timed_out[0] = True
+                        break
+                    budget[0] -= 1
+
+                    # Selection & Expansion - with full expansion a node is a leaf until it has been evaluated
+                    path, actions = [], None
+                    node = self.selection(path=path, game=game)
+                    if self._needs_evaluation(node, game):
+                        slot, actions = -1, self._legal_actions(game)
+                    else:
+                        slot = self._expand_slot(node, game)
+                        if slot >= 0:
+                            path.append(self.tree.LINK[slot])
+
+                    if self.solver:
+                        self.prove_terminal(path[-1], game)
+
+                    # Virtual Loss
+                    self.tree.VIRTUAL_LOSS[path] += 1
+                    self.pending += 1
+
+                    states = self._encode(game) if actions is not None or \
+                        (self.use_nn and not self.full_expansion and slot >= 0) else None
+
+                # Evaluation & Simulation - outside of the lock
+                evaluation = self._predict(states) if states is not None else None
+                leaf_value = self.simulation(game)
+                self._rewind(game, path)
+
+                with self.lock:
+                    if actions is not None:
+                        self._allocate_evaluated(path[-1], actions, evaluation[0][0], evaluation[1][0])
+                    elif evaluation is not None:
+                        self._assign_evaluation([slot], *evaluation)
+
+                    self.tree.VIRTUAL_LOSS[path] -= 1
+                    self.pending -= 1
+
+                    # Back propagate the result
+                    if self.solver:
+                        self.prove_path(path)
+                    self.backpropagate(node=path[-1], leaf_value=leaf_value, path=path)
+
+        threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if timed_out[0]:
+            logging.warning("TimeOut during the searching phase.")
+
+        if self.stats is not None:
+            self.stats.record_search(self, max_iterations - budget[0], time.time() - t1, initial_nodes)
+
+    def root_statistics(self):
+        """ Statistics of the root and of its expanded children
+
+            :return:                    Dictionary of arrays (one entry per child) and the root statistics
+
+        """
+        tree = self.tree
+        children = np.array(tree.children(self.root), dtype=np.int64)
+        stats = tree.LINK[children]
+
+        return dict(ACTION=tree.ACTION[children], PRIOR=tree.PRIOR[children], V=tree.V[children],
+                    N_PLAYS=tree.N_PLAYS[stats], N_WINS=tree.N_WINS[stats], N_TIES=tree.N_TIES[stats],
+                    Q=tree.Q[stats], PROVEN=tree.PROVEN[stats], ROOT_N_PLAYS=tree.N_PLAYS[self.root],
+                    ROOT_N_WINS=tree.N_WINS[self.root], ROOT_N_TIES=tree.N_TIES[self.root], ROOT_Q=tree.Q[self.root],
+                    ROOT_PROVEN=tree.PROVEN[self.root], ROOT_N_MOVES=tree.N_MOVES[self.root])
+
+    def parallel_search(self, n_workers=None, max_iterations=5000, max_runtime=20, batch_size=1):
+        """ Root parallel Monte Carlo Tree Search
+
+            n_workers independent searches start from the root in a process pool, each one with its own random seed
+            and an equal share of the iterations (all of them share the same max_runtime). The root children
+            statistics are then merged (visits summed, Q averaged over the visits) into this tree, the sub-trees
+            below the root children are not kept. With the solver, the proofs found by any worker are kept.
+
+            Note: The game and evaluation functions are sent to the workers, they have to be picklable.
+
+            :param n_workers:           Number of processes - defaults to the number of cores
+            :param max_iterations:      max number of iterations for the tree search (shared between the workers)
+            :param max_runtime:         max search time in seconds
+            :param batch_size:          number of leaves evaluated together by each worker (see batch_iteration)
+
+        """
+        n_workers = os.cpu_count() if n_workers is None else n_workers
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=n_workers)
+        iterations = int(np.ceil(max_iterations / n_workers))
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(_root_parallel_search, self.GAME, self.policy, self.node_init_params,
+                                       self.use_nn, self.transpositions is not None, self.n_rollouts, self.solver,
+                                       seed, iterations, max_runtime, batch_evaluation_func=self.batch_policy,
+                                       virtual_loss=self.virtual_loss, full_expansion=self.full_expansion,
+                                       batch_size=batch_size)
+                       for seed in seeds]
+            results = [future.result() for future in futures]
+
+        self.merge_root_statistics(results)
+
+    def merge_root_statistics(self, results):
+        """ Replace the tree by a root whose children hold the merged statistics of several searches
+
+            Proven values are exact: a child (or the root) proven by any search keeps its proven value.
+
+            :param results:             List of root_statistics dictionaries
+
+        """
+        actions = np.unique(np.concatenate([result["ACTION"] for result in results]))
+        n_plays, n_wins, n_ties, q, prior, v, counts, values = np.zeros((8, len(actions)))
+        proven = np.zeros(len(actions), dtype=np.bool_)
+
+        for result in results:
+            index = np.searchsorted(actions, result["ACTION"])
+            n_plays[index] += result["N_PLAYS"]
+            n_wins[index] += result["N_WINS"]
+            n_ties[index] += result["N_TIES"]
+            q[index] += result["Q"] * result["N_PLAYS"]
+            prior[index] += result["PRIOR"]
+            v[index] += result["V"]
+            counts[index] += 1
+            proven[index[result["PROVEN"]]] = True
+            values[index[result["PROVEN"]]] = result["Q"][result["PROVEN"]]
+
+        # New tree holding the merged root children
+        tree = SearchTree(capacity=len(actions) + 1, prior=self.tree.prior)
+        first = tree.allocate_children(self.root, actions)
+        tree.N_CHILDREN[self.root] = len(actions)
+        tree.N_MOVES[self.root] = max([len(actions)] + [result["ROOT_N_MOVES"] for result in results])
+        children = slice(first, first + len(actions))
+
+        tree.N_PLAYS[children], tree.N_WINS[children], tree.N_TIES[children] = n_plays, n_wins, n_ties
+        tree.Q[children] = np.where(proven, values, q / np.maximum(n_plays, 1))
+        tree.PRIOR[children], tree.V[children] = prior / counts, v / counts
+        tree.PROVEN[children] = proven
+
+        root_plays = np.array([result["ROOT_N_PLAYS"] for result in results])
+        tree.N_PLAYS[self.root] = root_plays.sum()
+        tree.N_WINS[self.root] = sum(result["ROOT_N_WINS"] for result in results)
+        tree.N_TIES[self.root] = sum(result["ROOT_N_TIES"] for result in results)
+        tree.Q[self.root] = np.dot([result["ROOT_Q"] for result in results], root_plays) / max(root_plays.sum(), 1)
+
+        self.tree = tree
+        root_proofs = [result["ROOT_Q"] for result in results if result["ROOT_PROVEN"]]
+        if root_proofs:
+            tree.PROVEN[self.root], tree.Q[self.root] = True, root_proofs[0]
+        elif self.solver:
+            self.prove_path([self.root])
+        if self.transpositions is not None:
+            self.transpositions = {self._position_key(self.GAME): self.root}
+            for slot in tree.children(self.root):
+                self.GAME.play(self.GAME.position(tree.ACTION[slot]))
+                self.transpositions[self._position_key(self.GAME)] = slot
+                self.GAME.undo()
+
     def recommended_play(self, train=True):
         """ Move recommended by the Monte Carlo Tree Search
 
             :return:        A tuple corresponding to the recommended move
 
         """
-        nodes = list(LevelOrderGroupIter(self.root))
+        nodes = self.tree.children(self.root)
 
         if nodes:
-            action_prob = np.zeros((1, 9))
-            for n in nodes[1]:
-                action_prob[0, n.ACTION] = n.PRIOR
+            tree = self.tree
+            action_prob = np.zeros((1, self.GAME.n_actions))
+            action_prob[0, tree.ACTION[nodes]] = tree.PRIOR[nodes]
+
+            scores = self.child_scores(self.root)
 
-            if train:
+            if not train and tree.PROVEN[self.root]:
+                logging.debug("Using the move proving the value of the root")
+                node = self.proven_action(nodes)
+            elif train:
                 logging.debug("Using a stochastic action selection")
-                return self.stochastic_action(nodes[1]).GAME.last_play, action_prob
+                node = self.stochastic_action(nodes, scores)
             else:
                 logging.debug("Using the U + Q strategy used in AlphaZero")
-                return self.deterministic_action(nodes[1]).GAME.last_play, action_prob
+                node = self.deterministic_action(nodes, scores)
 
-    @staticmethod
-    def stochastic_action(nodes):
+            return self.GAME.position(tree.ACTION[node]), action_prob
+
+    def stochastic_action(self, nodes, scores):
         """ Non-uniform Action selection
 
-            :param nodes:       List of Nodes with their respective node properties
-            :return:            'Best Node' class
+            Children are drawn in proportion to their positive scores - when no score is positive (e.g. a lost
+            position), in proportion to their visits, or uniformly if none has been visited.
+
+            :param nodes:       Node indexes
+            :param scores:      Scores of the nodes
+            :return:            Index of the 'Best Node'
 
         """
-        records = np.array([np.power(n.U, 1 / n.TAU) for val, n in enumerate(nodes)])
-        records[records < 0] = 0
+        records = np.power(scores, 1 / self.node_init_params["TAU"])
+        records[~(records > 0)] = 0
+
+        if not records.sum() > 0:
+            records = self.tree.N_PLAYS[self.tree.LINK[nodes]].astype(np.float64)
+        if not records.sum() > 0:
+            records = np.ones(len(nodes))
         records /= records.sum()
 
         return nodes[np.random.choice(len(records), p=records)]
 
-    @staticmethod
-    def deterministic_action(nodes):
+    def proven_action(self, nodes):
+        """ Action achieving the proven value of the root
+
+            :param nodes:       Node indexes
+            :return:            Index of the 'Best Node'
+
         """
+        stats = self.tree.LINK[nodes]
+        proving = self.tree.PROVEN[stats] & (self.tree.Q[stats] == self.tree.Q[self.root])
 
-            :param nodes:       List of Nodes with their respective node properties
-            :return:            'Best Node' class
+        return nodes[np.argmax(proving)]
+
+    def deterministic_action(self, nodes, scores):
+        """ Greedy Action selection on U + Q
+
+            :param nodes:       Node indexes
+            :param scores:      Scores of the nodes
+            :return:            Index of the 'Best Node'
 
         """
-        length = len(nodes)
-        records = np.array([(n.U + n.Q + 1000) * length for val, n in enumerate(nodes)])
-        records /= records.sum()
+        records = scores + self.tree.Q[self.tree.LINK[nodes]]
 
         return nodes[np.argmax(records)]
+
+
+def _root_parallel_search(game, evaluation_func, node_param, use_nn, transpositions, n_rollouts, solver, seed,
+                          max_iterations, max_runtime, batch_evaluation_func=None, virtual_loss=1.,
+                          full_expansion=False, batch_size=1):
+    """ Worker of the root parallel search: run an independent search and return its root statistics
+
+        :param game:                    Board Game
+        :param evaluation_func:         Evaluation function - Value, Policy function
+        :param node_param:              Node parameters
+        :param use_nn:                  Flag to indicate if the evaluation function is a Neural Network
+        :param transpositions:          Flag to enable the Transposition Table
+        :param n_rollouts:              Number of vectorised rollouts per leaf (None for a single game)
+        :param solver:                  Flag to prove wins, losses and ties (MCTS-Solver)
+        :param seed:                    Seed of the random number generator of the worker
+        :param max_iterations:          max number of iterations for the tree search
+        :param max_runtime:             max search time in seconds
+        :param batch_evaluation_func:   Optional batched evaluation function
+        :param virtual_loss:            Value of the virtual loss applied to the nodes of a pending leaf
+        :param full_expansion:          Flag to evaluate a node once and assign the priors of all its children
+        :param batch_size:              number of leaves evaluated together (see batch_iteration)
+        :return:                        Root statistics (see MonteCarloTreeSearch.root_statistics)
+
+    """
+    np.random.seed(seed)
+
+    tree = MonteCarloTreeSearch(game=game, evaluation_func=evaluation_func, node_param=node_param, use_nn=use_nn,
+                                transpositions=transpositions, n_rollouts=n_rollouts, solver=solver,
+                                batch_evaluation_func=batch_evaluation_func, virtual_loss=virtual_loss,
+                                full_expansion=full_expansion)
+    tree.search(max_iterations=max_iterations, max_runtime=max_runtime, batch_size=batch_size)
+
+    return tree.root_statistics()
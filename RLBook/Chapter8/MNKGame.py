@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.MNKGame
+
+m,n,k game implementation: k stones in a row on a m x n board (e.g. 15x15 five-in-a-row)
+
+*   Moves are translated to indexes arithmetically (row * n + column)
+*   Wins are found by scanning the k-neighbourhood of the last move only
+*   Same interface as RLBook.Chapter8.TicTacToe.Game (TicTacToe is the 3,3,3 game)
+
+"""
+from RLBook.Chapter8.TicTacToe import Game
+
+# Directions of the lines crossing a square: horizontal, vertical, diagonal and anti-diagonal
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class MNKGame(Game):
+    """ m,n,k game implementation to be used by Monte Carlo Tree Search
+
+        https://en.wikipedia.org/wiki/M,n,k-game
+
+    """
+
+    def __init__(self, m=15, n=15, k=5, players=None, using_nn=None, nn_player=0):
+        """
+
+            :param m:                   Number of rows of the board
+            :param n:                   Number of columns of the board
+            :param k:                   Number of stones in a row needed to win
+            :param players:             Optional: Pass
+            :param using_nn:            Flag to indicate if a Neural Network is being utilised
+            :param nn_player:           Identification of which agent is the Neural Network
+
+        """
+        if k > max(m, n):
+            raise ValueError('No line of {} stones fits on a {}x{} board'.format(k, m, n))
+
+        super().__init__(board_size=max(m, n), players=players, using_nn=using_nn, nn_player=nn_player)
+
+        self.shape, self.k = (m, n), k
+        self._new_board()
+
+    def __repr__(self):
+        return "< {},{},{} Game > ".format(*self.shape, self.k)
+
+    def __str__(self):
+        return "< {},{},{} Game > ".format(*self.shape, self.k)
+
+    def _new_board(self):
+        """ Empty the board and every statistic updated on each move - no line sums are kept
+        """
+        super()._new_board()
+        self.sums = []
+
+    def _update_lines(self, move, value):
+        """ No line sums are kept, wins are found by the local scan (see _is_win)
+        """
+        pass
+
+    def _is_win(self, move, value):
+        """ Check whether the stone just played on a square completes k in a row
+
+            Only the squares at a distance lower than k along the 4 lines crossing the square are scanned.
+
+            :param move:            Square
+            :param value:           Value of the player owning the stone
+            :return:                True if the stone is part of k (or more) stones in a row
+
+        """
+        rows, columns = self.shape
+        state = self.state
+
+        for d_row, d_column in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                row, column = move[0] + sign * d_row, move[1] + sign * d_column
+                while count < self.k and 0 <= row < rows and 0 <= column < columns and state[row, column] == value:
+                    count += 1
+                    row, column = row + sign * d_row, column + sign * d_column
+
+            if count >= self.k:
+                return True
+
+        return False
+
+    def translate(self, position):
+        """ Translate tuple to Index
+
+            :param position:    Tuple of the Position
+            :return:            Index in the flattened board (row * n + column), None if off the board
+
+        """
+        row, column = position
+        if 0 <= row < self.shape[0] and 0 <= column < self.shape[1]:
+            return int(row) * self.shape[1] + int(column)
+
+        return None
+
+    def position(self, index):
+        """ Translate Index to tuple
+
+            :param index:       Index in the flattened board
+            :return:            Tuple of the Position, None if off the board
+
+        """
+        if index is not None and 0 <= index < self.n_actions:
+            return divmod(int(index), self.shape[1])
+
+        return None
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.MemoryStore
+
+Append-only on-disk store of the self-play positions
+
+*   Positions are written in chunks of chunk_size positions: one .npy file per array (states, policies, values)
+*   Full chunks are never rewritten, the last partial chunk (the tail) is written again, under a new name, on each
+    flush - a flush writes at most the new positions plus one chunk, however long the run has gone
+*   index.json lists the committed chunks and the tail. Every file is written under a temporary name and renamed
+    (os.replace), the index last: a crash mid-write leaves the previous index and its files intact
+*   The .npy chunks can be memory mapped
+*   load_memory migrates the pickled memory of older runs into the store
+
+"""
+import json
+import logging
+import os
+import pickle
+
+import numpy as np
+
+from RLBook.Chapter8.ReplayBuffer import ReplayBuffer
+
+ARRAYS = ("states", "policies", "values")
+INDEX = "index.json"
+
+
+def _atomic_save(path, array):
+    """ Save an array to a .npy file under a temporary name then rename it
+    """
+    temporary = "{}.tmp".format(path)
+    with open(temporary, "wb") as handle:
+        np.save(handle, array)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+
+class MemoryStore:
+    """ Chunked append-only store of (state, policy, value) training examples
+    """
+
+    def __init__(self, directory="ttt_memory", chunk_size=4096, dtype=np.float32):
+        """ Open a store (its directory is created by the first flush)
+
+            :param directory:       Directory of the chunks and of the index
+            :param chunk_size:      Number of positions per chunk (only used by a new store)
+            :param dtype:           Type of the stored arrays
+
+        """
+        self.directory = directory
+        self.dtype = dtype
+
+        index_path = os.path.join(directory, INDEX)
+        if os.path.exists(index_path):
+            with open(index_path) as handle:
+                index = json.load(handle)
+        else:
+            index = dict(chunk_size=chunk_size, chunks=[], tail=None, tail_size=0)
+
+        self.chunk_size = index["chunk_size"]
+        self.chunks = index["chunks"]
+
+        # Positions not in a full chunk: the tail already on disk is reloaded as the start of the next chunk
+        self.pending = [[], [], []]
+        self.n_pending = 0
+        self.tail, self.n_tail = index["tail"], index["tail_size"]
+        if self.tail is not None:
+            self._append_pending(*self._load(self.tail))
+
+    def __len__(self):
+        return len(self.chunks) * self.chunk_size + self.n_pending
+
+    def __repr__(self):
+        return "< Memory Store {} | {} Positions | {} Chunks >".format(self.directory, len(self), len(self.chunks))
+
+    def _path(self, name, array):
+        return os.path.join(self.directory, "{}.{}.npy".format(name, array))
+
+    def _load(self, name, mmap_mode=None):
+        """ Arrays of a chunk
+
+            :param name:            Name of the chunk
+            :param mmap_mode:       Memory map mode passed to np.load (None to read the chunk into memory)
+            :return:                States, Policies and Values
+
+        """
+        return tuple(np.load(self._path(name, array), mmap_mode=mmap_mode) for array in ARRAYS)
+
+    def _append_pending(self, states, policies, values):
+        for pending, array in zip(self.pending, (states, policies, values)):
+            pending.append(np.asarray(array, dtype=self.dtype))
+        self.n_pending += len(states)
+
+    def _save(self, name, arrays):
+        for array, values in zip(ARRAYS, arrays):
+            _atomic_save(self._path(name, array), values)
+
+    def _remove(self, name):
+        for array in ARRAYS:
+            if os.path.exists(self._path(name, array)):
+                os.remove(self._path(name, array))
+
+    def _write_index(self):
+        index = dict(chunk_size=self.chunk_size, chunks=self.chunks, tail=self.tail, tail_size=self.n_tail)
+        temporary = os.path.join(self.directory, "{}.tmp".format(INDEX))
+        with open(temporary, "w") as handle:
+            json.dump(index, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, os.path.join(self.directory, INDEX))
+
+    def append(self, states, policies, values):
+        """ Add positions (first axis) - they are written by flush
+
+            :param states:          States (K, 2, rows, columns)
+            :param policies:        Policies (K, n_actions)
+            :param values:          Values (K, 1)
+
+        """
+        self._append_pending(states, policies, values)
+
+    def flush(self):
+        """ Commit the pending positions: full chunks first, then the tail and finally the index
+
+            :return:                Number of positions written (new positions and the previous tail)
+
+        """
+        if self.n_pending == self.n_tail:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = [np.concatenate(pending, axis=0) for pending in self.pending]
+        n_written = self.n_pending
+
+        # Full chunks - never rewritten
+        start = 0
+        while self.n_pending - start >= self.chunk_size:
+            name = "chunk_{:06d}".format(len(self.chunks))
+            self._save(name, [array[start:start + self.chunk_size] for array in arrays])
+            self.chunks.append(name)
+            start += self.chunk_size
+
+        # Remaining positions - the tail of the store, named after its content so that the committed one is kept
+        previous_tail = self.tail
+        self.pending = [[array[start:]] for array in arrays]
+        self.n_pending = self.n_tail = len(arrays[0]) - start
+        self.tail = "tail_{:06d}_{:06d}".format(len(self.chunks), self.n_tail) if self.n_tail else None
+        if self.tail is not None:
+            self._save(self.tail, [array[start:] for array in arrays])
+
+        # Commit
+        self._write_index()
+        if previous_tail is not None and previous_tail != self.tail:
+            self._remove(previous_tail)
+
+        logging.info("Memory Store: {} positions written to {}".format(n_written, self.directory))
+
+        return n_written
+
+    def arrays(self, mmap_mode="r", max_positions=None):
+        """ Arrays of the committed chunks and of the pending positions, oldest first
+
+            :param mmap_mode:       Memory map mode of the committed chunks (None to read them into memory)
+            :param max_positions:   Only open the most recent chunks holding at least max_positions positions
+            :return:                List of (States, Policies, Values) per chunk
+
+        """
+        names = self.chunks
+        if max_positions is not None:
+            n_chunks = -(-max(max_positions - self.n_pending, 0) // self.chunk_size)
+            names = names[max(len(names) - n_chunks, 0):] if n_chunks else []
+
+        chunks = [self._load(name, mmap_mode=mmap_mode) for name in names]
+        if self.n_pending:
+            chunks.append(tuple(np.concatenate(pending, axis=0) for pending in self.pending))
+
+        return chunks
+
+    def load(self, buffer):
+        """ Fill a Replay Buffer with the most recent positions of the store (only the chunks it can hold are read)
+
+            :param buffer:          Replay Buffer
+            :return:                Replay Buffer
+
+        """
+        for arrays in self.arrays(mmap_mode="r", max_positions=buffer.capacity):
+            buffer.extend(*arrays)
+
+        return buffer
+
+
+def load_memory(memory_path, pickle_path="RLBook/Chapter8/ttt_memory.pickle"):
+    """ Stored self-play data: the Memory Store, memory mapped by the Trainer (only the sampled positions are read)
+
+        The pickled memory of older runs is migrated into an empty store once, so that it is kept by the next flush.
+
+        :param memory_path:     Directory of the Memory Store (None to load the pickled memory only)
+        :param pickle_path:     Path of the pickled memory: lists of arrays or Replay Buffer
+        :return:                Memory Store, pickled memory or None
+
+    """
+    store = MemoryStore(memory_path) if memory_path else None
+    if store or not os.path.exists(pickle_path):
+        return store
+
+    with open(pickle_path, "rb") as handle:
+        memory_data = pickle.load(handle)
+    if store is None:
+        return memory_data
+
+    if isinstance(memory_data, ReplayBuffer):
+        arrays = memory_data.arrays()
+    else:
+        arrays = [np.concatenate(arrays, axis=0) if len(arrays) else np.zeros((0,)) for arrays in memory_data]
+
+    if len(arrays[0]):
+        store.append(*arrays)
+        store.flush()
+        logging.info("Pickled memory migrated to the Memory Store: {}".format(store))
+
+    return store
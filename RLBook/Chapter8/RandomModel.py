@@ -48,4 +48,17 @@ class RandomModel(NeuralNet):
             :return:
 
         """
-        return [(val, prob) for val, prob in enumerate(np.random.rand(9))], np.random.random()
+        n_actions = 9 if tuple_arrays is None else int(np.prod(tuple_arrays.shape[2:]))
+
+        return [(val, prob) for val, prob in enumerate(np.random.rand(n_actions))], np.random.random()
+
+    def predict_batch(self, tuple_arrays):
+        """ Batched Prediction
+
+            :param tuple_arrays:    Batch of states (K, 2, rows, columns)
+            :return:                Policies (K, n_actions) and Values (K,)
+
+        """
+        n_actions = int(np.prod(tuple_arrays.shape[2:]))
+
+        return np.random.rand(len(tuple_arrays), n_actions), np.random.random(len(tuple_arrays))
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.ReplayBuffer
+
+Fixed capacity replay buffer of the self-play positions
+
+*   States, policies and values are stored in contiguous preallocated NumPy arrays (allocated on the first append,
+    from the shapes of the first position)
+*   Positions are inserted in O(1) in a ring: once the buffer is full the oldest position is overwritten (FIFO)
+*   Uniform minibatch sampling and zero-copy views of the stored positions for training
+*   MappedReplayBuffer reads positions stored on disk through memory maps: only the sampled rows are paged in
+
+"""
+import numpy as np
+
+
+class ReplayBuffer:
+    """ Ring buffer of (state, policy, value) training examples
+
+        Same layout as the Trainer memory: index 0 holds the states, 1 the policies and 2 the values.
+
+    """
+
+    def __init__(self, capacity=50000, dtype=np.float32):
+        """ Initialise an empty buffer
+
+            :param capacity:        Maximum number of positions kept
+            :param dtype:           Type of the stored arrays
+
+        """
+        self.capacity = int(capacity)
+        self.dtype = dtype
+
+        self.STATES = None
+        self.POLICIES = None
+        self.VALUES = None
+
+        # Next slot written and number of positions stored
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return "< Replay Buffer | {} / {} Positions >".format(self.size, self.capacity)
+
+    def __getitem__(self, index):
+        """ Views of the stored states (0), policies (1) or values (2) - see arrays
+        """
+        return self.arrays()[index]
+
+    @property
+    def nbytes(self):
+        """ Memory (in bytes) used by the preallocated arrays
+        """
+        return sum(array.nbytes for array in (self.STATES, self.POLICIES, self.VALUES) if array is not None)
+
+    @classmethod
+    def from_lists(cls, memory, capacity=50000):
+        """ Build a buffer from a memory of lists ([states], [policies], [values], one (1, ...) array per position)
+
+            :param memory:          Lists of arrays (e.g. an unpickled Trainer memory)
+            :param capacity:        Maximum number of positions kept - the most recent ones are kept
+            :return:                Replay Buffer
+
+        """
+        buffer = cls(capacity=capacity)
+        if len(memory[0]):
+            buffer.extend(*(np.concatenate(arrays, axis=0) for arrays in memory))
+
+        return buffer
+
+    def _allocate(self, state, policy, value):
+        """ Allocate the arrays from the shapes of a first position
+        """
+        self.STATES = np.zeros((self.capacity,) + np.shape(state), dtype=self.dtype)
+        self.POLICIES = np.zeros((self.capacity,) + np.shape(policy), dtype=self.dtype)
+        self.VALUES = np.zeros((self.capacity,) + np.shape(value), dtype=self.dtype)
+
+    def append(self, state, policy, value):
+        """ Store one position, overwriting the oldest one when the buffer is full
+
+            :param state:           State (1, 2, rows, columns) or (2, rows, columns)
+            :param policy:          Policy (1, n_actions) or (n_actions,)
+            :param value:           Value (1, 1) or (1,)
+            :return:                Index of the slot written
+
+        """
+        state, policy, value = (np.asarray(array)[0] if np.ndim(array) > 1 else np.asarray(array)
+                                for array in (state, policy, value))
+        if self.STATES is None:
+            self._allocate(state, policy, value)
+
+        index = self.position
+        self.STATES[index], self.POLICIES[index], self.VALUES[index] = state, policy, value
+
+        self.position = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+        return index
+
+    def extend(self, states, policies, values):
+        """ Store a batch of positions (first axis), in order
+
+            :param states:          States (K, 2, rows, columns)
+            :param policies:        Policies (K, n_actions)
+            :param values:          Values (K, 1)
+            :return:                Indexes of the slots written
+
+        """
+        states, policies, values = np.asarray(states), np.asarray(policies), np.asarray(values)
+
+        # Only the last capacity positions would survive
+        states, policies, values = states[-self.capacity:], policies[-self.capacity:], values[-self.capacity:]
+        if self.STATES is None:
+            self._allocate(states[0], policies[0], values[0])
+
+        indexes = (self.position + np.arange(len(states))) % self.capacity
+        self.STATES[indexes], self.POLICIES[indexes], self.VALUES[indexes] = states, policies, values
+
+        self.position = (self.position + len(states)) % self.capacity
+        self.size = min(self.size + len(states), self.capacity)
+
+        return indexes
+
+    def arrays(self):
+        """ Zero-copy views of the stored positions (not in insertion order once the buffer has wrapped around)
+
+            :return:                States, Policies and Values
+
+        """
+        if self.STATES is None:
+            return np.zeros((0,)), np.zeros((0,)), np.zeros((0,))
+
+        return self.STATES[:self.size], self.POLICIES[:self.size], self.VALUES[:self.size]
+
+    def sample(self, batch_size):
+        """ Uniform minibatch (with replacement)
+
+            :param batch_size:      Number of positions
+            :return:                States, Policies and Values (copies)
+
+        """
+        indexes = np.random.randint(self.size, size=batch_size)
+
+        return self.STATES[indexes], self.POLICIES[indexes], self.VALUES[indexes]
+
+    def clear(self):
+        """ Forget every stored position (the arrays are kept)
+        """
+        self.position = 0
+        self.size = 0
+
+
+class MappedReplayBuffer(ReplayBuffer):
+    """ Replay Buffer over stored positions read through memory maps (e.g. the chunks of a Memory Store)
+
+        The stored positions are not copied: the rows picked by sample are the only ones read from disk. New positions
+        go to the ring of the buffer, the oldest stored positions are dropped as the ring fills up.
+
+    """
+
+    def __init__(self, chunks=(), capacity=50000, dtype=np.float32):
+        """ Initialise a buffer over stored positions
+
+            :param chunks:          List of (States, Policies, Values) arrays, oldest first - np.memmap or arrays
+            :param capacity:        Maximum number of positions kept - the most recent stored positions are kept
+            :param dtype:           Type of the arrays of the new positions
+
+        """
+        super().__init__(capacity=capacity, dtype=dtype)
+
+        # Slicing a memory map does not read it
+        self.chunks, remaining = [], self.capacity
+        for arrays in reversed(list(chunks)):
+            if remaining <= 0:
+                break
+            self.chunks.insert(0, tuple(array[-remaining:] for array in arrays))
+            remaining -= len(arrays[0])
+
+        self.offsets = np.cumsum([0] + [len(arrays[0]) for arrays in self.chunks])
+
+    def __len__(self):
+        return self.n_stored + self.size
+
+    def __repr__(self):
+        return "< Mapped Replay Buffer | {} / {} Positions | {} Stored >".format(len(self), self.capacity,
+                                                                               self.n_stored)
+
+    @property
+    def n_stored(self):
+        """ Number of stored positions still in the buffer (the most recent ones)
+        """
+        return int(min(self.offsets[-1], self.capacity - self.size))
+
+    def _stored(self, rows):
+        """ Stored positions, read chunk by chunk
+
+            :param rows:            Indexes among the stored positions still in the buffer
+            :return:                States, Policies and Values (copies)
+
+        """
+        rows = np.asarray(rows, dtype=np.int64) + self.offsets[-1] - self.n_stored
+        chunk_indexes = np.searchsorted(self.offsets, rows, side="right") - 1
+        arrays = [np.empty((len(rows),) + array.shape[1:], dtype=array.dtype) for array in self.chunks[0]]
+
+        for chunk in np.unique(chunk_indexes):
+            mask = chunk_indexes == chunk
+            for array, stored in zip(arrays, self.chunks[chunk]):
+                array[mask] = stored[rows[mask] - self.offsets[chunk]]
+
+        return arrays
+
+    def _gather(self, indexes):
+        """ Positions of the buffer: stored positions first, then the slots of the ring
+        """
+        stored = indexes < self.n_stored
+        parts = []
+        if stored.any():
+            parts.append(self._stored(indexes[stored]))
+        if not stored.all():
+            slots = indexes[~stored] - self.n_stored
+            parts.append([self.STATES[slots], self.POLICIES[slots], self.VALUES[slots]])
+
+        # Back to the order of the indexes
+        order = np.argsort(np.concatenate([np.flatnonzero(stored), np.flatnonzero(~stored)]), kind="stable")
+
+        return tuple(np.concatenate(arrays, axis=0)[order] for arrays in zip(*parts))
+
+    def arrays(self):
+        """ Stored positions (read from disk) followed by views of the ring
+
+            :return:                States, Policies and Values
+
+        """
+        if not self.n_stored:
+            return super().arrays()
+
+        stored = self._stored(np.arange(self.n_stored))
+        if not self.size:
+            return tuple(stored)
+
+        return tuple(np.concatenate([array, ring]) for array, ring in zip(stored, super().arrays()))
+
+    def sample(self, batch_size):
+        """ Uniform minibatch (with replacement) - only the sampled stored positions are read
+
+            :param batch_size:      Number of positions
+            :return:                States, Policies and Values (copies)
+
+        """
+        return self._gather(np.random.randint(len(self), size=batch_size))
+
+    def clear(self):
+        super().clear()
+        self.chunks = []
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+
+class SumTree:
+    """ Binary tree whose nodes hold the sum of the priorities of their leaves
+
+        The tree is stored in an array: node i has children 2i and 2i + 1, the leaves (one per slot of the buffer)
+        start at the first power of two above the capacity. Updates and prefix sum searches are O(log N), and are
+        vectorised over a batch of slots.
+
+    """
+
+    def __init__(self, capacity):
+        """ Initialise a tree of null priorities
+
+            :param capacity:        Number of leaves
+
+        """
+        self.capacity = int(capacity)
+        self.first_leaf = 1 << max(self.capacity - 1, 1).bit_length()
+        self.TREE = np.zeros(2 * self.first_leaf, dtype=np.float64)
+
+    def __repr__(self):
+        return "< Sum Tree | {} Leaves | Total {:.3f} >".format(self.capacity, self.total)
+
+    @property
+    def total(self):
+        """ Sum of all the priorities
+        """
+        return self.TREE[1]
+
+    @property
+    def priorities(self):
+        """ Priorities of the leaves (view)
+        """
+        return self.TREE[self.first_leaf:self.first_leaf + self.capacity]
+
+    def update(self, indexes, priorities):
+        """ Set the priorities of slots and update their ancestors
+
+            :param indexes:         Slots
+            :param priorities:      New priorities
+
+        """
+        nodes = self.first_leaf + np.asarray(indexes, dtype=np.int64)
+        self.TREE[nodes] = priorities
+
+        # Each parent is recomputed from its children - a slot updated twice stays consistent
+        while len(nodes) and nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.TREE[nodes] = self.TREE[2 * nodes] + self.TREE[2 * nodes + 1]
+
+    def find(self, values):
+        """ Slots whose cumulative priority interval holds each value
+
+            :param values:          Values in [0, total)
+            :return:                Slots
+
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+
+        while nodes[0] < self.first_leaf:
+            left = self.TREE[2 * nodes]
+            right = (values >= left) & (self.TREE[2 * nodes + 1] > 0)
+            values -= np.where(right, left, 0.)
+            nodes = 2 * nodes + right
+
+        return np.minimum(nodes - self.first_leaf, self.capacity - 1)
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """ Replay Buffer sampling the positions in proportion to their priority
+
+        The priority of a position is (loss + epsilon) ** alpha, where loss is the last training loss (policy + value)
+        of the position. New positions get the highest priority seen so far. The bias of the sampling is corrected by
+        importance sampling weights (N * P(i)) ** -beta, normalised by their maximum.
+
+        Note: https://arxiv.org/abs/1511.05952
+
+    """
+
+    def __init__(self, capacity=50000, dtype=np.float32, alpha=0.6, beta=0.4, epsilon=1e-3):
+        """ Initialise an empty buffer
+
+            :param capacity:        Maximum number of positions kept
+            :param dtype:           Type of the stored arrays
+            :param alpha:           Prioritisation exponent (0 is uniform sampling)
+            :param beta:            Importance sampling exponent (1 fully corrects the bias)
+            :param epsilon:         Added to the losses so that every position can be sampled
+
+        """
+        super().__init__(capacity=capacity, dtype=dtype)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+
+        self.sum_tree = SumTree(self.capacity)
+        self.max_priority = 1.
+
+    def __repr__(self):
+        return "< Prioritized Replay Buffer | {} / {} Positions >".format(self.size, self.capacity)
+
+    def append(self, state, policy, value):
+        index = super().append(state, policy, value)
+        self.sum_tree.update([index], [self.max_priority])
+
+        return index
+
+    def extend(self, states, policies, values):
+        indexes = super().extend(states, policies, values)
+        self.sum_tree.update(indexes, np.full(len(indexes), self.max_priority))
+
+        return indexes
+
+    def sample(self, batch_size):
+        """ Prioritised minibatch (with replacement), one value drawn in each of batch_size equal priority segments
+
+            :param batch_size:      Number of positions
+            :return:                States, Policies, Values, slots of the positions and importance sampling weights
+
+        """
+        total = self.sum_tree.total
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * total / batch_size
+        indexes = self.sum_tree.find(values)
+
+        probabilities = self.sum_tree.priorities[indexes] / total
+        weights = np.power(self.size * probabilities, -self.beta)
+        weights /= weights.max()
+
+        return self.STATES[indexes], self.POLICIES[indexes], self.VALUES[indexes], indexes, weights
+
+    def update_priorities(self, indexes, losses):
+        """ Update the priorities of sampled positions from their training losses
+
+            :param indexes:         Slots of the positions (see sample)
+            :param losses:          Loss of each position
+
+        """
+        priorities = np.power(np.abs(losses) + self.epsilon, self.alpha)
+        self.sum_tree.update(indexes, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def clear(self):
+        super().clear()
+        self.sum_tree = SumTree(self.capacity)
+        self.max_priority = 1.
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.Rollouts
+
+*   Vectorised random playouts used by the Monte Carlo Tree Search simulation step
+*   R games are played at once on a (R, rows * columns) array of boards
+*   Each game plays the free squares in a random order (one permutation per board, drawn once)
+*   After a move only the lines through the square just played are checked (square -> lines table)
+
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def win_lines(shape=(3, 3), k=None):
+    """ Indexes (in the flattened board) of the squares of every line of k squares: horizontal, vertical, diagonal
+        and anti-diagonal
+
+        :param shape:           Shape of the board (rows, columns)
+        :param k:               Number of stones in a row needed to win - defaults to the smallest side of the board
+        :return:                Array (number of lines, k)
+
+    """
+    rows, columns = shape
+    k = min(shape) if k is None else k
+    squares = np.arange(rows * columns).reshape(shape)
+
+    lines = []
+    for d_row, d_column in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for row in range(rows):
+            for column in range(columns):
+                if 0 <= row + (k - 1) * d_row < rows and 0 <= column + (k - 1) * d_column < columns:
+                    lines.append([squares[row + i * d_row, column + i * d_column] for i in range(k)])
+
+    return np.array(lines, dtype=np.int64).reshape(-1, k)
+
+
+@lru_cache(maxsize=None)
+def square_lines(shape=(3, 3), k=None):
+    """ Win lines through each square of the board
+
+        :param shape:           Shape of the board (rows, columns)
+        :param k:               Number of stones in a row needed to win - defaults to the smallest side of the board
+        :return:                Array (rows * columns, max number of lines through a square) of indexes in
+                                win_lines(shape, k), padded with -1
+
+    """
+    lines = win_lines(shape, k)
+    through = [np.flatnonzero((lines == square).any(axis=1)) for square in range(shape[0] * shape[1])]
+
+    table = np.full((len(through), max([len(indexes) for indexes in through] + [1])), -1, dtype=np.int64)
+    for square, indexes in enumerate(through):
+        table[square, :len(indexes)] = indexes
+
+    return table
+
+
+def winners(boards, lines, players_values):
+    """ Winner of each board
+
+        :param boards:          Array of flattened boards (R, rows * columns)
+        :param lines:           Win lines (see win_lines)
+        :param players_values:  Values of the players
+        :return:                Array (R,) holding the value of the winner, 0 if there is none
+
+    """
+    sums = boards[:, lines].sum(axis=2)
+    result = np.zeros(len(boards), dtype=boards.dtype)
+
+    for value in players_values:
+        result[(sums == lines.shape[1] * value).any(axis=1)] = value
+
+    return result
+
+
+def random_rollouts(state, player_value, players_values, n_rollouts=32, k=None):
+    """ Play n_rollouts random games at once, from the same position until the end
+
+        :param state:           Board (rows, columns)
+        :param player_value:    Value of the player to move
+        :param players_values:  Values of the players, in the order they play
+        :param n_rollouts:      Number of games
+        :param k:               Number of stones in a row needed to win - defaults to the smallest side of the board
+        :return:                Array (n_rollouts,) holding the value of the winner of each game, 0 for a tie
+
+    """
+    lines, through = win_lines(state.shape, k), square_lines(state.shape, k)
+    boards = np.repeat(state.reshape(1, -1), n_rollouts, axis=0)
+    result = winners(boards, lines, players_values)
+
+    # Random order of the free squares of each game: the free squares get the largest random keys
+    free = state.ravel() == 0
+    keys = np.random.rand(n_rollouts, boards.shape[1])
+    keys[:, ~free] = -1
+    order = np.argsort(-keys, axis=1)[:, :free.sum()]
+
+    mover = players_values.index(player_value)
+    active = result == 0
+
+    for ply in range(order.shape[1]):
+        rows = np.flatnonzero(active)
+        if not len(rows):
+            break
+
+        moves = order[rows, ply]
+        value = players_values[mover]
+        boards[rows, moves] = value
+
+        # Only the player to move can win, on a line through the square just played
+        indexes = through[moves]
+        sums = boards[rows[:, None, None], lines[np.maximum(indexes, 0)]].sum(axis=2)
+        result[rows[((sums == lines.shape[1] * value) & (indexes >= 0)).any(axis=1)]] = value
+
+        active[rows] = result[rows] == 0
+        mover = (mover + 1) % len(players_values)
+
+    return result
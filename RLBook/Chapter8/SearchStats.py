@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.SearchStats
+
+Instrumentation of the Monte Carlo Tree Search
+
+*   Cumulative time and number of calls of each phase: selection, expansion, simulation, evaluation and
+    back-propagation
+*   Summary of the tree after each search: nodes, depth histogram, transpositions and evaluation cache counters
+*   Opt-in: the methods of the phases are wrapped on the search instance only, a search without statistics runs the
+    original methods
+
+"""
+import json
+import time
+
+import numpy as np
+
+# Phase -> methods of MonteCarloTreeSearch timed for that phase (the methods of a phase do not call each other)
+PHASES = {"SELECTION": ("selection",),
+          "EXPANSION": ("_expand_slot",),
+          "SIMULATION": ("simulation",),
+          "EVALUATION": ("_predict",),
+          "BACKPROPAGATION": ("backpropagate",)}
+
+
+class SearchStats:
+    """ Statistics of the searches run by a Monte Carlo Tree Search
+
+        TIME and CALLS hold the cumulative time (seconds) and number of calls of each phase, the other statistics are
+        updated at the end of each search.
+
+    """
+
+    def __init__(self):
+        self.TIME = dict.fromkeys(PHASES, 0.)
+        self.CALLS = dict.fromkeys(PHASES, 0)
+        self.reset()
+
+    def __repr__(self):
+        return "< Search Stats | {} Iterations | {:.1f} Iterations/s >".format(self.ITERATIONS,
+                                                                             self.iterations_per_sec)
+
+    def reset(self):
+        """ Reset every statistic (e.g. between two moves)
+        """
+        for phase in PHASES:
+            self.TIME[phase], self.CALLS[phase] = 0., 0
+
+        self.ITERATIONS = 0
+        self.SEARCH_TIME = 0.
+        self.NODES = 0
+        self.NODES_CREATED = 0
+        self.TRANSPOSITIONS = 0
+        self.DEPTHS = []
+        self.CACHE = None
+
+    @property
+    def iterations_per_sec(self):
+        return self.ITERATIONS / self.SEARCH_TIME if self.SEARCH_TIME else 0.
+
+    def timed(self, phase, func):
+        """ Wrap a function to accumulate its time and number of calls in a phase
+
+            :param phase:       Name of the phase
+            :param func:        Function (bound method)
+            :return:            Wrapped function
+
+        """
+        clock, total, calls = time.perf_counter, self.TIME, self.CALLS
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                total[phase] += clock() - start
+                calls[phase] += 1
+
+        return wrapper
+
+    def instrument(self, search):
+        """ Time the phases of a search by wrapping its methods (on the instance only)
+
+            :param search:      MonteCarloTreeSearch
+
+        """
+        for phase, methods in PHASES.items():
+            for method in methods:
+                search.__setattr__(method, self.timed(phase, search.__getattribute__(method)))
+
+    def record_search(self, search, iterations, elapsed, initial_nodes):
+        """ Record the summary of a search once it has ended
+
+            :param search:          MonteCarloTreeSearch
+            :param iterations:      Number of iterations run
+            :param elapsed:         Duration of the search in seconds
+            :param initial_nodes:   Number of nodes created when the search started (SearchTree.n_nodes)
+
+        """
+        tree = search.tree
+        self.ITERATIONS += iterations
+        self.SEARCH_TIME += elapsed
+        self.NODES = tree.n_nodes
+        self.NODES_CREATED += tree.n_nodes - initial_nodes
+
+        # Expanded nodes: the root and the expanded slots of each children block
+        parents = tree.PARENT[1:tree.size]
+        expanded = np.concatenate([[0], 1 + np.flatnonzero(
+            np.arange(1, tree.size) - tree.FIRST_CHILD[parents] < tree.N_CHILDREN[parents])])
+        self.TRANSPOSITIONS = int((tree.LINK[expanded] != expanded).sum())
+
+        # Depths - the parent of a node is always allocated before it, depths are found by pointer jumping
+        depths, parents = np.zeros(len(expanded), dtype=np.int64), tree.PARENT[expanded]
+        while (parents >= 0).any():
+            depths += parents >= 0
+            parents = np.where(parents >= 0, tree.PARENT[np.maximum(parents, 0)], -1)
+        self.DEPTHS = np.bincount(depths).tolist()
+
+        # Evaluation cache wrapped by the evaluation function (see EvaluationCache)
+        cache = getattr(search.policy, "__self__", None)
+        self.CACHE = dict(cache.stats, HIT_RATE=cache.hit_rate) if hasattr(cache, "hit_rate") else None
+
+    def as_dict(self):
+        """ Statistics as a (JSON serialisable) dictionary
+        """
+        return dict(ITERATIONS=self.ITERATIONS, SEARCH_TIME=self.SEARCH_TIME,
+                    ITERATIONS_PER_SEC=self.iterations_per_sec, TIME=dict(self.TIME), CALLS=dict(self.CALLS),
+                    NODES=self.NODES, NODES_CREATED=self.NODES_CREATED, TRANSPOSITIONS=self.TRANSPOSITIONS,
+                    DEPTHS=list(self.DEPTHS), CACHE=self.CACHE)
+
+    def write_json(self, handle, **info):
+        """ Write the statistics as one JSON line
+
+            :param handle:      File opened for writing
+            :param info:        Additional entries of the line (e.g. move number, player)
+
+        """
+        handle.write(json.dumps(dict(info, **self.as_dict())) + "\n")
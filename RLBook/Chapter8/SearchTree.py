@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.SearchTree
+
+*   Flat (struct-of-arrays) tree used by the Monte Carlo Tree Search
+*   Every node statistic lives in its own preallocated NumPy array, nodes are referenced by their index
+*   The children of a node are allocated as one contiguous block when the node is first expanded
+*   A child slot may link to another node holding the statistics of the same position (transpositions)
+
+"""
+import numpy as np
+
+
+class SearchTree:
+    """ Array backed Search Tree
+
+        Node statistics are stored column-wise, i.e. ``tree.N_PLAYS[i]`` is the number of plays of node ``i``. The
+        root node is always stored at index 0.
+
+        PROVEN flags the nodes whose game-theoretic value is known (MCTS-Solver), Q then holds that exact value.
+
+    """
+    ROOT = 0
+
+    # Node statistics: name -> (dtype, fill value of a freshly allocated node)
+    FIELDS = {"N_PLAYS": (np.int64, 0),
+              "N_WINS": (np.int64, 0),
+              "N_TIES": (np.int64, 0),
+              "VIRTUAL_LOSS": (np.int64, 0),
+              "Q": (np.float64, 0.),
+              "V": (np.float64, 0.),
+              "PRIOR": (np.float64, 1.),
+              "PARENT": (np.int64, -1),
+              "FIRST_CHILD": (np.int64, -1),
+              "N_CHILDREN": (np.int64, 0),
+              "N_MOVES": (np.int64, 0),
+              "ACTION": (np.int64, -1),
+              "LINK": (np.int64, -1),
+              "PROVEN": (np.bool_, False)}
+
+    # Statistics belonging to the edge (child slot) rather than the position it leads to
+    EDGE_FIELDS = ("ACTION", "PRIOR")
+
+    def __init__(self, capacity=1024, prior=1.):
+        """ Initialise an empty Search Tree holding only the root node
+
+            :param capacity:        Number of nodes to preallocate
+            :param prior:           Prior assigned to a freshly allocated node
+
+        """
+        self.capacity = max(int(capacity), 1)
+        self.size = 0
+        self.prior = prior
+
+        for name, (dtype, fill) in self.FIELDS.items():
+            self.__setattr__(name, np.full(self.capacity, fill, dtype=dtype))
+        self.PRIOR[:] = prior
+
+        # Create the Root
+        self.allocate(1)
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return "< Search Tree | Nodes {} | Capacity {} >".format(self.size, self.capacity)
+
+    @property
+    def n_nodes(self):
+        """ Number of nodes created: the root and the expanded child slots (len also counts the reserved slots)
+        """
+        return 1 + int(self.N_CHILDREN[:self.size].sum())
+
+    @property
+    def nbytes(self):
+        """ Memory (in bytes) used by the node statistics arrays
+        """
+        return sum(self.__getattribute__(name).nbytes for name in self.FIELDS)
+
+    def _grow(self, min_capacity):
+        """ Grow every array (at least doubling the capacity) so that min_capacity nodes can be stored
+
+            :param min_capacity:    Minimum number of nodes the tree needs to hold
+
+        """
+        capacity = max(2 * self.capacity, min_capacity)
+
+        for name, (dtype, fill) in self.FIELDS.items():
+            array = np.full(capacity, fill, dtype=dtype)
+            array[:self.size] = self.__getattribute__(name)[:self.size]
+            self.__setattr__(name, array)
+        self.PRIOR[self.size:] = self.prior
+        self.capacity = capacity
+
+    def allocate(self, n=1, parent=-1):
+        """ Allocate a contiguous block of nodes
+
+            :param n:               Number of nodes
+            :param parent:          Index of the parent node (-1 for the root)
+            :return:                Index of the first allocated node
+
+        """
+        start = self.size
+        if start + n > self.capacity:
+            self._grow(start + n)
+
+        self.size += n
+        self.PARENT[start:self.size] = parent
+        self.LINK[start:self.size] = np.arange(start, self.size)
+
+        return start
+
+    def allocate_children(self, parent, actions):
+        """ Reserve one child slot per action of a node, children are then expanded one after the other
+
+            :param parent:          Index of the parent node
+            :param actions:         Sequence of action indexes (one per child)
+            :return:                Index of the first child
+
+        """
+        first = self.allocate(len(actions), parent=parent)
+
+        self.ACTION[first:first + len(actions)] = actions
+        self.FIRST_CHILD[parent] = first
+        self.N_MOVES[parent] = len(actions)
+        self.N_CHILDREN[parent] = 0
+
+        return first
+
+    def children(self, index):
+        """ Indexes of the expanded children of a node
+
+            :param index:           Node index
+            :return:                Range of the children indexes
+
+        """
+        first = self.FIRST_CHILD[index]
+        return range(first, first + self.N_CHILDREN[index]) if first >= 0 else range(0)
+
+    def is_transposition(self, index):
+        """ True if the statistics of a node are held by another node
+        """
+        return self.LINK[index] != index
+
+    def is_fully_expanded(self, index):
+        """ True once every child slot of a node has been expanded
+        """
+        return self.FIRST_CHILD[index] >= 0 and self.N_CHILDREN[index] == self.N_MOVES[index]
+
+    def ancestors(self, index):
+        """ Iterate over the ancestors of a node, from its parent up to the root
+
+            :param index:           Node index
+            :return:                Generator of node indexes
+
+        """
+        index = self.PARENT[index]
+        while index >= 0:
+            yield index
+            index = self.PARENT[index]
+
+    def depth(self, index):
+        """ Depth of a node, the root has a depth of 0
+        """
+        return sum(1 for _ in self.ancestors(index))
+
+    def subtree(self, index):
+        """ Copy the sub-tree (or sub-DAG) reachable from a node into a new compact Search Tree
+
+            The node becomes the root of the new tree, nodes are renumbered breadth first and every node that is not
+            reachable is dropped. A position shared by several slots keeps a single copy of its statistics.
+
+            :param index:           Index of the node becoming the new root
+            :return:                New Search Tree, dictionary mapping old node indexes to the new ones
+
+        """
+        mapping = {index: 0}
+        src_slot, src_node, parents, links = [index], [index], [-1], [0]
+        first_children = {}
+
+        # Breadth first walk, children blocks are allocated in the order their parents are reached
+        queue, position = [(index, 0)], 0
+        while position < len(queue):
+            old, new = queue[position]
+            position += 1
+
+            first = self.FIRST_CHILD[old]
+            if first < 0:
+                continue
+
+            first_children[new] = len(src_slot)
+            for k in range(self.N_MOVES[old]):
+                slot, new_slot = first + k, len(src_slot)
+                target = self.LINK[slot]
+
+                if k >= self.N_CHILDREN[old]:
+                    # Slot not expanded yet
+                    links.append(new_slot)
+                    target = slot
+                elif target in mapping:
+                    # Position already copied - the slot only links to it
+                    links.append(mapping[target])
+                    target = slot
+                else:
+                    # First slot reaching this position holds its statistics
+                    mapping[target] = new_slot
+                    links.append(new_slot)
+                    queue.append((target, new_slot))
+
+                src_slot.append(slot)
+                src_node.append(target)
+                parents.append(new)
+
+        size = len(src_slot)
+        tree = SearchTree(capacity=size, prior=self.prior)
+        tree.allocate(size - 1)
+
+        # Vectorised copy of the statistics: edge fields from the slot, the others from the node holding the position
+        src_slot, src_node = np.array(src_slot), np.array(src_node)
+        for name in self.FIELDS:
+            source = src_slot if name in self.EDGE_FIELDS else src_node
+            tree.__getattribute__(name)[:size] = self.__getattribute__(name)[source]
+
+        tree.PARENT[:size] = parents
+        tree.LINK[:size] = links
+        tree.FIRST_CHILD[:size] = -1
+        tree.FIRST_CHILD[list(first_children)] = list(first_children.values())
+
+        return tree, mapping
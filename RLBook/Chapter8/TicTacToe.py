@@ -4,13 +4,44 @@
 Tic Tac Toe game implementation
 
 """
-from itertools import cycle
+from functools import lru_cache
+from itertools import cycle, product
 
 import numpy as np
 
 from RLBook.Chapter8.DefaultPlayers import DEFAULT_PLAYERS
 
 
+@lru_cache(maxsize=None)
+def zobrist_tables(shape=(3, 3), n_players=2, seed=2018):
+    """ Zobrist keys of each (square, player), one table per symmetry of the board (reflections and rotations)
+
+        The table of a symmetry holds at the index of a square the key of the square it is mapped to, a position
+        hashed with every table gets the same set of hashes as any of its symmetric positions.
+
+        :param shape:           Shape of the board (rows, columns)
+        :param n_players:       Number of players
+        :param seed:            Seed of the keys - keys are identical from one process to the next
+        :return:                List (8 symmetries for a square board, 4 otherwise) of lists (squares) of lists
+                                (players) of keys
+
+    """
+    n_squares = shape[0] * shape[1]
+    keys = np.random.RandomState(seed).randint(1, np.iinfo(np.int64).max, size=(n_squares, n_players),
+                                               dtype=np.int64)
+    squares = np.arange(n_squares).reshape(shape)
+
+    # Only a square board can be transposed (and rotated by a quarter turn)
+    boards = (squares, squares.T) if shape[0] == shape[1] else (squares,)
+
+    tables = []
+    for board in boards:
+        for symmetry in (board, board[::-1], board[:, ::-1], board[::-1, ::-1]):
+            tables.append(keys[np.argsort(symmetry.ravel())].tolist())
+
+    return tables
+
+
 class Game:
     """ TicTacToe game implementation to be used by Monte Carlo Tree Search
 
@@ -26,6 +57,7 @@ class Game:
                   (2, 0): 6,
                   (2, 1): 7,
                   (2, 2): 8}
+    POSITIONS = {index: position for position, index in DICTIONARY.items()}
     INDEX = {1: 0,
              0: 1}
 
@@ -40,20 +72,21 @@ class Game:
             :param nn_player:           Identification of which agent is the Neural Network
 
         """
-        # Game attributes
+        # Game attributes - shape of the board and number of stones in a row needed to win
         self.board_size = board_size
-        self.state = np.zeros((board_size, board_size), dtype=int)
-        self.last_play = None
-        self.sums = np.array([])
+        self.shape = (board_size, board_size)
+        self.k = board_size
 
         # players attributes
         if players is not None:
             self.players = players
 
         self.players_values = list([p.value for p in self.players])
+        self.players_index = {value: index for index, value in enumerate(self.players_values)}
         self.players_gen = cycle(self.players)
         self.current_player = next(self.players_gen)
-        self.history = [(self.state.copy(), None, self.current_player.value, None)]
+
+        self._new_board()
 
         # Using a Neural Network
         self.nn_player = nn_player
@@ -62,24 +95,72 @@ class Game:
     def __repr__(self):
         return "< TicTacToe > "
 
+    def _new_board(self):
+        """ Empty the board and every statistic updated on each move
+        """
+        self.state = np.zeros(self.shape, dtype=int)
+        self.last_play = None
+
+        # Sums of each column, row and diagonal, free squares (ordered set) & winner - updated on each move
+        self.sums = [0] * (2 * self.board_size + 2)
+        self.free = dict.fromkeys(product(range(self.shape[0]), range(self.shape[1])))
+        self._legal_plays = None
+        self._winner = None
+
+        # History: (square index, player value) of each move and the matching action probabilities
+        self.moves = []
+        self.policies = []
+
+        # Zobrist hash of the position - the hashes of its symmetries are only computed by canonical_key
+        self.hash = 0
+        self._zobrist = zobrist_tables(self.shape, len(self.players))[0]
+
     def __str__(self):
         return "< TicTacToe > "
 
+    @property
+    def key(self):
+        """ Zobrist hash of the position (stones on the board, the player to move is not part of it)
+        """
+        return self.hash
+
+    @property
+    def canonical_key(self):
+        """ Zobrist hash of the position identical for the symmetries (rotations and reflections) of the board
+
+            Computed from the moves on each call: only the hash of the position itself is updated on each move.
+
+        """
+        tables = zobrist_tables(self.shape, len(self.players))
+        hashes = [0] * len(tables)
+        for index, player_value in self.moves:
+            player_index = self.players_index[player_value]
+            for symmetry, table in enumerate(tables):
+                hashes[symmetry] ^= table[index][player_index]
+
+        return min(hashes)
+
+    def _hash_move(self, index, player_value):
+        """ Add (or remove - XOR is its own inverse) a stone to the Zobrist hash
+
+            :param index:           Index of the square
+            :param player_value:    Value of the player owning the stone
+
+        """
+        self.hash ^= self._zobrist[index][self.players_index[player_value]]
+
     def legal_plays(self):
-        """ Takes a sequence of game states representing the full game history
+        """ Moves that are legal to play for the current player
+
+            Note: The list is cached until the next move, it must not be modified.
 
             :return:        the list of moves tuples that are legal to play for the current player
 
         """
-        legal_plays = []
-        if self.winner is None:
-            free_spaces = np.isin(self.state, self.players_values, invert=True)
-            legal_plays = np.argwhere(free_spaces)
+        if self._legal_plays is None:
+            self._legal_plays = [] if self._winner is not None else list(self.free)
 
-            # convert numpy array to list of tuples
-            legal_plays = list(map(tuple, legal_plays))
-
-        return legal_plays
+        return self._legal_plays
 
     @property
     def winner(self):
@@ -88,13 +169,51 @@ class Game:
             :return:        Player or None
 
         """
-        for player in self.players:
-            # one axis is full of this player plays (= win)
-            if self.board_size * player.value in self.sums:
-                return player
+        return self._winner
+
+    @property
+    def n_actions(self):
+        """ Number of squares of the board - size of the policy
+        """
+        return self.state.size
+
+    @property
+    def is_terminal(self):
+        """ True once the game is won or the board is full
+        """
+        return self._winner is not None or not self.free
+
+    def _lines(self, move):
+        """ Indexes (in the sums) of the column, row and diagonals crossing a square
+        """
+        row, column = move
+        lines = [column, self.board_size + row]
+        if row == column:
+            lines.append(2 * self.board_size)
+        if row + column == self.board_size - 1:
+            lines.append(2 * self.board_size + 1)
+
+        return lines
+
+    def _update_lines(self, move, value):
+        """ Add a value to the sums of the column, row and diagonals crossing a square
+
+            :param move:            Square
+            :param value:           Value added to the sums
+
+        """
+        for line in self._lines(move):
+            self.sums[line] += value
+
+    def _is_win(self, move, value):
+        """ Check whether the stone just played on a square completes a line
+
+            :param move:            Square
+            :param value:           Value of the player owning the stone
+            :return:                True if one of the lines crossing the square sums to board_size * value (= win)
 
-        # no winner found
-        return None
+        """
+        return any(self.sums[line] == self.board_size * value for line in self._lines(move))
 
     def show_board(self, state_number=-1, return_string=False):
         """ Display the game board
@@ -107,7 +226,7 @@ class Game:
         # creates the string representation of the game
         lines = []
         no_player_display = '.'
-        for line in self.history[state_number][0]:
+        for line in self.board(state_number):
             elements = []
             for element in line:
                 if element in self.players_values:
@@ -132,33 +251,128 @@ class Game:
             :param action_prob:     Action probabilities from the Agent
 
         """
-        legal_plays = self.legal_plays()
-
         # If input move is provided check that it is legal
         if move is not None:
-            if move in legal_plays:
+            if self._winner is None and move in self.free:
                 selected_move = move
             else:
                 raise ValueError('Selected move is illegal')
         # Select a move randomly
         else:
-            selected_move = legal_plays[np.random.choice(len(legal_plays), 1)[0]]
+            legal_plays = self.legal_plays()
+            selected_move = legal_plays[np.random.randint(len(legal_plays))]
 
         # Updates states and players info
-        self.state[selected_move] = self.current_player.value
+        index, value = self.translate(selected_move), self.current_player.value
+        self.state[selected_move] = value
+        del self.free[selected_move]
+        self._legal_plays = None
+
+        self.moves.append((index, value))
+        self.policies.append(action_prob)
+        self._hash_move(index, value)
+
+        # Updates sums that are used to check for winner
+        self._update_lines(selected_move, value)
+        if self._is_win(selected_move, value):
+            self._winner = self.current_player
 
-        # Copy() needed to avoid appending a reference
-        # noinspection PyTypeChecker
-        self.history.append((self.state.copy(), self.translate(selected_move), self.current_player.value, action_prob))
         self.current_player = next(self.players_gen)
         self.last_play = selected_move
 
-        # Updates sums that are used to check for winner
-        self.sums = np.concatenate(
-            (np.sum(self.state, axis=0),  # vertical
-             np.sum(self.state, axis=1),  # horizontal
-             np.array([np.sum(np.diag(self.state)),  # diagonal
-                       np.sum(np.diag(self.state[::-1]))])))
+    def undo(self):
+        """ Undo the last move played - exact reverse of play
+
+            :return:                Move that has been undone
+
+        """
+        if not self.moves:
+            raise ValueError('No move to undo')
+
+        index, player_value = self.moves.pop()
+        self.policies.pop()
+        move = self.position(index)
+        self.state[move] = 0
+        self.free[move] = None
+        self._legal_plays = None
+        self._hash_move(index, player_value)
+
+        # Remove the move from the sums - no move can follow a win, the position before the move had no winner
+        self._update_lines(move, -player_value)
+        self._winner = None
+
+        # Restore the player of the move, the players generator then yields the player after them
+        player = self.players[self.players_values.index(player_value)]
+        while next(self.players_gen) != player:
+            pass
+        self.current_player = player
+        self.last_play = self.position(self.moves[-1][0]) if self.moves else None
+
+        return move
+
+    def unplay(self, move):
+        """ Undo a move, which has to be the last move played
+
+            :param move:            Move to undo
+
+        """
+        if move != self.last_play:
+            raise ValueError('Only the last move played can be undone')
+
+        self.undo()
+
+    def board(self, state_number=-1):
+        """ Rebuild the board from the moves
+
+            :param state_number:    Number of moves played on the board (negative values count from the current
+                                    board, -1)
+            :return:                Board (board_size, board_size)
+
+        """
+        n_states = len(self.moves) + 1
+        if not -n_states <= state_number < n_states:
+            raise IndexError('State {} does not exist'.format(state_number))
+
+        state = np.zeros_like(self.state)
+        for index, value in self.moves[:state_number % n_states]:
+            state[self.position(index)] = value
+
+        return state
+
+    def replay(self):
+        """ Replay the moves, rebuilding the board after each of them
+
+            :return:                Generator of (board after the move, square index, player value, action probs)
+
+        """
+        state = np.zeros_like(self.state)
+        for (index, value), action_prob in zip(self.moves, self.policies):
+            state[self.position(index)] = value
+            yield state.copy(), index, value, action_prob
+
+    @property
+    def history(self):
+        """ Full history rebuilt from the moves: the empty board followed by (board, square index, player value,
+            action probs) for each move
+        """
+        first_player = self.moves[0][1] if self.moves else self.current_player.value
+        return [(self.board(0), None, first_player, None)] + list(self.replay())
+
+    def encode(self, value=None):
+        """ Encode the board into a Neural Network input: the stones of a player and the stones of the others
+
+            :param value:           Value of the player of the first plane - defaults to the Neural Network player
+            :return:                State (1, 2, rows, columns)
+
+        """
+        value = self.nn_index[0].value if value is None else value
+
+        # Get empty template & Translate the State
+        states = np.zeros((1, 2) + self.state.shape)
+        states[0, 0, :, :] = np.abs(np.where(self.state == value, self.state, 0))
+        states[0, 1, :, :] = np.abs(np.where(self.state != value, self.state, 0))
+
+        return states
 
     def translate(self, position):
         """ Translate tuple to Index
@@ -169,12 +383,18 @@ class Game:
         """
         return self.DICTIONARY.get(position)
 
+    def position(self, index):
+        """ Translate Index to tuple
+
+            :param index:       Index in the Array (0-8)
+            :return:            Tuple of the Position
+
+        """
+        return self.POSITIONS.get(index)
+
     def reset(self):
         # Game attributes
-        self.state = np.zeros((self.board_size, self.board_size), dtype=int)
-        self.history = [self.state.copy()]  # copy() needed to avoid appending a reference
-        self.last_play = None
-        self.sums = np.array([])
+        self._new_board()
 
     @property
     def nn_index(self):
@@ -19,15 +19,19 @@ def main():
     # ##########################################################
     # params (Testing w/o NN):
     new_game = Game(players=DEFAULT_PLAYERS)
+    trees = {}
 
     # Play until end
     while new_game.legal_plays() and new_game.winner is None:
         print(new_game.player)
-        # Rollout the Tree
-        tree = MonteCarloTreeSearch(game=new_game,
-                                    evaluation_func=new_game.player.func,
-                                    node_param=new_game.player.mcts_params,
-                                    use_nn=new_game.player.use_nn)
+        # Rollout the Tree (one per player, reused from one move to the next)
+        tree = trees.get(new_game.player.value)
+        if tree is None:
+            tree = MonteCarloTreeSearch(game=new_game,
+                                        evaluation_func=new_game.player.func,
+                                        node_param=new_game.player.mcts_params,
+                                        use_nn=new_game.player.use_nn)
+            trees[new_game.player.value] = tree
 
         # Run the Tree Search
         tree.search(*new_game.player.mcts_search)
@@ -40,6 +44,8 @@ def main():
         # Play the recommended move and store the move
         tree.show_tree(level=1)
         new_game.play(move=move)
+        for each_tree in trees.values():
+            each_tree.move_root(move)
 
         # Show the tree and board, debugging
         new_game.show_board()
@@ -51,14 +57,19 @@ def main():
                                  config2=Config(**{}))
     models['1'].load_checkpoint("RLBook/Chapter8/20180214_KerasModel_TTT_V1")
 
+    trees = {}
+
     # Play until end
     while game.legal_plays() and game.winner is None:
         print(game.player)
-        # Rollout the Tree
-        tree = MonteCarloTreeSearch(game=game,
-                                    evaluation_func=models[str(game.player.value)].predict,
-                                    node_param=game.player.mcts_params,
-                                    use_nn=game.player.use_nn)
+        # Rollout the Tree (one per player, reused from one move to the next)
+        tree = trees.get(game.player.value)
+        if tree is None:
+            tree = MonteCarloTreeSearch(game=game,
+                                        evaluation_func=models[str(game.player.value)].predict,
+                                        node_param=game.player.mcts_params,
+                                        use_nn=game.player.use_nn)
+            trees[game.player.value] = tree
 
         # Run the Tree Search
         tree.search(*game.player.mcts_search)
@@ -71,6 +82,8 @@ def main():
         # Play the recommended move and store the move
         tree.show_tree(level=1)
         game.play(move=move)
+        for each_tree in trees.values():
+            each_tree.move_root(move)
 
         # Show the tree and board, debugging
         game.show_board()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+""" RLBook.Chapter8.TicTacToeSolver
+
+Exact TicTacToe solver used as a perfect evaluator and as an oracle
+
+*   Positions are seen from the player to move: each square is empty (0), held by the player to move (1) or held by
+    the opponent (2), the position index is the base 3 number of its squares (3 ** 9 entries)
+*   The game-theoretic value, the distance to the end and the optimal moves of every reachable position are solved by
+    retrograde analysis (from the positions with the most stones down to the empty board)
+*   The table is built once and cached to disk
+
+"""
+import logging
+import os
+
+import numpy as np
+
+N_SQUARES = 9
+POWERS = 3 ** np.arange(N_SQUARES)
+
+# Squares of the rows, columns and diagonals
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ttt_solver.npz")
+
+
+class TicTacToeSolver:
+    """ TicTacToe solved by retrograde analysis
+
+        VALUE[index]:   value for the player to move with perfect play (1 win, 0 draw, -1 loss)
+        DEPTH[index]:   number of moves until the end with perfect play (winner as fast as possible)
+        BEST[index]:    bit mask of the optimal moves (bit i set = square i is optimal)
+
+        The evaluation function (predict / predict_batch) takes Neural Network inputs (K, 2, 3, 3): the stones of the
+        Neural Network player then the stones of its opponent.
+
+    """
+
+    def __init__(self, path=DEFAULT_PATH, first_plane_moves=True):
+        """ Load the solved table (or build it and cache it to disk)
+
+            :param path:                Path of the cached table, None to build it without caching it
+            :param first_plane_moves:   Side to move when both players have the same number of stones (it depends on
+                                        who started): the player of the first plane if True
+
+        """
+        self.first_plane_moves = first_plane_moves
+
+        if path is not None and os.path.exists(path):
+            with np.load(path) as table:
+                self.VALUE, self.DEPTH, self.BEST = table["VALUE"], table["DEPTH"], table["BEST"]
+        else:
+            self.VALUE, self.DEPTH, self.BEST = self.solve()
+
+            if path is not None:
+                np.savez(path, VALUE=self.VALUE, DEPTH=self.DEPTH, BEST=self.BEST)
+                logging.info("TicTacToe solved, table cached in {}".format(path))
+
+    def __repr__(self):
+        return "< TicTacToe Solver | {} Positions >".format(int((self.DEPTH >= 0).sum()))
+
+    @staticmethod
+    def solve():
+        """ Solve every position reachable from the empty board by retrograde analysis
+
+            :return:        VALUE, DEPTH and BEST arrays (3 ** 9 entries, DEPTH is -1 for unreachable positions)
+
+        """
+        # Walk the game forward: reachable positions grouped by number of stones, with their children
+        levels, children = [{0: None}], {}
+        for n_stones in range(N_SQUARES):
+            level = {}
+            for index in levels[-1]:
+                squares = [index // power % 3 for power in POWERS]
+                if _is_lost(squares) or n_stones == N_SQUARES:
+                    continue
+
+                # The opponent becomes the player to move: 1 <-> 2, the new stone belongs to the opponent
+                swapped = [(3 - square) % 3 for square in squares]
+                children[index] = {}
+                for move in range(N_SQUARES):
+                    if not squares[move]:
+                        child = int(np.dot(swapped, POWERS)) + 2 * int(POWERS[move])
+                        children[index][move] = child
+                        level[child] = None
+            levels.append(level)
+
+        value = np.zeros(3 ** N_SQUARES, dtype=np.int8)
+        depth = np.full(3 ** N_SQUARES, -1, dtype=np.int8)
+        best = np.zeros(3 ** N_SQUARES, dtype=np.int16)
+
+        # Retrograde analysis: the children of a position are solved before the position
+        for level in reversed(levels):
+            for index in level:
+                if index not in children:
+                    # Terminal position: lost if the opponent completed a line, otherwise the board is full (draw)
+                    value[index] = -1 if _is_lost([index // power % 3 for power in POWERS]) else 0
+                    depth[index] = 0
+                    continue
+
+                # Best outcome for the player to move: win fast, lose slowly
+                scores = {move: (-value[child], -depth[child] if value[child] < 0 else depth[child])
+                          for move, child in children[index].items()}
+                top = max(scores.values())
+
+                value[index], depth[index] = top[0], abs(top[1]) + 1
+                best[index] = sum(1 << move for move, score in scores.items() if score == top)
+
+        return value, depth, best
+
+    @staticmethod
+    def index(game):
+        """ Index of the position of a game, seen from the player to move
+
+            :param game:    TicTacToe Game
+            :return:        Index in the table
+
+        """
+        state = game.state.ravel()
+        squares = np.where(state == game.current_player.value, 1, np.where(state != 0, 2, 0))
+
+        return int(np.dot(squares, POWERS))
+
+    def value(self, game):
+        """ Value of a game for the player to move with perfect play (1 win, 0 draw, -1 loss)
+        """
+        return int(self.VALUE[self.index(game)])
+
+    def best_moves(self, game):
+        """ Optimal moves of the player to move
+
+            :param game:    TicTacToe Game
+            :return:        List of moves tuples
+
+        """
+        best = int(self.BEST[self.index(game)])
+        return [game.position(move) for move in range(N_SQUARES) if best >> move & 1]
+
+    def predict_batch(self, tuple_arrays):
+        """ Batched evaluation of Neural Network inputs
+
+            The policy is uniform over the optimal moves of the player to move, the value is the value of the position
+            for the player of the first plane.
+
+            :param tuple_arrays:    Batch of states (K, 2, 3, 3)
+            :return:                Policies (K, 9) and Values (K,)
+
+        """
+        planes = np.asarray(tuple_arrays).reshape(len(tuple_arrays), 2, N_SQUARES) > 0
+        counts = planes.sum(axis=2)
+
+        # Side to move: the player with fewer stones
+        first_moves = (counts[:, 0] < counts[:, 1]) | ((counts[:, 0] == counts[:, 1]) & self.first_plane_moves)
+        mover = np.where(first_moves[:, None], planes[:, 0], planes[:, 1])
+        other = np.where(first_moves[:, None], planes[:, 1], planes[:, 0])
+        indexes = (mover + 2 * other).dot(POWERS)
+
+        policies = (self.BEST[indexes, None] >> np.arange(N_SQUARES)) & 1
+        policies = policies / np.maximum(policies.sum(axis=1, keepdims=True), 1)
+        values = np.where(first_moves, 1, -1) * self.VALUE[indexes]
+
+        return policies, values.astype(float)
+
+    def predict(self, tuple_arrays=None, state=None, current_player=0):
+        """ Evaluation function compatible with MonteCarloTreeSearch(use_nn=True, full_expansion=True)
+
+            Note: Without full expansion the search reads the prior of a child from the policy of the child position,
+            at the square just played - always 0 here, the oracle then does not guide the search.
+
+            :param tuple_arrays:    State (1, 2, 3, 3)
+            :param state:           Not used
+            :param current_player:  Not used
+            :return:                List of (action, probability) tuples and the value (see predict_batch)
+
+        """
+        policies, values = self.predict_batch(tuple_arrays)
+
+        return [(action, prob) for action, prob in enumerate(policies[0])], values[0]
+
+    evaluation_func = predict
+
+
+def _is_lost(squares):
+    """ True if the opponent (2) holds a full line
+    """
+    return any(squares[a] == squares[b] == squares[c] == 2 for a, b, c in LINES)
@@ -13,8 +13,11 @@ from copy import deepcopy
 import numpy as np
 
 from RLBook.Chapter8.Config import EnvConfig
+from RLBook.Chapter8.EvaluationCache import EvaluationCache, board_symmetries
 from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.MemoryStore import MemoryStore
 from RLBook.Chapter8.NNetPlayers import create_keras_models
+from RLBook.Chapter8.ReplayBuffer import MappedReplayBuffer, PrioritizedReplayBuffer, ReplayBuffer
 from RLBook.Chapter8.TicTacToe import Game
 from RLBook.Utils.Player import Player
 from RLBook.Utils.Trainer import Trainer
@@ -26,7 +29,7 @@ class TicTacToeTrainer(Trainer):
     CHECKPOINT = 0
 
     def __init__(self, environment=Game(), trainer_config={}, eval_functions=create_keras_models(),
-                 memory: list = None):
+                 memory=None):
         """ Initialise a Tic-Tac-Toe trainer
 
             Used for:
@@ -38,14 +41,36 @@ class TicTacToeTrainer(Trainer):
             :param environment:     Game or Env
             :param trainer_config:  All configuration settings for the Trainer
             :param eval_functions:  One evaluation function per player
-            :param memory:          List of the all the Memories captured during training
+            :param memory:          Memories captured during training: Replay Buffer, Memory Store (its chunks are
+                                    memory mapped, new positions are added to it) or lists of arrays (e.g. an
+                                    unpickled memory), copied into a buffer of CONFIG.MEMORY_SIZE positions
 
         """
         super().__init__(environment=environment, trainer_config=EnvConfig(**trainer_config))
         self.eval_function = eval_functions
 
-        if memory is not None:
+        # One evaluation cache per model, kept from one episode to the next
+        self.eval_cache = {}
+
+        buffer = PrioritizedReplayBuffer if self.CONFIG.PRIORITIZED_MEMORY else ReplayBuffer
+        if isinstance(memory, ReplayBuffer):
             self.EPISODE_MEM = memory
+        elif isinstance(memory, MemoryStore) and self.CONFIG.PRIORITIZED_MEMORY:
+            # The priorities are held per slot: the most recent positions are copied into the buffer
+            self.EPISODE_MEM = memory.load(buffer(capacity=self.CONFIG.MEMORY_SIZE))
+        elif isinstance(memory, MemoryStore):
+            self.EPISODE_MEM = MappedReplayBuffer(memory.arrays(mmap_mode="r", max_positions=self.CONFIG.MEMORY_SIZE),
+                                                  capacity=self.CONFIG.MEMORY_SIZE)
+        elif memory is not None:
+            self.EPISODE_MEM = buffer.from_lists(memory, capacity=self.CONFIG.MEMORY_SIZE)
+        else:
+            self.EPISODE_MEM = buffer(capacity=self.CONFIG.MEMORY_SIZE)
+
+        # On-disk memory - only the new positions are written by save_memory
+        if isinstance(memory, MemoryStore):
+            self.memory_store = memory
+        else:
+            self.memory_store = MemoryStore(self.CONFIG.MEMORY_PATH) if self.CONFIG.MEMORY_PATH else None
 
     def __repr__(self):
         return "< TicTacToe Trainer Class >"
@@ -56,7 +81,8 @@ class TicTacToeTrainer(Trainer):
     def run_episode(self, eval_phase=True):
         """ This function will run only one episode until the game terminates
 
-            If there is a winner the game states will be added to the Memory
+            If there is a winner the game states will be added to the Memory. The statistics of the search of each
+            move are appended to CONFIG.SEARCH_STATS_PATH (JSON lines) when it is set.
 
         """
         new_game = deepcopy(self.GAME)
@@ -66,30 +92,47 @@ class TicTacToeTrainer(Trainer):
         if np.random.random() > 0.5:
             new_game.current_player = next(new_game.players_gen)
 
+        # One Tree per player, each tree is reused (warm) from one move to the next
+        trees = {}
+
         # Play until end
         while new_game.legal_plays():
             # Rollout the Tree
-            tree = MonteCarloTreeSearch(game=new_game,
-                                        # Any model should have a predict method passed
-                                        evaluation_func=self.eval_function[str(new_game.player.value)].predict,
-                                        node_param=new_game.player.mcts_params,
-                                        use_nn=new_game.player.use_nn)
+            tree = trees.get(new_game.player.value)
+            if tree is None:
+                model = self.evaluation_model(new_game.player.value, new_game)
+                tree = MonteCarloTreeSearch(game=new_game,
+                                            # Any model should have a predict method passed
+                                            evaluation_func=model.predict,
+                                            batch_evaluation_func=getattr(model, "predict_batch", None),
+                                            node_param=new_game.player.mcts_params,
+                                            use_nn=new_game.player.use_nn,
+                                            full_expansion=new_game.player.mcts_full_expansion,
+                                            stats=self.CONFIG.SEARCH_STATS_PATH is not None)
+                trees[new_game.player.value] = tree
 
             # Run the Tree Search
-            tree.search(*new_game.player.mcts_search)
+            tree.search(*new_game.player.mcts_search, batch_size=new_game.player.mcts_batch_size)
+
+            if tree.stats is not None:
+                with open(self.CONFIG.SEARCH_STATS_PATH, "a") as handle:
+                    tree.stats.write_json(handle, MOVE=len(new_game.moves), PLAYER=new_game.player.value)
+                tree.stats.reset()
 
             # Play the recommended move and store the move
             move, action_prob = tree.recommended_play(train=eval_phase)
             tree.show_tree(level=1)
             new_game.play(move=move, action_prob=action_prob)
 
+            # Keep the searched sub-trees for the next moves
+            for each_tree in trees.values():
+                each_tree.move_root(move)
+
             logging.info("Showing board!")
             new_game.show_board()
 
         if new_game.winner is not None:
             logging.info("Winner found: {}".format(new_game.winner))
-            # Remove the first item - the first element in the list is just used for viz
-            new_game.history.pop(0)
 
             # Get the NNet player - this will ensure that the first index in the states (b, p, n, n) p is the players
             winner = new_game.winner.value
@@ -97,9 +140,10 @@ class TicTacToeTrainer(Trainer):
             # Initialise the Arrays for Training
             coin, index_player = new_game.nn_index
 
-            for ind, (state, action, player, move_prob) in enumerate(new_game.history):
+            for ind, (state, action, player, move_prob) in enumerate(new_game.replay()):
                 # Get empty templates
-                states, actions, scores = np.zeros((1, 2, 3, 3)), np.zeros((1, 9)), np.zeros((1, 1)) + winner
+                states, actions = np.zeros((1, 2) + state.shape), np.zeros((1, new_game.n_actions))
+                scores = np.zeros((1, 1)) + winner
 
                 # Translate the States
                 for index in range(2):
@@ -109,13 +153,34 @@ class TicTacToeTrainer(Trainer):
                         states[0, index, :, :] = np.abs(np.where(state != coin.value, state, 0))
 
                 # Store the information and use later...
-                self.EPISODE_MEM[0].append(states)
-                self.EPISODE_MEM[1].append(move_prob)
-                self.EPISODE_MEM[2].append(scores)
+                self.EPISODE_MEM.append(states, move_prob, scores)
+                if self.memory_store is not None:
+                    self.memory_store.append(states, move_prob, scores)
 
         # Return
         return 0 if winner is None else winner
 
+    def evaluation_model(self, player_value, game):
+        """ Model evaluating the positions of a player, wrapped in its evaluation cache (see EVAL_CACHE_SIZE)
+
+            :param player_value:    Value of the player
+            :param game:            Board Game - defines the symmetries of the cached positions
+            :return:                Object with predict (and predict_batch) methods
+
+        """
+        model = self.eval_function[str(player_value)]
+        if not self.CONFIG.EVAL_CACHE_SIZE:
+            return model
+
+        cache = self.eval_cache.get(str(player_value))
+        if cache is None or cache.model is not model:
+            cache = EvaluationCache(evaluation_func=model.predict,
+                                    batch_evaluation_func=getattr(model, "predict_batch", None),
+                                    capacity=self.CONFIG.EVAL_CACHE_SIZE, symmetries=board_symmetries(game))
+            self.eval_cache[str(player_value)] = cache
+
+        return cache
+
     def self_play(self):
         """ Initialise the self playing process
 
@@ -151,8 +216,8 @@ class TicTacToeTrainer(Trainer):
                 # Running the training of NNet
                 model.train(self.EPISODE_MEM)
 
-            # Pickle the Memory
-            self.pickle_memory()
+            # Save the Memory
+            self.save_memory()
 
             # Get the Best Function
             new_best_fn = self.player_check(player=player)
@@ -179,8 +244,16 @@ class TicTacToeTrainer(Trainer):
                 model.load_checkpoint(filename=best_fn)
                 _, model.model = model.net.compile_model()
 
-            # Pickle the Memory
+            # Save the Memory
+            self.save_memory()
+
+    def save_memory(self):
+        """ Write the new positions to the Memory Store (or pickle the whole memory without a store)
+        """
+        if self.memory_store is None:
             self.pickle_memory()
+        else:
+            self.memory_store.flush()
 
     def pickle_memory(self):
         """ Store all the Memory for use later
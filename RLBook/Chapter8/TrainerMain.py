@@ -6,9 +6,9 @@
 
 """
 import logging
-import pickle
 
-from RLBook.Chapter8.Config import Config
+from RLBook.Chapter8.Config import Config, EnvConfig
+from RLBook.Chapter8.MemoryStore import load_memory
 from RLBook.Chapter8.NNetPlayers import NNetPlayers, create_keras_models
 from RLBook.Chapter8.TicTacToe import Game
 from RLBook.Chapter8.Trainer import TicTacToeTrainer
@@ -23,8 +23,9 @@ def train_model():
     trainer_config = {}
     nn_net_one = {}
     nn_net_two = {}
-    with open("RLBook/Chapter8/ttt_memory.pickle", "rb") as handle:
-        memory_data = pickle.load(handle)
+
+    # Stored self-play data
+    memory_data = load_memory(EnvConfig(**trainer_config).MEMORY_PATH)
 
     # Initialise both the Game and each Players Models
     game = Game(players=NNetPlayers, using_nn=True, nn_player=0)
@@ -33,5 +33,19 @@ def upper_confidence_bound(node):
     return node.U
 
 
+def puct_scores(q, prior, n_plays, parent_plays, c_puct):
+    """ Vectorised Upper Confidence Bound (PUCT) used by AlphaZero, scores all the children of a node at once
+
+        :param q:               Array of the children action values
+        :param prior:           Array of the children prior probabilities
+        :param n_plays:         Array of the children number of plays
+        :param parent_plays:    Number of plays of the parent node
+        :param c_puct:          Exploration constant
+        :return:                Array of scores (Q + U)
+
+    """
+    return q + c_puct * prior * np.sqrt(parent_plays) / (1 + n_plays)
+
+
 def random_value_policy(state):
     return [(val, prob / 2) for val, prob in enumerate(np.ones(9))], 1.
@@ -27,6 +27,9 @@ class NeuralNet:
         self.CHECK_POINT = check_point
         self.model = None
 
+        # Incremented whenever the weights change - invalidates the cached evaluations
+        self.WEIGHTS_VERSION = 0
+
     @abstractclassmethod
     def train(self, examples):
         """ This function trains the neural network with examples obtained from self-play.
@@ -70,6 +73,7 @@ class NeuralNet:
 
         # load weights into new model
         self.model.load_weights("{}.h5".format(filename))
+        self.WEIGHTS_VERSION += 1
         logging.info("Model has been loaded from a check-pointed: {}".format(filename))
 
     @property
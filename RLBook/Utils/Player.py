@@ -49,6 +49,14 @@ class Player:
     def mcts_search(self):
         return self.c.MCTS_ITERATIONS, self.c.MCTS_MAX_TIME
 
+    @property
+    def mcts_batch_size(self):
+        return self.c.MCTS_BATCH_SIZE
+
+    @property
+    def mcts_full_expansion(self):
+        return self.c.MCTS_FULL_EXPANSION
+
     @property
     def mcts_params(self):
         return self.c.mcts_params
@@ -26,7 +26,7 @@ class ResidualNet:
 
         """
         mc = self.config
-        in_x = x = Input((2, 3, 3))
+        in_x = x = Input((2,) + tuple(mc.BOARD_SHAPE))
 
         # Where input is (batch, channels, height, width)
         x = Conv2D(filters=mc.CNN_FILTER_NUM, kernel_size=mc.CNN_FILTER_SIZE, padding="same",
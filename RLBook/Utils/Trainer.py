@@ -18,7 +18,7 @@ class Trainer:
     __metaclass__ = ABCMeta
 
     # class params
-    EPISODE_MEM = [[], [], []]
+    EPISODE_MEM = None
     GAME = None
     AGENTS = []
     AGENT_GEN = None
@@ -37,6 +37,9 @@ class Trainer:
         self.GAME = environment
         self.CONFIG = trainer_config
 
+        # Memory of the episodes - owned by each trainer
+        self.EPISODE_MEM = [[], [], []]
+
         # Assert that the Trainer class is ready for action
         self.__validate()
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Benchmarks
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from RLBook.Chapter8.Benchmarks import POSITIONS, batch_size_benchmark, position, play_match, run_suite
+from RLBook.Chapter8.RandomModel import RandomModel
+
+
+class TestChapter8Benchmarks(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_positions(self):
+        """ Test that the fixed positions are still being played
+        """
+        for moves in POSITIONS.values():
+            game = position(moves)
+
+            assert not game.is_terminal
+            assert len(game.moves) == len(moves)
+
+    def test_play_match(self):
+        """ Test that every game of a match is counted
+        """
+        results = play_match(time_budget=0.01, n_games=2, baseline_iterations=10)
+
+        assert sum(results.values()) == 2
+
+    def test_batch_size_benchmark(self):
+        """ Test that only the created nodes are counted for each batch size
+        """
+        results = batch_size_benchmark(model=RandomModel(), batch_sizes=(1, 4), max_iterations=40)
+
+        assert [result["batch_size"] for result in results] == [1, 4]
+        assert all(result["nodes"] <= result["iterations"] + 1 for result in results)
+
+    def test_run_suite(self):
+        """ Test that the results are written to a JSON file
+        """
+        path = os.path.join(self.directory, "benchmarks.json")
+        results = run_suite(path=path, evaluators=("random_policy", "random_model"), max_iterations=50,
+                            time_budgets=(0.01,), n_games=2)
+
+        with open(path) as handle:
+            assert json.load(handle) == json.loads(json.dumps(results))
+
+        assert len(results["throughput"]) == 2 * len(POSITIONS)
+        assert all(result["iterations"] == 50 for result in results["throughput"])
+        # One node created per iteration at most - the reserved child slots are not counted
+        assert all(result["nodes"] <= 51 for result in results["throughput"])
+        assert all(result["peak_tree_bytes"] > 0 for result in results["throughput"])
+        assert len(results["strength"]) == 1
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Bitboard TicTacToe
+"""
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.BitboardTicTacToe import BitboardGame
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.TicTacToe import Game
+from RLBook.Utils.MathOperations import random_value_policy
+
+
+class TestChapter8BitboardTTT(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def tearDown(self):
+        pass
+
+    def test_same_as_game(self):
+        """ Test that random games are played exactly as the NumPy implementation would
+        """
+        for _ in range(50):
+            game, bitboard = Game(), BitboardGame()
+
+            while game.legal_plays():
+                assert sorted(bitboard.legal_plays()) == sorted(game.legal_plays())
+
+                move = game.legal_plays()[np.random.randint(len(game.legal_plays()))]
+                game.play(move)
+                bitboard.play(move)
+
+                assert np.array_equal(bitboard.state, game.state)
+                assert bitboard.winner == game.winner
+                assert bitboard.current_player == game.current_player
+
+            assert bitboard.legal_plays() == []
+
+    def test_no_numpy_game_state(self):
+        """ Test that the statistics of the NumPy implementation are not left behind the bitboards
+        """
+        game = BitboardGame()
+        game.play((1, 1))
+        game.reset()
+
+        for attribute in ('free', 'sums', 'hash', '_legal_plays'):
+            assert not hasattr(game, attribute)
+        assert game.bits == [0, 0]
+        assert not game.moves
+
+    def test_undo(self):
+        """ Test that undo restores the bitboards, the state and the players
+        """
+        game = BitboardGame()
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+            game.play(move)
+
+        assert game.winner == game.players[0]
+        assert game.key == (0b000000111, 0b000011000)
+
+        assert game.undo() == (0, 2)
+        assert game.winner is None
+        assert game.current_player == game.players[0]
+        assert game.key == (0b000000011, 0b000011000)
+        assert game.state[0, 2] == 0
+
+    def test_illegal_move(self):
+        """ Test that occupied squares and moves after a win are rejected
+        """
+        game = BitboardGame()
+        game.play((1, 1))
+
+        self.assertRaises(ValueError, game.play, (1, 1))
+        self.assertRaises(ValueError, game.play, (3, 3))
+        self.assertRaises(ValueError, BitboardGame, 4)
+
+    def test_search(self):
+        """ Test the Monte Carlo Tree Search on bitboards
+        """
+        game = BitboardGame()
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            game.play(move)
+
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=500, max_runtime=20)
+
+        move, _ = tree.recommended_play(train=False)
+
+        assert move == (0, 2)
+        assert tree.GAME.key == game.key
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -49,7 +49,9 @@ class TestChapter8Config(unittest.TestCase):
 
         assert c3.nn_params == {'N_LABELS': 9, 'BATCH_SIZE': 8, 'CNN_FILTER_SIZE': 1, 'MCTS_MAX_TIME': 8, 'EPOCHS': 3,
                                 'RES_LAYER_NUM': 0,
-                                'L2_REG': 0.0002, 'MCTS_ITERATIONS': 10000, 'ACTIVATION': 'relu',
+                                'L2_REG': 0.0002, 'MCTS_ITERATIONS': 10000, 'MCTS_BATCH_SIZE': 1, 'BOARD_SHAPE': (3, 3),
+                                'MCTS_FULL_EXPANSION': False, 'N_TRAIN_SAMPLES': 512,
+                                'ACTIVATION': 'relu',
                                 'MODEL_NAME': '{}_KerasModel_TTT_V'.format(datetime.datetime.now().strftime("%Y%m%d")),
                                 'ACTIVATION_DENSE': 'tanh', 'VALUE_FC_SIZE': 1, 'CNN_FILTER_NUM': 2,
                                 'MODEL_TYPE': 'ResNet',
@@ -64,7 +66,10 @@ class TestChapter8Config(unittest.TestCase):
                               'MODEL_TYPE': 'ResNet',
                               'ACTIVATION_DENSE': 'tanh', 'PRIOR': 1.0, 'N_LABELS': 9,
                               'MODEL_NAME': '{}_KerasModel_TTT_V'.format(datetime.datetime.now().strftime("%Y%m%d")),
-                              'BATCH_SIZE': 8, 'MCTS_ITERATIONS': 10000, 'V': 0.0, 'CNN_FILTER_NUM': 2,
+                              'BATCH_SIZE': 8, 'MCTS_ITERATIONS': 10000, 'MCTS_BATCH_SIZE': 1, 'V': 0.0,
+                              'MCTS_FULL_EXPANSION': False, 'N_TRAIN_SAMPLES': 512,
+                              'BOARD_SHAPE': (3, 3),
+                              'CNN_FILTER_NUM': 2,
                               'MCTS_MAX_TIME': 8, 'Q': 0.0,
                               'RES_LAYER_NUM': 0, 'U': 0.0, 'L2_REG': 0.0002, 'N_TIES': 0, 'ACTION': None,
                               'CNN_FILTER_SIZE': 1,
@@ -95,7 +100,9 @@ class TestChapter8Config(unittest.TestCase):
         del d["START_T"]
         del d["START_TIME"]
 
-        assert d == {'N_EPISODE': 40, 'WIN_RATIO': 0.3, 'EVALUATIONS': 20, 'N_ITERATION': 30}
+        assert d == {'N_EPISODE': 40, 'WIN_RATIO': 0.3, 'EVALUATIONS': 20, 'N_ITERATION': 30, 'EVAL_CACHE_SIZE': 4096,
+                     'SEARCH_STATS_PATH': None, 'MEMORY_SIZE': 50000,
+                     'PRIORITIZED_MEMORY': False, 'MEMORY_PATH': 'ttt_memory'}
 
 
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Connect Four
+"""
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.ConnectFour import ConnectFour, mirror
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.Rollouts import win_lines, winners
+from RLBook.Utils.MathOperations import random_value_policy
+
+
+class TestChapter8ConnectFour(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def tearDown(self):
+        pass
+
+    def test_random_games(self):
+        """ Test the bitboards against the board: winner, stones and undo
+        """
+        lines = win_lines((6, 7), 4)
+
+        for _ in range(100):
+            game = ConnectFour()
+
+            while not game.is_terminal:
+                game.play()
+
+                winner = winners(game.state.reshape(1, -1), lines, game.players_values)[0]
+                assert (game.winner.value if game.winner is not None else 0) == winner
+                assert np.array_equal(game.board(), game.state)
+
+            n_moves = len(game.moves)
+            for _ in range(n_moves):
+                game.undo()
+
+            assert not game.state.any()
+            assert game.key == (0, 0)
+            assert len(game.legal_plays()) == 7
+
+    def test_gravity(self):
+        """ Test that stones stack up and that a full column cannot be played
+        """
+        game = ConnectFour()
+        for _ in range(6):
+            game.play(3)
+
+        assert list(game.state[:, 3]) == [-1, 1, -1, 1, -1, 1]
+        assert 3 not in game.legal_plays()
+        self.assertRaises(ValueError, game.play, 3)
+        self.assertRaises(ValueError, game.play, 7)
+
+        game.play(0)
+        assert game.show_board(return_string=True).split('\n')[-1] == 'O|.|.|O|.|.|.'
+
+    def test_wins(self):
+        """ Test four in a row horizontally, vertically and on both diagonals
+        """
+        sequences = {'horizontal': [0, 0, 1, 1, 2, 2, 3],
+                     'vertical': [4, 5, 4, 5, 4, 5, 4],
+                     'diagonal': [0, 1, 1, 2, 2, 3, 2, 3, 3, 6, 3],
+                     'anti-diagonal': [6, 5, 5, 4, 4, 3, 4, 3, 3, 0, 3]}
+
+        for name, moves in sequences.items():
+            game = ConnectFour()
+            for move in moves:
+                assert game.winner is None, name
+                game.play(move)
+
+            assert game.winner == game.players[0], name
+            assert game.is_terminal
+            assert game.legal_plays() == []
+
+            game.undo()
+            assert game.winner is None
+
+    def test_encode(self):
+        """ Test the Neural Network input built from the bitboards
+        """
+        game = ConnectFour(using_nn=True, nn_player=0)
+        for move in [3, 3, 4]:
+            game.play(move)
+
+        states = game.encode()
+        assert states.shape == (1, 2, 6, 7)
+        assert np.array_equal(states[0, 0], game.state == 1)
+        assert np.array_equal(states[0, 1], game.state == -1)
+        assert np.array_equal(game.encode(-1)[0, 0], game.state == -1)
+
+    def test_canonical_key(self):
+        """ Test that a position and its mirror image share the canonical key
+        """
+        game, mirrored = ConnectFour(), ConnectFour()
+        for move in [0, 1, 1]:
+            game.play(move)
+            mirrored.play(6 - move)
+
+        assert game.key != mirrored.key
+        assert game.canonical_key == mirrored.canonical_key
+        assert mirror(mirror(game.bits[0])) == game.bits[0]
+
+    def test_search(self):
+        """ Test that the Monte Carlo Tree Search blocks or completes four in a row
+        """
+        game = ConnectFour()
+        for move in [0, 6, 1, 6, 2]:
+            game.play(move)
+
+        # The second player has to block column 3
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=random_value_policy, transpositions=True)
+        tree.search(max_iterations=2000, max_runtime=20)
+        move, action_prob = tree.recommended_play(train=False)
+
+        assert move == 3
+        assert action_prob.shape == (1, 7)
+
+    def test_no_vectorised_rollouts(self):
+        """ Test that the vectorised rollouts (moves on any free square) are rejected
+        """
+        with self.assertRaises(ValueError):
+            MonteCarloTreeSearch(game=ConnectFour(), evaluation_func=random_value_policy, n_rollouts=16)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Evaluation Cache
+"""
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.ConnectFour import ConnectFour
+from RLBook.Chapter8.DefaultPlayers import DEFAULT_PLAYERS
+from RLBook.Chapter8.EvaluationCache import EvaluationCache, board_symmetries, DIHEDRAL, MIRROR, transform
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.TicTacToe import Game
+from RLBook.Chapter8.TicTacToeSolver import TicTacToeSolver
+
+
+class CountingModel:
+    """ Perfect evaluation (symmetric) counting the number of evaluated states
+    """
+
+    def __init__(self):
+        self.solver = TicTacToeSolver(path=None)
+        self.WEIGHTS_VERSION = 0
+        self.n_states = 0
+
+    def predict(self, tuple_arrays=None, state=None, current_player=0):
+        self.n_states += 1
+        return self.solver.predict(tuple_arrays)
+
+    def predict_batch(self, tuple_arrays):
+        self.n_states += len(tuple_arrays)
+        return self.solver.predict_batch(tuple_arrays)
+
+
+class TestChapter8EvaluationCache(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+        self.model = CountingModel()
+        self.cache = EvaluationCache(evaluation_func=self.model.predict, batch_evaluation_func=self.model.predict_batch,
+                                     capacity=64)
+        self.game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+
+    def tearDown(self):
+        pass
+
+    def test_symmetries(self):
+        """ Test the symmetries of the supported boards
+        """
+        assert board_symmetries(self.game) == DIHEDRAL
+        assert board_symmetries(ConnectFour(players=DEFAULT_PLAYERS)) == MIRROR
+
+    def test_symmetric_hit(self):
+        """ Test that the symmetric positions share one entry and the policy is mapped back to each of them
+        """
+        for move in [(0, 0), (1, 1), (0, 1)]:
+            self.game.play(move)
+        state = self.game.encode()
+
+        expected_probs, expected_value = self.model.solver.predict(state)
+        self.cache.predict(state)
+
+        for symmetry in DIHEDRAL:
+            rotated = np.ascontiguousarray(transform(state, symmetry))
+            action_probs, value = self.cache.predict(rotated)
+            expected = transform(np.array([prob for _, prob in expected_probs]).reshape(3, 3), symmetry).ravel()
+
+            assert np.allclose([prob for _, prob in action_probs], expected)
+            assert value == expected_value
+
+        assert self.model.n_states == 1
+        assert self.cache.stats == dict(HITS=8, MISSES=1, EVICTIONS=0, SIZE=1)
+
+    def test_batch(self):
+        """ Test that only the missing states of a batch are evaluated
+        """
+        states = np.concatenate([self.game.encode(), transform(self.game.encode(), (1, False))])
+        self.game.play((2, 2))
+        states = np.concatenate([states, self.game.encode()])
+
+        policies, values = self.cache.predict_batch(states)
+        expected_policies, expected_values = self.model.solver.predict_batch(states)
+
+        assert np.allclose(policies, expected_policies)
+        assert np.allclose(values, expected_values)
+        assert self.model.n_states == 3
+
+        self.cache.predict_batch(states)
+        assert self.model.n_states == 3
+        assert self.cache.hits == 3
+
+    def test_eviction(self):
+        """ Test that the least recently used position is evicted
+        """
+        cache = EvaluationCache(evaluation_func=self.model.predict, capacity=2)
+        states = []
+        for move in [(0, 0), (0, 1), (1, 1)]:
+            game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+            game.play(move)
+            states.append(game.encode())
+
+        cache.predict(states[0])
+        cache.predict(states[1])
+        cache.predict(states[0])
+        cache.predict(states[2])
+
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        assert cache.lookup(states[0][0]) is not None
+        assert cache.lookup(states[1][0]) is None
+
+    def test_invalidation(self):
+        """ Test that the cache is emptied once the weights change
+        """
+        self.cache.predict(self.game.encode())
+        self.cache.predict(self.game.encode())
+        assert self.model.n_states == 1
+
+        self.model.WEIGHTS_VERSION += 1
+        self.cache.predict(self.game.encode())
+
+        assert self.model.n_states == 2
+        assert len(self.cache) == 1
+
+    def test_search(self):
+        """ Test the cache as the evaluation function of the Monte Carlo Tree Search
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=self.cache.predict, use_nn=True,
+                                    batch_evaluation_func=self.cache.predict_batch)
+        tree.search(max_iterations=200, max_runtime=20, batch_size=8)
+
+        assert self.cache.hits > 0
+        assert self.model.n_states == self.cache.misses
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
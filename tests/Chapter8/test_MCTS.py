@@ -2,7 +2,22 @@
 # -*- coding: utf-8 -*-
 """ Testing for Chapter 8 Config
 """
+import time
 import unittest
+from copy import deepcopy
+
+import numpy as np
+
+from RLBook.Chapter8.DefaultPlayers import DEFAULT_PLAYERS
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.TicTacToe import Game
+from RLBook.Utils.MathOperations import random_value_policy
+
+
+def batch_random_value_policy(states):
+    """ Batched random evaluation: uniform policies and random values
+    """
+    return np.full((len(states), 9), 1 / 9), np.random.uniform(-1, 1, size=len(states))
 
 
 class TestChapter8MCTS(unittest.TestCase):
@@ -10,11 +25,329 @@ class TestChapter8MCTS(unittest.TestCase):
     """
 
     def setUp(self):
-        pass
+        np.random.seed(0)
+        self.game = Game(players=DEFAULT_PLAYERS)
 
     def tearDown(self):
         pass
 
+    def test_search(self):
+        """ Test that the statistics of the root are consistent with the number of iterations
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=200, max_runtime=20)
+
+        root = tree.tree.ROOT
+        children = tree.tree.children(root)
+
+        assert tree.tree.N_PLAYS[root] == 200
+        assert len(children) == 9
+        assert tree.tree.N_PLAYS[children].sum() == 200
+
+    def test_best_child(self):
+        """ Test the vectorised child selection
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=50, max_runtime=20)
+
+        root = tree.tree.ROOT
+        scores = tree.child_scores(root)
+
+        assert len(scores) == tree.tree.N_CHILDREN[root]
+        assert tree.best_child(root) == tree.tree.FIRST_CHILD[root] + np.argmax(scores)
+        assert tree.best_child(root, prob=1.) in tree.tree.children(root)
+
+    def test_recommended_play(self):
+        """ Test that the recommended move is a legal move
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=100, max_runtime=20)
+
+        move, action_prob = tree.recommended_play(train=False)
+
+        assert move in self.game.legal_plays()
+        assert action_prob.shape == (1, 9)
+
+    def test_stochastic_action_negative_scores(self):
+        """ Test that children are drawn by visits (or uniformly) when no score is positive
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=100, max_runtime=20)
+
+        nodes = np.array(tree.tree.children(tree.root))
+        scores = -np.ones(len(nodes))
+        tree.tree.N_PLAYS[nodes] = 0
+        tree.tree.N_PLAYS[nodes[3]] = 10
+
+        assert all(tree.stochastic_action(nodes, scores) == nodes[3] for _ in range(20))
+
+        # Not visited either - uniform
+        tree.tree.N_PLAYS[nodes] = 0
+        assert {tree.stochastic_action(nodes, scores) for _ in range(200)} == set(nodes)
+        assert tree.deterministic_action(nodes, scores) in nodes
+
+    def test_transpositions(self):
+        """ Test that identical positions share one node when the Transposition Table is enabled
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, transpositions=True)
+        tree.search(max_iterations=1000, max_runtime=20)
+
+        search_tree = tree.tree
+        links = search_tree.LINK[:len(search_tree)]
+        aliases = np.flatnonzero(links != np.arange(len(search_tree)))
+
+        assert search_tree.N_PLAYS[search_tree.ROOT] == 1000
+        assert len(aliases) > 0
+        assert len(tree.transpositions) == len(search_tree) - len(aliases) - \
+            (search_tree.N_MOVES[:len(search_tree)] - search_tree.N_CHILDREN[:len(search_tree)]).sum()
+
+        def replay(node):
+            # Replay the moves from the root down to a node
+            game = deepcopy(self.game)
+            for index in reversed([node] + list(search_tree.ancestors(node))[:-1]):
+                game.play(game.position(search_tree.ACTION[index]))
+            return game
+
+        for alias in aliases[:20]:
+            assert not search_tree.is_transposition(links[alias])
+            assert np.array_equal(replay(alias).state, replay(links[alias]).state)
+
+    def test_move_root(self):
+        """ Test that the statistics of the sub-tree are kept when the root is moved down
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, transpositions=True)
+        tree.search(max_iterations=300, max_runtime=20)
+
+        search_tree = tree.tree
+        slot = max(search_tree.children(search_tree.ROOT), key=lambda child: search_tree.N_PLAYS[child])
+        move = self.game.position(search_tree.ACTION[slot])
+        n_plays = search_tree.N_PLAYS[slot]
+
+        tree.move_root(move)
+        self.game.play(move)
+
+        assert tree.tree.N_PLAYS[tree.root] == n_plays
+        assert tree.tree.PARENT[tree.root] == -1
+        assert len(tree.tree) < len(search_tree)
+        assert np.array_equal(tree.GAME.state, self.game.state)
+        assert tree.transpositions[tree._position_key(self.game)] == tree.root
+
+        # Keep searching from the warm tree
+        tree.search(max_iterations=100, max_runtime=20)
+
+        assert tree.tree.N_PLAYS[tree.root] == n_plays + 100
+
+    def test_batch_search(self):
+        """ Test that the batched search evaluates several leaves per call and clears the virtual loss
+        """
+        calls = []
+
+        def batch_policy(states):
+            calls.append(len(states))
+            return np.ones((len(states), 9)) / 9, np.zeros(len(states))
+
+        game = Game(players=DEFAULT_PLAYERS, using_nn=True, nn_player=0)
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=random_value_policy, use_nn=True,
+                                    batch_evaluation_func=batch_policy)
+        tree.search(max_iterations=200, max_runtime=20, batch_size=8)
+
+        search_tree = tree.tree
+        children = search_tree.children(search_tree.ROOT)
+
+        assert search_tree.N_PLAYS[search_tree.ROOT] == 200
+        assert search_tree.VIRTUAL_LOSS[:len(search_tree)].sum() == 0
+        assert tree.pending == 0
+        assert max(calls) > 1
+        assert sum(calls) == len(search_tree) - 1 - \
+            (search_tree.N_MOVES[:len(search_tree)] - search_tree.N_CHILDREN[:len(search_tree)]).sum()
+        assert np.allclose(search_tree.PRIOR[children], 1 / 9)
+
+    def test_parallel_search(self):
+        """ Test that the root parallel search merges the root statistics of every worker
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+        tree.parallel_search(n_workers=2, max_iterations=200, max_runtime=20)
+
+        search_tree = tree.tree
+        children = search_tree.children(search_tree.ROOT)
+
+        assert search_tree.N_PLAYS[search_tree.ROOT] == 200
+        assert search_tree.N_PLAYS[children].sum() == 200
+        assert sorted(search_tree.ACTION[children]) == list(range(9))
+
+        move, _ = tree.recommended_play(train=False)
+        tree.move_root(move)
+
+        assert tree.GAME.state[move] == self.game.current_player.value
+
+    def test_threaded_search(self):
+        """ Test that the visit counts add up after concurrent back-propagations
+        """
+        def slow_policy(state):
+            # Releases the GIL as a Neural Network inference would
+            time.sleep(1e-4)
+            return random_value_policy(state)
+
+        game = Game(players=DEFAULT_PLAYERS, using_nn=True, nn_player=0)
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=slow_policy, use_nn=True)
+        tree.threaded_search(n_threads=4, max_iterations=400, max_runtime=20)
+
+        search_tree = tree.tree
+        n_plays = search_tree.N_PLAYS
+
+        assert n_plays[search_tree.ROOT] == 400
+        assert n_plays[search_tree.children(search_tree.ROOT)].sum() == 400
+        assert search_tree.VIRTUAL_LOSS[:len(search_tree)].sum() == 0
+        assert tree.pending == 0
+
+        # Every node is visited once when created, then each visit goes through one of its children
+        for node in range(1, len(search_tree)):
+            children = search_tree.children(node)
+            if len(children):
+                assert n_plays[node] == 1 + n_plays[children].sum()
+
+    def test_winning_move(self):
+        """ Test that the search finds an immediate win
+        """
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.game.play(move)
+
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=500, max_runtime=20)
+
+        move, _ = tree.recommended_play(train=False)
+
+        assert move == (0, 2)
+
+    def test_vectorised_simulation(self):
+        """ Test the search using several vectorised rollouts per leaf
+        """
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.game.play(move)
+
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, n_rollouts=16)
+        leaf_value = tree.simulation()
+
+        assert -1 - 1e-5 < leaf_value < 1 + 1e-5
+        assert tree.GAME.moves == self.game.moves
+
+        tree.search(max_iterations=500, max_runtime=20)
+        move, _ = tree.recommended_play(train=False)
+
+        assert tree.tree.N_PLAYS[tree.root] == 500
+        assert move == (0, 2)
+
+    def test_solver_win(self):
+        """ Test that a win in one move is proven and stops the search early
+        """
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.game.play(move)
+
+        for search in ['search', 'threaded_search']:
+            tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, solver=True)
+
+            # Stopping on a proven root is not a time out
+            with self.assertNoLogs(level='WARNING'):
+                tree.__getattribute__(search)(max_iterations=500, max_runtime=20)
+            move, _ = tree.recommended_play(train=False)
+
+            assert tree.tree.PROVEN[tree.root]
+            assert tree.tree.Q[tree.root] == 1
+            assert tree.tree.N_PLAYS[tree.root] < 500
+            assert move == (0, 2)
+
+    def test_solver_parallel_search(self):
+        """ Test that the proofs of the root parallel search workers are merged
+        """
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.game.play(move)
+
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, solver=True)
+        tree.parallel_search(n_workers=2, max_iterations=500, max_runtime=20)
+        move, _ = tree.recommended_play(train=False)
+
+        children = tree.tree.children(tree.root)
+        assert tree.tree.PROVEN[tree.root]
+        assert tree.tree.Q[tree.root] == 1
+        assert tree.tree.PROVEN[children].any()
+        assert tree.tree.N_MOVES[tree.root] == 5
+        assert move == (0, 2)
+
+    def test_solver_loss(self):
+        """ Test that a position lost against every move (double threat) is proven, with batches and threads
+        """
+        for move in [(0, 0), (1, 1), (2, 2), (0, 2), (2, 0)]:
+            self.game.play(move)
+
+        for search in ['search', 'threaded_search']:
+            tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, solver=True,
+                                        transpositions=True)
+            tree.__getattribute__(search)(max_iterations=500, max_runtime=20)
+
+            assert tree.tree.PROVEN[tree.root]
+            assert tree.tree.Q[tree.root] == -1
+            assert tree.tree.N_PLAYS[tree.root] < 500
+            assert tree.GAME.moves == self.game.moves
+
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, solver=True)
+        tree.search(max_iterations=500, max_runtime=20, batch_size=8)
+
+        assert tree.tree.PROVEN[tree.root]
+        assert tree.tree.Q[tree.root] == -1
+
+    def test_full_expansion(self):
+        """ Test that a node is evaluated once and its policy gives the priors of all its children
+        """
+        game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+        calls = []
+
+        def evaluation_func(state):
+            calls.append(len(state))
+            return random_value_policy(state)
+
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=evaluation_func, use_nn=True)
+        tree.search(max_iterations=200, max_runtime=20)
+        n_calls = len(calls)
+
+        calls.clear()
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=evaluation_func, use_nn=True, full_expansion=True)
+        tree.search(max_iterations=200, max_runtime=20)
+
+        root = tree.tree.ROOT
+        first = tree.tree.FIRST_CHILD[root]
+        priors = tree.tree.PRIOR[first:first + tree.tree.N_MOVES[root]]
+
+        assert tree.tree.N_PLAYS[root] == 200
+        assert np.isclose(priors.sum(), 1)
+        assert np.all(np.diff(priors) <= 0)
+        assert len(calls) < n_calls / 2
+
+        # Batches and threads
+        for search, kwargs in [('search', dict(batch_size=8)), ('threaded_search', dict())]:
+            calls.clear()
+            tree = MonteCarloTreeSearch(game=game, evaluation_func=evaluation_func, use_nn=True, full_expansion=True,
+                                        transpositions=True)
+            tree.__getattribute__(search)(max_iterations=200, max_runtime=20, **kwargs)
+
+            assert tree.tree.N_PLAYS[tree.tree.ROOT] == 200
+            assert len(calls) < n_calls / 2
+            assert tree.GAME.moves == game.moves
+
+    def test_full_expansion_parallel_search(self):
+        """ Test that the root parallel search workers expand fully (priors of the root evaluation)
+        """
+        game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=random_value_policy, use_nn=True, full_expansion=True,
+                                    batch_evaluation_func=batch_random_value_policy, virtual_loss=2.)
+        tree.parallel_search(n_workers=2, max_iterations=200, max_runtime=20, batch_size=4)
+
+        root = tree.tree.ROOT
+        children = tree.tree.children(root)
+
+        assert tree.tree.N_PLAYS[root] == 200
+        assert len(children) == 9
+        assert np.isclose(tree.tree.PRIOR[children].sum(), 1)
+
 
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 m,n,k Game
+"""
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.MNKGame import MNKGame
+from RLBook.Chapter8.Rollouts import random_rollouts, win_lines
+from RLBook.Chapter8.TicTacToe import Game, zobrist_tables
+from RLBook.Utils.MathOperations import random_value_policy
+
+
+class TestChapter8MNKGame(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def tearDown(self):
+        pass
+
+    def test_initialise(self):
+        """ Test the board of a 15x15 five-in-a-row game
+        """
+        game = MNKGame()
+
+        assert game.state.shape == (15, 15)
+        assert game.n_actions == 225
+        assert len(game.legal_plays()) == 225
+        assert len(zobrist_tables(game.shape)) == 8
+
+        assert game.translate((2, 3)) == 33
+        assert game.position(33) == (2, 3)
+        assert game.translate((15, 0)) is None
+        assert game.position(225) is None
+
+        self.assertRaises(ValueError, MNKGame, 3, 3, 4)
+
+    def test_local_win(self):
+        """ Test that k stones in a row win in each direction, k - 1 do not
+        """
+        lines = [[(7, column) for column in range(3, 8)],
+                 [(row, 0) for row in range(10, 15)],
+                 [(row, row) for row in range(5)],
+                 [(row, 14 - row) for row in range(10, 15)]]
+
+        for line in lines:
+            for order in (line, line[::-1], line[2:] + line[:2]):
+                game = MNKGame()
+                for position in order:
+                    assert game.winner is None
+                    game.play(position)
+                    if not game.is_terminal:
+                        # The other player plays far from the line
+                        game.play(next(move for move in game.legal_plays() if move[0] in (1, 13) and
+                                       move not in line))
+
+                assert game.winner == game.players[0]
+
+    def test_same_as_game(self):
+        """ Test that the 3,3,3 game is played as TicTacToe
+        """
+        for _ in range(30):
+            game, mnk = Game(), MNKGame(3, 3, 3)
+
+            while not game.is_terminal:
+                move = game.legal_plays()[np.random.randint(len(game.legal_plays()))]
+                assert game.translate(move) == mnk.translate(move)
+                game.play(move)
+                mnk.play(move)
+                assert game.winner == mnk.winner
+                assert game.key == mnk.key
+
+            assert mnk.is_terminal
+
+    def test_rectangle(self):
+        """ Test a rectangular board: 4 symmetries, undo and vectorised rollouts
+        """
+        game = MNKGame(4, 6, 4)
+        assert len(zobrist_tables(game.shape)) == 4
+        assert win_lines((4, 6), 4).shape == (3 * 4 + 1 * 6 + 2 * 3 * 1, 4)
+
+        for move in [(0, 0), (3, 5), (0, 5)]:
+            game.play(move)
+        key = game.key
+        game.play((1, 1))
+        game.undo()
+
+        assert game.key == key
+        assert game.show_board(return_string=True).count('\n') == 3
+
+        results = random_rollouts(game.state, game.current_player.value, game.players_values, n_rollouts=50, k=4)
+        assert set(results) <= {-1, 0, 1}
+
+    def test_search(self):
+        """ Test that the Monte Carlo Tree Search finds an immediate win on a larger board
+        """
+        game = MNKGame(6, 6, 4)
+        for move in [(2, 1), (5, 5), (2, 2), (5, 0), (2, 3), (0, 5)]:
+            game.play(move)
+
+        tree = MonteCarloTreeSearch(game=game, evaluation_func=random_value_policy)
+        tree.search(max_iterations=1500, max_runtime=20)
+
+        move, action_prob = tree.recommended_play(train=False)
+
+        assert move in [(2, 0), (2, 4)]
+        assert action_prob.shape == (1, 36)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
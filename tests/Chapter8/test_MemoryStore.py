@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Memory Store
+"""
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.MemoryStore import INDEX, MemoryStore, load_memory
+from RLBook.Chapter8.ReplayBuffer import MappedReplayBuffer, ReplayBuffer
+
+
+def positions(start, stop):
+    """ Positions filled with their number: states (K, 2, 3, 3), policies (K, 9) and values (K, 1)
+    """
+    values = np.arange(start, stop, dtype=np.float32)
+    return (np.ones((len(values), 2, 3, 3)) * values[:, None, None, None], np.ones((len(values), 9)) * values[:, None],
+            values[:, None])
+
+
+class TestChapter8MemoryStore(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        self.directory = os.path.join(tempfile.mkdtemp(), "memory")
+        self.store = MemoryStore(self.directory, chunk_size=4)
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.directory))
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_flush(self):
+        """ Test that full chunks and the tail are written, and nothing before the first flush
+        """
+        self.store.append(*positions(0, 6))
+        assert not os.path.exists(self.directory)
+        assert len(self.store) == 6
+
+        assert self.store.flush() == 6
+        assert self.store.chunks == ["chunk_000000"]
+        assert self.store.tail == "tail_000001_000002"
+
+        with open(os.path.join(self.directory, INDEX)) as handle:
+            index = json.load(handle)
+        assert index == dict(chunk_size=4, chunks=["chunk_000000"], tail="tail_000001_000002", tail_size=2)
+        assert not [name for name in self.files() if name.endswith(".tmp")]
+
+        # Nothing new - nothing written
+        assert self.store.flush() == 0
+
+    def test_append_only(self):
+        """ Test that committed chunks are never rewritten and the previous tail is removed
+        """
+        self.store.append(*positions(0, 6))
+        self.store.flush()
+        chunk = os.path.join(self.directory, "chunk_000000.states.npy")
+        modified = os.stat(chunk).st_mtime_ns
+
+        self.store.append(*positions(6, 7))
+        assert self.store.flush() == 3
+        assert os.stat(chunk).st_mtime_ns == modified
+        assert self.files() == sorted([INDEX] + ["{}.{}.npy".format(name, array)
+                                                 for name in ("chunk_000000", "tail_000001_000003")
+                                                 for array in ("states", "policies", "values")])
+
+        self.store.append(*positions(7, 9))
+        self.store.flush()
+        assert self.store.chunks == ["chunk_000000", "chunk_000001"]
+        assert self.store.tail == "tail_000002_000001"
+
+    def test_reopen(self):
+        """ Test that a store reopened from disk continues where it stopped
+        """
+        self.store.append(*positions(0, 6))
+        self.store.flush()
+        self.store.append(*positions(6, 7))
+
+        # Positions not flushed are lost
+        store = MemoryStore(self.directory, chunk_size=100)
+        assert store.chunk_size == 4
+        assert len(store) == 6
+
+        store.append(*positions(6, 10))
+        store.flush()
+        states = np.concatenate([arrays[0] for arrays in MemoryStore(self.directory).arrays()])
+        assert np.array_equal(states[:, 0, 0, 0], np.arange(10))
+
+    def test_arrays(self):
+        """ Test that the committed chunks are memory mapped and the pending positions follow them
+        """
+        self.store.append(*positions(0, 6))
+        self.store.flush()
+        self.store.append(*positions(6, 7))
+
+        chunks = self.store.arrays()
+        assert len(chunks) == 2
+        assert isinstance(chunks[0][0], np.memmap)
+        assert [len(arrays[0]) for arrays in chunks] == [4, 3]
+        assert np.array_equal(np.concatenate([arrays[2] for arrays in chunks]).ravel(), np.arange(7))
+
+        assert not isinstance(self.store.arrays(mmap_mode=None)[0][0], np.memmap)
+
+        # Only the most recent chunks are opened
+        self.store.append(*positions(7, 14))
+        self.store.flush()
+        assert [len(arrays[0]) for arrays in self.store.arrays(max_positions=5)] == [4, 2]
+        assert [len(arrays[0]) for arrays in self.store.arrays(max_positions=2)] == [2]
+        assert len(self.store.arrays(max_positions=100)) == 4
+
+    def test_load(self):
+        """ Test that a Replay Buffer is filled with the most recent positions
+        """
+        self.store.append(*positions(0, 14))
+        self.store.flush()
+
+        buffer = self.store.load(ReplayBuffer(capacity=5))
+        assert len(buffer) == 5
+        assert sorted(buffer.VALUES.ravel()) == [9, 10, 11, 12, 13]
+
+        buffer = self.store.load(ReplayBuffer(capacity=100))
+        assert len(buffer) == 14
+        assert np.array_equal(buffer.arrays()[1][:, 0], np.arange(14))
+
+    def test_mapped(self):
+        """ Test a Mapped Replay Buffer over the memory mapped chunks of a store
+        """
+        self.store.append(*positions(0, 14))
+        self.store.flush()
+
+        buffer = MappedReplayBuffer(self.store.arrays(mmap_mode="r", max_positions=10), capacity=10)
+        assert isinstance(buffer.chunks[0][0], np.memmap)
+        assert len(buffer) == 10
+
+        states, policies, values = buffer.sample(100)
+        assert set(values.ravel()) <= set(range(4, 14))
+        assert np.all(states[:, 1, 2, 2] == values[:, 0])
+
+    def test_load_memory(self):
+        """ Test that a pickled memory is migrated once into an empty store
+        """
+        pickle_path = os.path.join(os.path.dirname(self.directory), "memory.pickle")
+        with open(pickle_path, "wb") as handle:
+            pickle.dump([list(np.split(arrays, 6)) for arrays in positions(0, 6)], handle)
+
+        store = load_memory(self.directory, pickle_path=pickle_path)
+        assert isinstance(store, MemoryStore)
+        assert len(MemoryStore(self.directory)) == 6
+
+        # The store is used from then on
+        store.append(*positions(6, 8))
+        store.flush()
+        assert len(load_memory(self.directory, pickle_path=pickle_path)) == 8
+
+        assert len(load_memory(None, pickle_path=pickle_path)[0]) == 6
+        assert load_memory(None, pickle_path=self.directory + ".missing") is None
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Replay Buffer
+"""
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.KerasModel import KerasModel
+from RLBook.Chapter8.ReplayBuffer import MappedReplayBuffer, PrioritizedReplayBuffer, ReplayBuffer, SumTree
+
+
+def position(value):
+    """ Position filled with a value: state (1, 2, 3, 3), policy (1, 9) and value (1, 1)
+    """
+    return np.full((1, 2, 3, 3), value), np.full((1, 9), value), np.full((1, 1), value)
+
+
+class TestChapter8ReplayBuffer(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+        self.buffer = ReplayBuffer(capacity=4)
+
+    def tearDown(self):
+        pass
+
+    def test_append(self):
+        """ Test that the arrays are allocated from the first position
+        """
+        assert len(self.buffer) == 0
+        assert self.buffer.nbytes == 0
+
+        self.buffer.append(*position(1))
+        states, policies, values = self.buffer.arrays()
+
+        assert len(self.buffer) == 1
+        assert self.buffer.STATES.shape == (4, 2, 3, 3)
+        assert states.shape == (1, 2, 3, 3) and policies.shape == (1, 9) and values.shape == (1, 1)
+        assert np.all(states == 1)
+
+    def test_fifo(self):
+        """ Test that the oldest positions are overwritten once the buffer is full
+        """
+        for value in range(6):
+            self.buffer.append(*position(value))
+        nbytes = self.buffer.nbytes
+
+        assert len(self.buffer) == 4
+        assert sorted(self.buffer[2][:, 0]) == [2, 3, 4, 5]
+
+        self.buffer.extend(*(np.concatenate(arrays) for arrays in zip(*[position(value) for value in range(6, 12)])))
+
+        assert len(self.buffer) == 4
+        assert sorted(self.buffer[2][:, 0]) == [8, 9, 10, 11]
+        assert self.buffer.nbytes == nbytes
+
+    def test_views(self):
+        """ Test that the training arrays are views of the buffer
+        """
+        for value in range(3):
+            self.buffer.append(*position(value))
+
+        states, policies, values = KerasModel.concatenate_arrays(self.buffer)
+
+        assert np.shares_memory(states, self.buffer.STATES)
+        assert np.shares_memory(values, self.buffer.VALUES)
+        assert len(policies) == 3
+
+    def test_sample(self):
+        """ Test that a minibatch holds consistent positions
+        """
+        for value in range(4):
+            self.buffer.append(*position(value))
+
+        states, policies, values = self.buffer.sample(16)
+
+        assert states.shape == (16, 2, 3, 3)
+        assert np.all(states[:, 0, 0, 0] == values[:, 0])
+        assert np.all(policies[:, 0] == values[:, 0])
+
+    def test_from_lists(self):
+        """ Test the conversion of a memory of lists
+        """
+        memory = [[], [], []]
+        for value in range(6):
+            for index, array in enumerate(position(value)):
+                memory[index].append(array)
+
+        buffer = ReplayBuffer.from_lists(memory, capacity=4)
+
+        assert len(buffer) == 4
+        assert sorted(buffer[2][:, 0]) == [2, 3, 4, 5]
+        assert len(ReplayBuffer.from_lists([[], [], []])) == 0
+
+    def test_sum_tree(self):
+        """ Test the sums and the prefix sum search of the Sum Tree
+        """
+        tree = SumTree(capacity=5)
+        tree.update([0, 1, 2, 3, 4], [1., 2., 3., 4., 0.])
+
+        assert tree.total == 10
+        assert list(tree.find([0., 0.99, 1., 2.5, 3., 6., 9.99])) == [0, 0, 1, 1, 2, 3, 3]
+
+        tree.update([1, 1], [5., 0.])
+        assert tree.total == 8
+        assert list(tree.find([1.5, 7.9999])) == [2, 3]
+
+    def test_prioritized_sample(self):
+        """ Test that the positions are sampled in proportion to their priority, with importance sampling weights
+        """
+        buffer = PrioritizedReplayBuffer(capacity=4, alpha=1., beta=1., epsilon=0.)
+        for value in range(4):
+            buffer.append(*position(value))
+
+        # New positions get the highest priority
+        assert np.allclose(buffer.sum_tree.priorities, 1)
+
+        buffer.update_priorities(np.arange(4), np.array([1., 1., 1., 7.]))
+        states, policies, values, indexes, weights = buffer.sample(1000)
+
+        assert np.all(values[:, 0] == indexes)
+        assert 0.6 < np.mean(indexes == 3) < 0.8
+        assert np.isclose(weights.max(), 1)
+        assert np.allclose(weights[indexes == 3], 1 / 7)
+
+        # A new position gets the max priority seen so far
+        buffer.append(*position(4))
+        assert buffer.sum_tree.priorities[0] == 7
+
+    def test_prioritized_from_lists(self):
+        """ Test the conversion of a memory of lists into a prioritized buffer
+        """
+        memory = [[], [], []]
+        for value in range(3):
+            for index, array in enumerate(position(value)):
+                memory[index].append(array)
+
+        buffer = PrioritizedReplayBuffer.from_lists(memory, capacity=4)
+
+        assert isinstance(buffer, PrioritizedReplayBuffer)
+        assert buffer.sum_tree.total == 3
+        assert set(buffer.sample(50)[3]) == {0, 1, 2}
+
+    def test_mapped(self):
+        """ Test that a mapped buffer keeps the most recent stored positions and samples them with the new ones
+        """
+        chunks = [tuple(np.concatenate(arrays) for arrays in zip(*(position(value) for value in values)))
+                  for values in ([0, 1, 2], [3, 4])]
+        buffer = MappedReplayBuffer(chunks, capacity=4)
+
+        assert len(buffer) == 4
+        assert buffer.n_stored == 4
+        assert buffer.nbytes == 0
+        assert np.array_equal(buffer.arrays()[2].ravel(), [1, 2, 3, 4])
+
+        # New positions replace the oldest stored ones
+        buffer.append(*position(5))
+        assert len(buffer) == 4
+        assert np.array_equal(buffer[2].ravel(), [2, 3, 4, 5])
+
+        states, policies, values = buffer.sample(200)
+        assert set(values.ravel()) == {2, 3, 4, 5}
+        assert np.all(states[:, 0, 0, 0] == values[:, 0])
+        assert np.all(policies[:, 0] == values[:, 0])
+
+        buffer.extend(*(np.concatenate(arrays) for arrays in zip(*(position(value) for value in range(6, 9)))))
+        assert buffer.n_stored == 0
+        assert sorted(buffer.VALUES.ravel()) == [5, 6, 7, 8]
+
+        buffer.clear()
+        assert len(buffer) == 0
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
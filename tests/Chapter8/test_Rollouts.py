@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Vectorised Rollouts
+"""
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.Rollouts import random_rollouts, square_lines, win_lines, winners
+
+
+def full_check_rollouts(state, player_value, players_values, n_rollouts, k):
+    """ Same random games as random_rollouts, every line of every board checked after each move
+    """
+    lines = win_lines(state.shape, k)
+    free = state.ravel() == 0
+    keys = np.random.rand(n_rollouts, state.size)
+    keys[:, ~free] = -1
+    order = np.argsort(-keys, axis=1)[:, :free.sum()]
+
+    results = []
+    for moves in order:
+        board, mover, result = state.ravel().copy(), players_values.index(player_value), 0
+        for move in moves:
+            board[move] = players_values[mover]
+            result = winners(board[None], lines, players_values)[0]
+            if result:
+                break
+            mover = (mover + 1) % len(players_values)
+        results.append(result)
+
+    return np.array(results)
+
+
+class TestChapter8Rollouts(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def tearDown(self):
+        pass
+
+    def test_winners(self):
+        """ Test the win checks on a batch of boards
+        """
+        boards = np.array([[1, 1, 1, -1, -1, 0, 0, 0, 0],
+                           [-1, 1, 0, 1, -1, 0, 0, 1, -1],
+                           [1, -1, 1, 1, -1, -1, -1, 1, 1]])
+
+        assert win_lines().shape == (8, 3)
+        assert list(winners(boards, win_lines(), [1, -1])) == [1, -1, 0]
+
+    def test_random_rollouts(self):
+        """ Test that the games are played until the end with legal moves
+        """
+        state = np.zeros((3, 3), dtype=int)
+        results = random_rollouts(state, 1, [1, -1], n_rollouts=2000)
+
+        assert results.shape == (2000,)
+        assert set(results) <= {-1, 0, 1}
+        assert not state.any()
+
+        # The first player wins about 58% of the random games
+        assert 0.53 < np.mean(results == 1) < 0.63
+
+    def test_forced_results(self):
+        """ Test positions whose result does not depend on the random moves
+        """
+        won = np.array([[1, 1, 1], [-1, -1, 0], [0, 0, 0]])
+        assert (random_rollouts(won, -1, [1, -1], n_rollouts=10) == 1).all()
+
+        # Only one free square left, -1 completes the diagonal
+        last = np.array([[-1, 1, 1], [1, -1, -1], [-1, 1, 0]])
+        assert (random_rollouts(last, -1, [1, -1], n_rollouts=10) == -1).all()
+
+    def test_square_lines(self):
+        """ Test the lines through each square, and that the random games agree with a full check of the boards
+        """
+        lines = win_lines()
+        through = square_lines()
+
+        assert through.shape == (9, 4)
+        assert sorted(through[4]) == sorted(np.flatnonzero((lines == 4).any(axis=1)))
+        assert (through[1] == -1).sum() == 2
+
+        # 15x15 board, 5 in a row: at most 4 directions x 5 offsets through a square
+        assert square_lines((15, 15), 5).shape == (225, 20)
+
+        # Only the squares of the lines through the square played are checked: no win is missed
+        state = np.zeros((5, 5), dtype=int)
+        state[0, :3] = 1
+        state[1, :3] = -1
+        for player_value in (1, -1):
+            np.random.seed(1)
+            results = random_rollouts(state, player_value, [1, -1], n_rollouts=200, k=4)
+            np.random.seed(1)
+            assert np.array_equal(results, full_check_rollouts(state, player_value, [1, -1], 200, k=4))
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Search Stats
+"""
+import io
+import json
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.DefaultPlayers import DEFAULT_PLAYERS
+from RLBook.Chapter8.EvaluationCache import EvaluationCache
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.SearchStats import PHASES
+from RLBook.Chapter8.TicTacToe import Game
+from RLBook.Utils.MathOperations import random_value_policy
+
+
+class TestChapter8SearchStats(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+        self.game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+
+    def tearDown(self):
+        pass
+
+    def test_disabled(self):
+        """ Test that the phases are not wrapped without statistics
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy)
+
+        assert tree.stats is None
+        assert 'selection' not in tree.__dict__
+
+    def test_phases(self):
+        """ Test the number of calls of each phase and the summary of the tree
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, use_nn=True, stats=True)
+        tree.search(max_iterations=200, max_runtime=20)
+        stats = tree.stats
+
+        assert stats.ITERATIONS == 200
+        assert all(stats.CALLS[phase] == 200 for phase in PHASES)
+        assert all(stats.TIME[phase] > 0 for phase in PHASES)
+        assert stats.iterations_per_sec > 0
+        assert stats.NODES == stats.NODES_CREATED + 1 == tree.tree.n_nodes == 201
+        assert len(tree.tree) > stats.NODES
+
+        # One expanded node per iteration, plus the root
+        assert sum(stats.DEPTHS) == 201
+        assert stats.DEPTHS[:2] == [1, 9]
+
+        stats.reset()
+        assert stats.ITERATIONS == 0
+        assert stats.CALLS['SELECTION'] == 0
+
+    def test_batches_and_threads(self):
+        """ Test that the statistics add up over several searches
+        """
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=random_value_policy, use_nn=True, stats=True,
+                                    transpositions=True)
+        tree.search(max_iterations=96, max_runtime=20, batch_size=8)
+        tree.threaded_search(n_threads=2, max_iterations=100, max_runtime=20)
+
+        assert tree.stats.ITERATIONS == 196
+        # One evaluation per batch of 8 leaves, one per iteration of the threads
+        assert tree.stats.CALLS['EVALUATION'] == 12 + 100
+        assert tree.stats.CALLS['BACKPROPAGATION'] == 196
+        assert tree.stats.TRANSPOSITIONS > 0
+
+    def test_json(self):
+        """ Test the JSON line, including the counters of the evaluation cache
+        """
+        cache = EvaluationCache(evaluation_func=random_value_policy)
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=cache.predict, use_nn=True, stats=True)
+        tree.search(max_iterations=100, max_runtime=20)
+
+        handle = io.StringIO()
+        tree.stats.write_json(handle, MOVE=0)
+        line = json.loads(handle.getvalue())
+
+        assert handle.getvalue().count("\n") == 1
+        assert line['MOVE'] == 0
+        assert line['ITERATIONS'] == 100
+        assert line['CACHE']['MISSES'] == cache.misses
+        assert set(line['TIME']) == set(PHASES)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 Search Tree
+"""
+import unittest
+
+from RLBook.Chapter8.SearchTree import SearchTree
+
+
+class TestChapter8SearchTree(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_initialise(self):
+        """ Test the Initialisation of the Search Tree (root only)
+        """
+        tree = SearchTree(capacity=4)
+
+        assert len(tree) == 1
+        assert tree.PARENT[tree.ROOT] == -1
+        assert tree.N_PLAYS[tree.ROOT] == 0
+        assert list(tree.children(tree.ROOT)) == []
+
+    def test_allocate_children(self):
+        """ Test that children are allocated as a contiguous block
+        """
+        tree = SearchTree(capacity=4)
+        first = tree.allocate_children(tree.ROOT, [4, 0, 8])
+
+        assert first == 1
+        assert tree.N_MOVES[tree.ROOT] == 3
+        assert list(tree.children(tree.ROOT)) == []
+        assert not tree.is_fully_expanded(tree.ROOT)
+        assert len(tree) == 4
+        assert tree.n_nodes == 1
+
+        tree.N_CHILDREN[tree.ROOT] = 3
+        assert tree.n_nodes == 4
+
+        assert list(tree.children(tree.ROOT)) == [1, 2, 3]
+        assert list(tree.ACTION[tree.children(tree.ROOT)]) == [4, 0, 8]
+        assert tree.is_fully_expanded(tree.ROOT)
+        assert list(tree.ancestors(3)) == [tree.ROOT]
+
+    def test_grow(self):
+        """ Test that the arrays grow and keep their content
+        """
+        tree = SearchTree(capacity=2, prior=0.5)
+        tree.N_PLAYS[tree.ROOT] = 7
+        tree.allocate_children(tree.ROOT, range(9))
+
+        assert len(tree) == 10
+        assert tree.capacity >= 10
+        assert tree.N_PLAYS[tree.ROOT] == 7
+        assert tree.PRIOR[9] == 0.5
+        assert tree.depth(9) == 1
+
+    def test_subtree(self):
+        """ Test that a sub-tree is copied, renumbered and compacted
+        """
+        tree = SearchTree(capacity=4)
+        tree.allocate_children(tree.ROOT, [0, 1])
+        tree.N_CHILDREN[tree.ROOT] = 2
+        tree.allocate_children(2, [3, 4, 5])
+        tree.N_CHILDREN[2] = 1
+        tree.N_PLAYS[[0, 1, 2, 3]] = [10, 4, 6, 2]
+
+        subtree, mapping = tree.subtree(2)
+
+        assert len(subtree) == 4
+        assert mapping == {2: 0, 3: 1}
+        assert list(subtree.N_PLAYS[:4]) == [6, 2, 0, 0]
+        assert list(subtree.ACTION[subtree.children(subtree.ROOT)]) == [3]
+        assert subtree.N_MOVES[subtree.ROOT] == 3
+        assert subtree.PARENT[1] == subtree.ROOT
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
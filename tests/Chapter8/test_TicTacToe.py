@@ -4,6 +4,11 @@
 """
 import unittest
 
+import numpy as np
+
+from RLBook.Chapter8.BitboardTicTacToe import BitboardGame
+from RLBook.Chapter8.TicTacToe import Game, zobrist_tables
+
 
 class TestChapter8TTT(unittest.TestCase):
     """ Testing the Chapter8 Implementations
@@ -15,6 +20,151 @@ class TestChapter8TTT(unittest.TestCase):
     def tearDown(self):
         pass
 
+    def test_undo(self):
+        """ Test that undo restores the game exactly as it was before the move
+        """
+        game = Game()
+        game.play((1, 1))
+        state, player, sums = game.state.copy(), game.current_player, list(game.sums)
+
+        game.play((0, 0))
+        assert game.undo() == (0, 0)
+
+        assert np.array_equal(game.state, state)
+        assert game.sums == sums
+        assert game.current_player == player
+        assert game.last_play == (1, 1)
+        assert game.moves == [(4, 1)]
+
+        # The players keep alternating after an undo
+        game.play((0, 0))
+        assert game.state[0, 0] == player.value
+
+        game.undo()
+        game.undo()
+        assert not game.state.any()
+        assert game.last_play is None
+        assert not any(game.sums)
+        assert len(game.legal_plays()) == 9
+
+        self.assertRaises(ValueError, game.undo)
+
+    def test_terminal(self):
+        """ Test the cached winner, terminal status and legal moves
+        """
+        game = Game()
+        assert not game.is_terminal
+        assert game.legal_plays() is game.legal_plays()
+
+        for move in [(0, 0), (1, 0), (1, 1), (2, 0), (2, 2)]:
+            assert game.winner is None
+            game.play(move)
+
+        assert game.winner == game.players[0]
+        assert game.is_terminal
+        assert game.legal_plays() == []
+        self.assertRaises(ValueError, game.play, (0, 1))
+
+        game.undo()
+        assert game.winner is None
+        assert (2, 2) in game.legal_plays()
+        self.assertRaises(ValueError, game.play, (0, 0))
+
+        # Tie
+        game = Game()
+        for move in [(0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0), (2, 2)]:
+            game.play(move)
+
+        assert game.winner is None
+        assert game.is_terminal
+
+    def test_history(self):
+        """ Test that the boards are rebuilt from the moves
+        """
+        game = Game()
+        game.play((1, 1), action_prob=0.5)
+        game.play((0, 2))
+
+        assert game.moves == [(4, 1), (2, -1)]
+        assert game.policies == [0.5, 1]
+
+        assert not game.board(0).any()
+        assert np.array_equal(game.board(), game.state)
+        assert np.array_equal(game.board(-2), game.board(1))
+        self.assertRaises(IndexError, game.board, 3)
+
+        states = [state for state, _, _, _ in game.replay()]
+        assert len(states) == 2
+        assert states[0][1, 1] == 1 and states[0][0, 2] == 0
+        assert np.array_equal(states[1], game.state)
+
+        assert len(game.history) == 3
+        assert game.history[1][1:] == (4, 1, 0.5)
+        assert game.show_board(return_string=True) == '.|.|X\n.|O|.\n.|.|.'
+        assert game.show_board(state_number=0, return_string=True) == '.|.|.\n.|.|.\n.|.|.'
+
+    def test_unplay(self):
+        """ Test that only the last move can be undone
+        """
+        game = Game()
+        game.play((0, 0))
+        game.play((2, 2))
+
+        self.assertRaises(ValueError, game.unplay, (0, 0))
+        game.unplay((2, 2))
+        assert game.last_play == (0, 0)
+
+    def test_key(self):
+        """ Test that the Zobrist key identifies a position whatever the order of the moves
+        """
+        game, other = Game(), Game()
+        assert game.key == 0
+
+        for move in [(0, 0), (1, 1), (2, 2)]:
+            game.play(move)
+        for move in [(2, 2), (1, 1), (0, 0)]:
+            other.play(move)
+
+        assert game.key == other.key
+
+        key = game.key
+        game.play((0, 1))
+        assert game.key != key
+        game.undo()
+        assert game.key == key
+
+        game.undo()
+        game.play((0, 2))
+        assert game.key != other.key
+
+    def test_canonical_key(self):
+        """ Test that the canonical key is shared by the 8 symmetries of a position
+        """
+        assert len(zobrist_tables()) == 8
+
+        moves = [(0, 1), (0, 2)]
+        symmetries = [lambda r, c: (r, c), lambda r, c: (c, 2 - r), lambda r, c: (2 - r, 2 - c),
+                      lambda r, c: (2 - c, r), lambda r, c: (c, r), lambda r, c: (r, 2 - c),
+                      lambda r, c: (2 - r, c), lambda r, c: (2 - c, 2 - r)]
+
+        for cls in (Game, BitboardGame):
+            keys, canonical_keys = set(), set()
+            for symmetry in symmetries:
+                game = cls()
+                for move in moves:
+                    game.play(symmetry(*move))
+                keys.add(game.key)
+                canonical_keys.add(game.canonical_key)
+
+            assert len(keys) == 8
+            assert len(canonical_keys) == 1
+
+            # Same stones, different owners
+            game = cls()
+            for move in moves[::-1]:
+                game.play(move)
+            assert game.canonical_key not in canonical_keys
+
 
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner())
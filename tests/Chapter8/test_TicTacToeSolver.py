@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Testing for Chapter 8 TicTacToe Solver
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from RLBook.Chapter8.DefaultPlayers import DEFAULT_PLAYERS
+from RLBook.Chapter8.MCTS import MonteCarloTreeSearch
+from RLBook.Chapter8.TicTacToe import Game
+from RLBook.Chapter8.TicTacToeSolver import TicTacToeSolver
+
+
+class TestChapter8TicTacToeSolver(unittest.TestCase):
+    """ Testing the Chapter8 Implementations
+    """
+
+    def setUp(self):
+        np.random.seed(0)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "ttt_solver.npz")
+        self.solver = TicTacToeSolver(path=self.path)
+        self.game = Game(players=DEFAULT_PLAYERS, using_nn=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_empty_board(self):
+        """ Test that the empty board is a draw lasting 9 moves, every first move keeps the draw
+        """
+        assert self.solver.value(self.game) == 0
+        assert self.solver.DEPTH[self.solver.index(self.game)] == 9
+        assert len(self.solver.best_moves(self.game)) == 9
+
+    def test_immediate_win(self):
+        """ Test that a win in one move is found, and that the opponent has to block it
+        """
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.game.play(move)
+
+        assert self.solver.value(self.game) == 1
+        assert self.solver.best_moves(self.game) == [(0, 2)]
+        assert self.solver.DEPTH[self.solver.index(self.game)] == 1
+
+        self.game.undo()
+        assert self.solver.best_moves(self.game) == [(0, 2)]
+
+    def test_cache(self):
+        """ Test that the table is cached to disk and loaded back
+        """
+        assert os.path.exists(self.path)
+
+        loaded = TicTacToeSolver(path=self.path)
+        assert np.array_equal(loaded.VALUE, self.solver.VALUE)
+        assert np.array_equal(loaded.DEPTH, self.solver.DEPTH)
+        assert np.array_equal(loaded.BEST, self.solver.BEST)
+
+    def test_predict(self):
+        """ Test the evaluation function outputs from the point of view of the first plane
+        """
+        self.game.play((1, 1))
+        action_probs, value = self.solver.predict(self.game.encode(self.game.players[1].value))
+
+        assert len(action_probs) == 9
+        assert np.isclose(sum(prob for _, prob in action_probs), 1)
+        assert all(prob == 0 for action, prob in action_probs if action % 2)
+        assert value == 0
+
+        policies, values = self.solver.predict_batch(np.concatenate([self.game.encode(), self.game.encode()]))
+        assert policies.shape == (2, 9)
+        assert values.shape == (2,)
+
+    def test_self_play(self):
+        """ Test that perfect play always ends in a draw
+        """
+        for _ in range(5):
+            game = Game(players=DEFAULT_PLAYERS)
+            while not game.is_terminal:
+                game.play(self.solver.best_moves(game)[np.random.randint(len(self.solver.best_moves(game)))])
+
+            assert game.winner is None
+
+    def test_search(self):
+        """ Test the solver as the evaluation function of the Monte Carlo Tree Search
+        """
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            self.game.play(move)
+
+        tree = MonteCarloTreeSearch(game=self.game, evaluation_func=self.solver.evaluation_func, use_nn=True,
+                                    full_expansion=True)
+        tree.search(max_iterations=100, max_runtime=20)
+
+        # The priors of the root children are the policy of the oracle
+        search_tree = tree.tree
+        first = search_tree.FIRST_CHILD[tree.root]
+        slots = range(first, first + search_tree.N_MOVES[tree.root])
+        guided = [self.game.position(search_tree.ACTION[slot]) for slot in slots if search_tree.PRIOR[slot] > 0]
+        assert sorted(guided) == sorted(self.solver.best_moves(self.game)) == [(0, 2)]
+
+        move, action_prob = tree.recommended_play(train=False)
+        assert move == (0, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner())
@@ -24,6 +24,15 @@ class TestUtilsTrainer(unittest.TestCase):
 
         assert isinstance(t, Trainer)
 
+    def test_trainer_memory(self):
+        """ Each trainer owns its memory
+        """
+        t1 = Trainer(environment="Game", trainer_config="MSc Dan")
+        t2 = Trainer(environment="Game", trainer_config="MSc Dan")
+        t1.EPISODE_MEM[0].append(1)
+
+        assert t2.EPISODE_MEM == [[], [], []]
+
 
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner())
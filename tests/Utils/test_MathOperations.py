@@ -8,7 +8,7 @@ import numpy as np
 from anytree import Node
 
 from RLBook.Chapter8 import DEFAULT_NODE_PARAMS
-from RLBook.Utils.MathOperations import softmax, upper_confidence_bound
+from RLBook.Utils.MathOperations import softmax, upper_confidence_bound, puct_scores
 
 
 class TestMathOps(unittest.TestCase):
@@ -43,6 +43,17 @@ class TestMathOps(unittest.TestCase):
 
         assert upper_confidence_bound(node=node2) == 1.295238095238095
 
+    def test_puct_scores(self):
+        """ Test the vectorised PUCT scores against the scalar formula
+        """
+        q, prior, n_plays = np.array([1.2, 0., -1.]), np.array([1., .5, 1.]), np.array([20, 1, 3])
+        scores = puct_scores(q, prior, n_plays, parent_plays=1, c_puct=2)
+
+        assert scores.shape == (3,)
+        assert np.isclose(scores[0], 1.295238095238095)
+        assert np.isclose(scores[1], 0.5)
+        assert np.isclose(scores[2], -0.5)
+
 
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner())
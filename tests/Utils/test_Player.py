@@ -50,7 +50,8 @@ class TestUtilsPlayer(unittest.TestCase):
                                 'MODEL_NAME': datetime.datetime.now().strftime("%Y%m%d_KerasModel_TTT_V"),
                                 'RES_LAYER_NUM': 0,
                                 'CNN_FILTER_NUM': 2, 'EPOCHS': 3, 'ACTIVATION_POLICY': 'softmax', 'L2_REG': 0.0002,
-                                'MCTS_ITERATIONS': 10000,
+                                'MCTS_ITERATIONS': 10000, 'MCTS_BATCH_SIZE': 1, 'BOARD_SHAPE': (3, 3),
+                                'MCTS_FULL_EXPANSION': False, 'N_TRAIN_SAMPLES': 512,
                                 'BATCH_SIZE': 8, 'N_LABELS': 9}
 
         assert not p5.use_nn